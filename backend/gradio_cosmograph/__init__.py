@@ -1,4 +1,35 @@
-
+from .columnar import ColumnarGraph
 from .cosmograph import NetworkGraph
+from .delta import merge_graphs
+from .filtering import GraphFilter, filter_graph
+from .graph_file import GraphFile, save_graph
+from .graph_store import GraphHandle, GraphStore, store_graph
+from .layout import compute_layout, force_layout
+from .layout_cache import LayoutCache
+from .metrics import LogSink, PrometheusSink
+from .streaming import GraphBatch, stream_graph
+from .validation import validate_graph
+from .workers import GraphJobPool, JobCancelled
 
-__all__ = ["NetworkGraph"]
+__all__ = [
+    "ColumnarGraph",
+    "GraphBatch",
+    "GraphFile",
+    "GraphFilter",
+    "GraphHandle",
+    "GraphJobPool",
+    "GraphStore",
+    "JobCancelled",
+    "LayoutCache",
+    "LogSink",
+    "NetworkGraph",
+    "PrometheusSink",
+    "compute_layout",
+    "filter_graph",
+    "force_layout",
+    "merge_graphs",
+    "save_graph",
+    "store_graph",
+    "stream_graph",
+    "validate_graph",
+]
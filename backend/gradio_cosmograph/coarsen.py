@@ -0,0 +1,358 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable
+
+import numpy as np
+
+from .columnar import ColumnarGraph
+from .delta import diff_graphs, snapshot
+from .layout import graph_arrays
+
+# Levels of communities found by label propagation, further levels chunk the communities of the level below
+_MAX_LEVELS = 8
+
+
+def label_propagation(
+    source: np.ndarray,
+    target: np.ndarray,
+    node_count: int,
+    weights: np.ndarray | None = None,
+    iterations: int = 20,
+    tolerance: float = 1e-3,
+    seed: int = 0,
+    progress: Callable[[float], None] | None = None,
+) -> np.ndarray:
+    """
+    Detects communities by label propagation: every node repeatedly takes the label carrying the most link
+    weight among its neighbours. Half of the nodes, picked at random, are updated per iteration to avoid the
+    oscillations of fully synchronous updates.
+    Parameters:
+        source: source node index of each link
+        target: target node index of each link
+        node_count: number of nodes
+        weights: weight of each link, 1 if omitted
+        iterations: maximum number of iterations
+        tolerance: stop once an iteration changes the label of fewer than this fraction of the nodes
+        seed: seed used to break ties and pick the nodes to update
+        progress: called between iterations with the fraction of the iterations done; it may raise to stop
+    Returns:
+        the community of each node, numbered from 0
+    """
+    rng = np.random.default_rng(seed)
+    labels = np.arange(node_count, dtype=np.int64)
+    if not len(source):
+        return labels
+    ends = np.concatenate([source, target]).astype(np.int64)
+    neighbours = np.concatenate([target, source]).astype(np.int64)
+    if weights is None:
+        weights = np.ones(len(source))
+    weights = np.concatenate([weights, weights])
+
+    for iteration in range(iterations):
+        if progress is not None and iteration:
+            progress(iteration / iterations)
+        # total weight of every (node, neighbour label) pair, sorted by node then label
+        keys = ends * node_count + labels[neighbours]
+        order = np.argsort(keys)
+        keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        keys = keys[starts]
+        scores = np.add.reduceat(weights[order], starts) + rng.random(len(keys)) * 1e-6
+
+        # the best scoring label of every node
+        key_nodes = keys // node_count
+        node_starts = np.flatnonzero(np.r_[True, key_nodes[1:] != key_nodes[:-1]])
+        node_best = np.repeat(
+            np.maximum.reduceat(scores, node_starts), np.diff(np.r_[node_starts, len(keys)])
+        )
+        winners = scores == node_best
+        best = labels.copy()
+        best[key_nodes[winners]] = keys[winners] % node_count
+
+        # Converged once few labels would change, whichever half of them is picked
+        differs = best != labels
+        if differs.sum() <= tolerance * node_count:
+            break
+        changed = differs & (rng.random(node_count) < 0.5)
+        labels[changed] = best[changed]
+
+    return np.unique(labels, return_inverse=True)[1].reshape(-1)
+
+
+def _aggregate_links(
+    source: np.ndarray, target: np.ndarray, weights: np.ndarray, groups: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Maps link endpoints to their groups and merges parallel links, summing their weights."""
+    group_count = int(groups.max()) + 1 if len(groups) else 0
+    group_source, group_target = groups[source], groups[target]
+    between = group_source != group_target
+    keys, inverse = np.unique(
+        group_source[between] * group_count + group_target[between], return_inverse=True
+    )
+    summed = np.bincount(inverse.reshape(-1), weights=weights[between], minlength=len(keys))
+    return keys // group_count, keys % group_count, summed
+
+
+def _majority(groups: np.ndarray, values: np.ndarray, group_count: int) -> np.ndarray:
+    """Returns the most common value within each group."""
+    codes, value_codes = np.unique(values, return_inverse=True)
+    keys, counts = np.unique(groups * len(codes) + value_codes.reshape(-1), return_counts=True)
+    key_groups = keys // len(codes)
+    order = np.lexsort((-counts, key_groups))
+    first = order[np.r_[True, key_groups[order][1:] != key_groups[order][:-1]]]
+    majority = np.empty(group_count, dtype=values.dtype)
+    majority[key_groups[first]] = codes[keys[first] % len(codes)]
+    return majority
+
+
+class GraphHierarchy:
+    """
+    A graph coarsened into nested communities. Level 0 holds the original nodes, and each level above groups the
+    nodes of the level below. A view of the hierarchy shows the top level, with the communities listed in
+    `expanded` replaced by their members.
+    """
+
+    def __init__(self, value: dict[str, Any] | ColumnarGraph, max_nodes: int, seed: int = 0):
+        """
+        Parameters:
+            value: the full graph, as a dictionary with 'nodes' and 'links' or as a ColumnarGraph.
+            max_nodes: maximum number of nodes at the top level, and of members of any community.
+            seed: seed of the community detection.
+        """
+        if max_nodes < 2:
+            raise ValueError("Graphs can only be coarsened to at least 2 nodes.")
+        self.value = value
+        self.ids, self.source, self.target, self.link_index = graph_arrays(value)
+        node_count = len(self.ids)
+
+        # assignments[l][i] is the community at level l + 1 containing node i of level l
+        self.assignments: list[np.ndarray] = []
+        self.sizes: list[np.ndarray] = [np.ones(node_count, dtype=np.int64)]
+        source, target = self.source, self.target
+        weights = np.ones(len(source))
+        count = node_count
+        while count > max_nodes:
+            communities = label_propagation(source, target, count, weights, seed=seed)
+            groups = self._bound(communities, self.sizes[-1], max_nodes)
+            if groups.max() + 1 > 0.9 * count or len(self.assignments) >= _MAX_LEVELS:
+                # Communities no longer merge, e.g. for disconnected nodes: chunks of nodes at most a
+                # `max_nodes`-th as many are grouped instead
+                groups = self._bound(communities, self.sizes[-1], max_nodes, pool=True)
+            self.assignments.append(groups)
+            group_count = int(groups.max()) + 1
+            self.sizes.append(np.bincount(groups, weights=self.sizes[-1], minlength=group_count).astype(np.int64))
+            source, target, weights = _aggregate_links(source, target, weights, groups)
+            count = group_count
+
+        self.colors = self._community_colors()
+
+    @staticmethod
+    def _bound(groups: np.ndarray, sizes: np.ndarray, max_nodes: int, pool: bool = False) -> np.ndarray:
+        """
+        Regroups communities so expanding any of them shows at most `max_nodes` nodes: larger communities are split
+        into chunks of `max_nodes` members, and communities of a single node, which would expand into that node
+        alone, are pooled into such chunks. With `pool`, every community is, the heaviest first, so members of a
+        community stay together.
+        """
+        weight = np.bincount(groups, weights=sizes)
+        rank = np.empty(len(weight), dtype=np.int64)
+        rank[np.argsort(-weight, kind="stable")] = np.arange(len(weight))
+        pooled = np.ones(len(groups), dtype=bool) if pool else np.bincount(groups)[groups] == 1
+        # Nodes sorted by their community, pooled ones last and all in the same one, then chunked
+        order = np.lexsort((rank[groups], pooled))
+        keys = np.where(pooled, -1, rank[groups])[order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        position = np.arange(len(keys)) - np.repeat(starts, np.diff(np.r_[starts, len(keys)]))
+        chunks = np.empty(len(groups), dtype=np.int64)
+        chunks[order] = np.cumsum(position % max_nodes == 0) - 1
+        return chunks
+
+    @property
+    def levels(self) -> int:
+        return len(self.assignments)
+
+    def _members_at(self, level: int) -> np.ndarray:
+        """Returns the level `level` community of every original node."""
+        members = np.arange(len(self.ids))
+        for assignment in self.assignments[:level]:
+            members = assignment[members]
+        return members
+
+    def _node_colors(self) -> np.ndarray | None:
+        if isinstance(self.value, ColumnarGraph):
+            if self.value.color is None:
+                return None
+            return np.array([f"#{color:08x}" for color in self.value.color.tolist()])
+        colors = [node.get("color") for node in self.value.get("nodes") or []]
+        if not any(colors):
+            return None
+        return np.array([color or "" for color in colors])
+
+    def _community_colors(self) -> list[np.ndarray | None]:
+        node_colors = self._node_colors()
+        if node_colors is None:
+            return [None] * (self.levels + 1)
+        return [node_colors] + [
+            _majority(self._members_at(level), node_colors, len(self.sizes[level]))
+            for level in range(1, self.levels + 1)
+        ]
+
+    @staticmethod
+    def community_id(level: int, community: int) -> str:
+        return f"community:{level}:{community}"
+
+    @staticmethod
+    def _parse(node_id: str) -> tuple[int, int] | None:
+        parts = node_id.split(":")
+        if len(parts) != 3 or parts[0] != "community":
+            return None
+        return int(parts[1]), int(parts[2])
+
+    def _original_node(self, index: int) -> dict[str, Any]:
+        if not isinstance(self.value, ColumnarGraph):
+            return (self.value.get("nodes") or [])[index]
+        graph = self.value
+        node: dict[str, Any] = {"id": str(self.ids[index])}
+        for key in ("x", "y", "size"):
+            column = getattr(graph, key)
+            if column is not None:
+                node[key] = float(column[index])
+        if graph.color is not None:
+            node["color"] = f"#{int(graph.color[index]):08x}"
+        for key, column in graph.labels.items():
+            node[key] = str(column[index])
+        return node
+
+    def _original_link(self, index: int) -> dict[str, Any]:
+        if not isinstance(self.value, ColumnarGraph):
+            return (self.value.get("links") or [])[self.link_index[index]]
+        graph = self.value
+        link: dict[str, Any] = {
+            "source": str(self.ids[self.source[index]]),
+            "target": str(self.ids[self.target[index]]),
+        }
+        for key, column in graph.link_labels.items():
+            link[key] = str(column[index])
+        return link
+
+    def view(self, expanded: set[str] | frozenset[str] = frozenset(), label_key: str = "label") -> dict[str, Any]:
+        """
+        Builds the graph to display.
+        Parameters:
+            expanded: ids of the communities shown as their members rather than as a single node
+            label_key: node key that receives the description of each community
+        Returns:
+            a dictionary with 'nodes' and 'links', where community nodes have `expandable` set
+        """
+        if label_key == "id":
+            label_key = "label"
+        top = self.levels
+        # display level and community of every original node, starting from the top level
+        level = np.full(len(self.ids), top)
+        community = self._members_at(top)
+        for current in range(top, 0, -1):
+            opened = {c for l, c in filter(None, map(self._parse, expanded)) if l == current}
+            if not opened:
+                continue
+            at_level = level == current
+            opening = at_level & np.isin(community, list(opened))
+            level[opening] = current - 1
+            community[opening] = self._members_at(current - 1)[opening]
+
+        # one display code per distinct (level, community)
+        codes, display = np.unique(level * (len(self.ids) + 1) + community, return_inverse=True)
+        display = display.reshape(-1)
+        code_level = codes // (len(self.ids) + 1)
+        code_community = codes % (len(self.ids) + 1)
+
+        nodes = []
+        for code_index, (node_level, node_community) in enumerate(zip(code_level.tolist(), code_community.tolist())):
+            if node_level == 0:
+                nodes.append(self._original_node(node_community))
+                continue
+            size = int(self.sizes[node_level][node_community])
+            node = {
+                "id": self.community_id(node_level, node_community),
+                label_key: f"{size} nodes",
+                "size": float(4 + 2 * np.log2(size)),
+                "count": size,
+                "expandable": True,
+            }
+            colors = self.colors[node_level]
+            if colors is not None and colors[node_community]:
+                node["color"] = str(colors[node_community])
+            nodes.append(node)
+        display_ids = [str(node["id"]) for node in nodes]
+
+        source, target = display[self.source], display[self.target]
+        original = (code_level[source] == 0) & (code_level[target] == 0)
+        links = [self._original_link(index) for index in np.flatnonzero(original).tolist()]
+        aggregated_source, aggregated_target, weights = _aggregate_links(
+            source[~original], target[~original], np.ones(int((~original).sum())), np.arange(len(codes))
+        )
+        links += [
+            {"source": display_ids[s], "target": display_ids[t], "weight": int(w), "width": float(1 + np.log2(w))}
+            for s, t, w in zip(aggregated_source.tolist(), aggregated_target.tolist(), weights.tolist())
+        ]
+        return {"nodes": nodes, "links": links}
+
+
+def view_version(key: str, expanded: set[str] | frozenset[str]) -> str:
+    """Version token of a hierarchy view, stable for a given set of expanded communities."""
+    digest = hashlib.blake2b("\x00".join(sorted(expanded)).encode(), digest_size=8).hexdigest()
+    return f"{key}:{digest}"
+
+
+class HierarchyStore:
+    """
+    Keeps the most recently displayed hierarchies, so communities can be expanded after the coarse graph was sent.
+    """
+
+    def __init__(self, max_entries: int = 16):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, GraphHierarchy] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, key: str, hierarchy: GraphHierarchy) -> None:
+        with self._lock:
+            self._entries[key] = hierarchy
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key: str) -> GraphHierarchy | None:
+        with self._lock:
+            hierarchy = self._entries.get(key)
+            if hierarchy is not None:
+                self._entries.move_to_end(key)
+            return hierarchy
+
+    def expand(
+        self,
+        key: str,
+        previous: set[str],
+        expanded: set[str],
+        label_key: str = "label",
+        transform: Callable[[dict[str, Any], str], dict[str, Any]] | None = None,
+    ) -> dict[str, Any] | None:
+        """
+        Parameters:
+            transform: applied to both views with their version before they are compared
+        Returns:
+            the delta from the view with `previous` expanded to the view with `expanded` expanded, or None if the
+            hierarchy is no longer stored
+        """
+        hierarchy = self.get(key)
+        if hierarchy is None:
+            return None
+        base, version = view_version(key, previous), view_version(key, expanded)
+        old, new = hierarchy.view(previous, label_key), hierarchy.view(expanded, label_key)
+        if transform is not None:
+            old, new = transform(old, base), transform(new, version)
+        return {"format": "delta", "base": base, "version": version, **diff_graphs(snapshot(old), snapshot(new))}
+
+
+HIERARCHY_STORE = HierarchyStore()
@@ -0,0 +1,422 @@
+from __future__ import annotations
+
+import base64
+import copy
+import re
+from typing import Any
+
+import numpy as np
+from PIL import ImageColor
+
+# Wire dtypes understood by the frontend decoder (always little-endian).
+_WIRE_DTYPES = {
+    "float32": np.dtype("<f4"),
+    "uint32": np.dtype("<u4"),
+}
+
+_NODE_NUMERIC_COLUMNS = ("x", "y", "size")
+
+# String columns with at most this many distinct values per entry are sent as a category table and codes
+_MAX_CATEGORY_RATIO = 0.5
+
+_RGB_COLOR = re.compile(r"rgba?\((.*)\)")
+
+
+def encode_buffer(values: Any, dtype: str) -> dict[str, str]:
+    """
+    Packs an array into a base64 encoded little-endian buffer.
+    Parameters:
+        values: any array-like convertible to a NumPy array
+        dtype: one of the wire dtypes ("float32" or "uint32")
+    Returns:
+        a dictionary with the wire dtype and the base64 encoded bytes
+    """
+    array = np.ascontiguousarray(values, dtype=_WIRE_DTYPES[dtype])
+    return {"dtype": dtype, "data": base64.b64encode(array.data).decode("ascii")}
+
+
+def decode_buffer(buffer: dict[str, str]) -> np.ndarray:
+    """
+    Inverse of `encode_buffer`.
+    Parameters:
+        buffer: a dictionary with "dtype" and base64 encoded "data"
+    Returns:
+        a read-only NumPy view over the decoded bytes
+    """
+    return np.frombuffer(
+        base64.b64decode(buffer["data"]), dtype=_WIRE_DTYPES[buffer["dtype"]]
+    )
+
+
+def encode_strings(values: np.ndarray) -> list[str] | dict[str, Any]:
+    """
+    Dictionary-encodes a string column when it repeats enough values for that to pay off.
+    Parameters:
+        values: a NumPy string array
+    Returns:
+        a dictionary with the distinct "categories" and a uint32 buffer of "codes" indexing them, or the plain list
+        of strings for columns that are mostly distinct
+    """
+    categories, codes = np.unique(values, return_inverse=True)
+    if len(categories) > _MAX_CATEGORY_RATIO * len(values):
+        return values.tolist()
+    return {"categories": categories.tolist(), "codes": encode_buffer(codes.reshape(-1), "uint32")}
+
+
+def decode_strings(column: list[str] | dict[str, Any]) -> np.ndarray:
+    """Inverse of `encode_strings`."""
+    if isinstance(column, dict):
+        return np.asarray(column["categories"], dtype=str)[decode_buffer(column["codes"])]
+    return np.asarray(column, dtype=str)
+
+
+def _parse_color(color: str) -> int:
+    """Parses a CSS color, e.g. "#aabbcc", "rgb(170 187 204 / 50%)", "steelblue" or "hsl(210, 40%, 50%)"."""
+    text = color.strip().lower()
+    if text == "transparent":
+        return 0
+    if text.startswith("#"):
+        hex_value = text[1:]
+        if len(hex_value) in (3, 4):
+            hex_value = "".join(c * 2 for c in hex_value)
+        if len(hex_value) == 6:
+            hex_value += "ff"
+        if len(hex_value) == 8:
+            try:
+                return int(hex_value, 16)
+            except ValueError:
+                pass
+        raise ValueError(f"Unsupported color {color!r}, expected a CSS color.")
+    match = _RGB_COLOR.fullmatch(text)
+    if match:
+        parts = [part for part in re.split(r"[\s,/]+", match.group(1).strip()) if part]
+        if len(parts) not in (3, 4):
+            raise ValueError(f"Unsupported color {color!r}, expected a CSS color.")
+        try:
+            channels = [_channel(part, 255) for part in parts[:3]]
+            alpha = _channel(parts[3], 1) if len(parts) == 4 else 255
+        except ValueError:
+            raise ValueError(f"Unsupported color {color!r}, expected a CSS color.") from None
+        red, green, blue = channels
+        return (red << 24) | (green << 16) | (blue << 8) | alpha
+    try:
+        # Named and hsl() colors
+        red, green, blue, *alpha = ImageColor.getrgb(text)
+    except ValueError:
+        raise ValueError(f"Unsupported color {color!r}, expected a CSS color.") from None
+    return (red << 24) | (green << 16) | (blue << 8) | (alpha[0] if alpha else 255)
+
+
+def _channel(part: str, scale: float) -> int:
+    """A color channel between 0 and 255, from a number up to `scale` or a percentage."""
+    value = float(part[:-1]) / 100 if part.endswith("%") else float(part) / scale
+    return round(min(max(value, 0.0), 1.0) * 255)
+
+
+def pack_colors(colors: Any) -> np.ndarray:
+    """
+    Converts colors to packed 0xRRGGBBAA integers. Strings are parsed once per distinct value.
+    Parameters:
+        colors: packed integers, or CSS color strings such as "#aabbcc", "#aabbccdd", "rgb(170, 187, 204)",
+            "rgba(170, 187, 204, 0.5)" or "steelblue"
+    Returns:
+        a uint32 array with one packed color per entry
+    """
+    colors = np.asarray(colors)
+    if np.issubdtype(colors.dtype, np.integer):
+        return colors.astype(np.uint32)
+
+    distinct, inverse = np.unique(colors.astype(str), return_inverse=True)
+    packed = np.array([_parse_color(color) for color in distinct.tolist()], dtype=np.uint32)
+    return packed[inverse.reshape(-1)]
+
+
+def _table_columns(table: Any) -> dict[str, np.ndarray]:
+    """Returns the columns of a pandas DataFrame or pyarrow Table as NumPy arrays."""
+    if hasattr(table, "column_names"):  # pyarrow.Table
+        return {
+            name: table.column(name).to_numpy(zero_copy_only=False)
+            for name in table.column_names
+        }
+    return {str(name): table[name].to_numpy() for name in table.columns}
+
+
+def is_table(value: Any) -> bool:
+    """Whether `value` looks like a pandas DataFrame or a pyarrow Table."""
+    return hasattr(value, "column_names") or (
+        hasattr(value, "columns") and hasattr(value, "to_numpy")
+    )
+
+
+class ColumnarGraph:
+    """
+    A graph stored as parallel arrays instead of lists of node and link dictionaries. Returned from a
+    function, it is sent to the frontend as packed binary buffers rather than per-object JSON.
+    """
+
+    def __init__(
+        self,
+        source: Any,
+        target: Any,
+        *,
+        ids: Any | None = None,
+        x: Any | None = None,
+        y: Any | None = None,
+        size: Any | None = None,
+        color: Any | None = None,
+        labels: dict[str, Any] | None = None,
+        link_width: Any | None = None,
+        link_color: Any | None = None,
+        link_labels: dict[str, Any] | None = None,
+        node_count: int | None = None,
+        indices: bool = False,
+    ):
+        """
+        Parameters:
+            source: source node of each link, as node ids, or as node indices if `ids` is omitted or `indices` is True.
+            target: target node of each link, as node ids, or as node indices if `ids` is omitted or `indices` is True.
+            ids: node ids. If omitted, nodes are identified by their index.
+            x: initial x position of each node.
+            y: initial y position of each node.
+            size: size of each node.
+            color: color of each node, as CSS color strings or packed 0xRRGGBBAA integers.
+            labels: extra string columns per node, e.g. {"displayName": [...]}, usable as `node_label_key`.
+            link_width: width of each link.
+            link_color: color of each link, as CSS color strings or packed 0xRRGGBBAA integers.
+            link_labels: extra string columns per link, e.g. {"type": [...]}.
+            node_count: number of nodes, only needed when neither `ids` nor any node column is given.
+            indices: if True, `source` and `target` are node indices even though `ids` are given, e.g. integer ids
+                are otherwise looked up as ids rather than used as positions.
+        """
+        self.ids = None if ids is None else np.asarray(ids).astype(str)
+        self.x = None if x is None else np.asarray(x)
+        self.y = None if y is None else np.asarray(y)
+        self.size = None if size is None else np.asarray(size)
+        self.color = None if color is None else pack_colors(color)
+        self.labels = {
+            key: np.asarray(column).astype(str) for key, column in (labels or {}).items()
+        }
+        self.link_width = None if link_width is None else np.asarray(link_width)
+        self.link_color = None if link_color is None else pack_colors(link_color)
+        self.link_labels = {
+            key: np.asarray(column).astype(str) for key, column in (link_labels or {}).items()
+        }
+
+        columns = [self.ids, self.x, self.y, self.size, self.color, *self.labels.values()]
+        lengths = {len(column) for column in columns if column is not None}
+        if node_count is not None:
+            lengths.add(node_count)
+        if len(lengths) > 1:
+            raise ValueError(f"Node columns have mismatched lengths: {sorted(lengths)}")
+        if not lengths:
+            raise ValueError("Cannot infer the number of nodes, pass `ids` or `node_count`.")
+        self.node_count = lengths.pop()
+
+        self.source = self._to_indices(source, indices)
+        self.target = self._to_indices(target, indices)
+        if len(self.source) != len(self.target):
+            raise ValueError("`source` and `target` must have the same length.")
+        for key, column in self.link_labels.items():
+            if len(column) != len(self.source):
+                raise ValueError(f"Link column {key!r} has {len(column)} entries for {len(self.source)} links.")
+
+    def _to_indices(self, endpoints: Any, indices: bool) -> np.ndarray:
+        endpoints = np.asarray(endpoints)
+        if indices or self.ids is None:
+            if len(endpoints) and not np.issubdtype(endpoints.dtype, np.integer):
+                if self.ids is None:
+                    raise ValueError("Links given by id require node `ids`.")
+                raise ValueError("Link endpoint indices must be integers.")
+            if len(endpoints) and (
+                endpoints.min() < 0 or endpoints.max() >= self.node_count
+            ):
+                raise ValueError("Link endpoint index out of range.")
+            return endpoints.astype(np.uint32)
+
+        sorter = np.argsort(self.ids)
+        endpoints = endpoints.astype(str)
+        positions = np.searchsorted(self.ids, endpoints, sorter=sorter)
+        positions[positions == len(self.ids)] = 0
+        indices = sorter[positions]
+        missing = self.ids[indices] != endpoints
+        if missing.any():
+            raise ValueError(
+                f"Links reference unknown node ids, e.g. {endpoints[missing][0]!r}."
+            )
+        return indices.astype(np.uint32)
+
+    @property
+    def link_count(self) -> int:
+        return len(self.source)
+
+    def with_columns(self, **columns: Any) -> ColumnarGraph:
+        """
+        Returns a shallow copy with some columns replaced, e.g. `graph.with_columns(x=x, y=y)`.
+        """
+        updated = copy.copy(self)
+        for key, column in columns.items():
+            if not hasattr(self, key):
+                raise AttributeError(f"ColumnarGraph has no column {key!r}")
+            setattr(updated, key, None if column is None else np.asarray(column))
+        return updated
+
+    def take(self, nodes: np.ndarray, links: np.ndarray) -> ColumnarGraph:
+        """
+        Returns the graph restricted to some of its nodes and links.
+        Parameters:
+            nodes: sorted indices of the nodes kept
+            links: indices of the links kept, which may only join nodes kept
+        """
+        taken = self.with_columns(
+            source=np.searchsorted(nodes, self.source[links]).astype(np.uint32),
+            target=np.searchsorted(nodes, self.target[links]).astype(np.uint32),
+            link_width=None if self.link_width is None else self.link_width[links],
+            link_color=None if self.link_color is None else self.link_color[links],
+            **{
+                key: None if getattr(self, key) is None else getattr(self, key)[nodes]
+                for key in ("ids", "x", "y", "size", "color")
+            },
+        )
+        taken.labels = {key: column[nodes] for key, column in self.labels.items()}
+        taken.link_labels = {key: column[links] for key, column in self.link_labels.items()}
+        taken.node_count = len(nodes)
+        return taken
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the columns."""
+        columns = [
+            self.ids, self.x, self.y, self.size, self.color, *self.labels.values(),
+            self.source, self.target, self.link_width, self.link_color, *self.link_labels.values(),
+        ]
+        return sum(column.nbytes for column in columns if column is not None)
+
+    def to_value(self) -> dict[str, Any]:
+        """
+        Returns:
+            the graph as a dictionary with 'nodes' and 'links' lists, e.g. to edit it or merge other nodes into it
+        """
+        ids = self.ids if self.ids is not None else np.arange(self.node_count).astype(str)
+        node_columns: dict[str, list] = {"id": ids.tolist()}
+        for key in _NODE_NUMERIC_COLUMNS:
+            column = getattr(self, key)
+            if column is not None:
+                node_columns[key] = column.tolist()
+        if self.color is not None:
+            node_columns["color"] = [f"#{color:08x}" for color in self.color.tolist()]
+        node_columns.update({key: column.tolist() for key, column in self.labels.items()})
+
+        link_columns: dict[str, list] = {
+            "source": ids[self.source].tolist(),
+            "target": ids[self.target].tolist(),
+        }
+        if self.link_width is not None:
+            link_columns["width"] = self.link_width.tolist()
+        if self.link_color is not None:
+            link_columns["color"] = [f"#{color:08x}" for color in self.link_color.tolist()]
+        link_columns.update({key: column.tolist() for key, column in self.link_labels.items()})
+
+        return {
+            "nodes": [dict(zip(node_columns, row)) for row in zip(*node_columns.values())],
+            "links": [dict(zip(link_columns, row)) for row in zip(*link_columns.values())],
+        }
+
+    @classmethod
+    def from_tables(
+        cls, nodes: Any, links: Any | None = None, *, id_column: str = "id"
+    ) -> ColumnarGraph:
+        """
+        Builds a columnar graph from pandas DataFrames or pyarrow Tables. Node tables may have `id`, `x`, `y`,
+        `size` and `color` columns, and any other string column is kept as a label column. Link tables need
+        `source` and `target` columns and may have `width`, `color` and other string columns.
+        """
+        node_columns = _table_columns(nodes)
+        link_columns = _table_columns(links) if links is not None else {}
+        ids = node_columns.pop(id_column, None)
+        source = link_columns.pop("source", np.empty(0, dtype=np.uint32))
+        target = link_columns.pop("target", np.empty(0, dtype=np.uint32))
+        return cls(
+            source,
+            target,
+            ids=ids,
+            x=node_columns.pop("x", None),
+            y=node_columns.pop("y", None),
+            size=node_columns.pop("size", None),
+            color=node_columns.pop("color", None),
+            labels={
+                key: column
+                for key, column in node_columns.items()
+                if column.dtype.kind in "OUS"
+            },
+            link_width=link_columns.pop("width", None),
+            link_color=link_columns.pop("color", None),
+            link_labels={
+                key: column
+                for key, column in link_columns.items()
+                if column.dtype.kind in "OUS"
+            },
+            node_count=len(nodes) if ids is None else None,
+        )
+
+    def to_payload(self) -> dict[str, Any]:
+        """
+        Returns:
+            the wire representation sent to the frontend. String columns that repeat a few values, such as node
+            types or relationship types, are sent as a category table and a code per entry
+        """
+        nodes: dict[str, Any] = {}
+        if self.ids is not None:
+            nodes["id"] = self.ids.tolist()
+        for key in _NODE_NUMERIC_COLUMNS:
+            column = getattr(self, key)
+            if column is not None:
+                nodes[key] = encode_buffer(column, "float32")
+        if self.color is not None:
+            nodes["color"] = encode_buffer(self.color, "uint32")
+        for key, column in self.labels.items():
+            nodes[key] = encode_strings(column)
+
+        links: dict[str, Any] = {
+            "source": encode_buffer(self.source, "uint32"),
+            "target": encode_buffer(self.target, "uint32"),
+        }
+        if self.link_width is not None:
+            links["width"] = encode_buffer(self.link_width, "float32")
+        if self.link_color is not None:
+            links["color"] = encode_buffer(self.link_color, "uint32")
+        for key, column in self.link_labels.items():
+            links[key] = encode_strings(column)
+
+        return {
+            "format": "columnar",
+            "nodeCount": self.node_count,
+            "linkCount": self.link_count,
+            "nodes": nodes,
+            "links": links,
+        }
+
+    @classmethod
+    def from_payload(cls, payload: dict[str, Any]) -> ColumnarGraph:
+        """Inverse of `to_payload`."""
+        nodes = dict(payload["nodes"])
+        links = dict(payload["links"])
+        columns = {
+            key: decode_buffer(nodes.pop(key))
+            for key in (*_NODE_NUMERIC_COLUMNS, "color")
+            if key in nodes
+        }
+        link_columns = {
+            key: decode_buffer(links.pop(key)) for key in ("width", "color") if key in links
+        }
+        return cls(
+            decode_buffer(links.pop("source")),
+            decode_buffer(links.pop("target")),
+            ids=nodes.pop("id", None),
+            labels={key: decode_strings(column) for key, column in nodes.items()},
+            link_width=link_columns.get("width"),
+            link_color=link_columns.get("color"),
+            link_labels={key: decode_strings(column) for key, column in links.items()},
+            node_count=payload["nodeCount"],
+            indices=True,
+            **columns,
+        )
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import base64
+import gzip
+import zlib
+from typing import Any
+
+import orjson
+
+# Below this size, compressing costs more time than it saves on the wire
+_MIN_COMPRESSED_BYTES = 64 * 1024
+
+# Payloads of columnar values are mostly base64 encoded binary buffers, which gzip shrinks by a third at most for
+# seconds of work on large graphs, and file payloads only describe where the columns lie
+_UNCOMPRESSED_FORMATS = ("columnar", "file")
+
+# Compressed payloads are also sent back by the frontend, a small one must not decompress into gigabytes
+MAX_DECOMPRESSED_BYTES = 1 << 30
+
+
+def compress_payload(payload: Any, level: int = 3) -> Any:
+    """
+    Wraps a payload sent to the frontend into a gzip compressed envelope, decoded by the frontend in a Web Worker.
+    Parameters:
+        payload: any JSON serializable payload built by `NetworkGraph.postprocess`
+        level: gzip compression level, low levels compress large graphs several times faster for a slightly
+            larger output
+    Returns:
+        a dictionary with the "gzip" format, the payload's version and the base64 encoded compressed JSON, or
+        `payload` itself if it is small or columnar
+    """
+    if not isinstance(payload, dict) or payload.get("format") in _UNCOMPRESSED_FORMATS:
+        return payload
+    data = orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    if len(data) < _MIN_COMPRESSED_BYTES:
+        return payload
+    return {
+        "format": "gzip",
+        "version": payload.get("version"),
+        "data": base64.b64encode(gzip.compress(data, compresslevel=level)).decode("ascii"),
+    }
+
+
+def decompress_payload(payload: dict[str, Any], max_bytes: int = MAX_DECOMPRESSED_BYTES) -> Any:
+    """
+    Inverse of `compress_payload`.
+    Parameters:
+        payload: a dictionary with the "gzip" format
+        max_bytes: the largest size of the decompressed JSON, larger payloads raise a ValueError
+    """
+    decompressor = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+    try:
+        data = decompressor.decompress(base64.b64decode(payload["data"]), max_bytes)
+    except zlib.error as error:
+        raise ValueError(f"Invalid compressed graph: {error}") from None
+    if decompressor.unconsumed_tail:
+        raise ValueError(f"The compressed graph is larger than {max_bytes} bytes once decompressed.")
+    if not decompressor.eof:
+        raise ValueError("Invalid compressed graph: truncated data.")
+    return orjson.loads(data)
@@ -0,0 +1,1087 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import inspect
+import time
+from collections.abc import Sequence
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Literal
+
+import orjson
+from gradio.components.base import Component, server
+from gradio.context import LocalContext
+from gradio.events import Events
+from gradio.helpers import skip
+from gradio.i18n import I18nData
+
+from .coarsen import HIERARCHY_STORE, GraphHierarchy, view_version
+from .columnar import ColumnarGraph, is_table
+from .compression import compress_payload, decompress_payload
+from .delta import DELTA_TRACKER
+from .filtering import FILTER_STORE, GraphFilter, filter_version
+from .fingerprint import Fingerprinted, SessionVersions, fingerprint
+from .graph_file import GraphFile
+from .graph_store import GRAPH_STORE, GraphHandle
+from .layout import compute_layout
+from .layout_cache import DEFAULT_LAYOUT_CACHE, LayoutCache
+from .metrics import MetricsSink, emit, render_fields
+from .pending import PENDING_STORE
+from .projection import DETAIL_STORE, is_projected, project, restore
+from .streaming import GraphBatch
+from .tiling import TILE_STORE, SpatialIndex
+from .validation import validate_graph
+
+if TYPE_CHECKING:
+    from gradio.components import Timer
+
+
+def _node_count(value: Any) -> int:
+    if isinstance(value, ColumnarGraph):
+        return value.node_count
+    if isinstance(value, GraphFile):
+        return value.layout()["nodeCount"]
+    if isinstance(value, dict):
+        return len(value.get("nodes") or [])
+    return 0
+
+
+def _link_count(value: Any) -> int:
+    if isinstance(value, ColumnarGraph):
+        return value.link_count
+    if isinstance(value, GraphFile):
+        return value.layout()["linkCount"]
+    if isinstance(value, dict):
+        return len(value.get("links") or [])
+    return 0
+
+
+# Values with at least this many nodes and links are compressed in a worker thread, as gzip takes seconds on millions
+_COMPRESSED_ITEMS = 10_000
+
+
+def _has_positions(value: Any) -> bool:
+    if isinstance(value, ColumnarGraph):
+        return value.x is not None and value.y is not None
+    if isinstance(value, dict) and "nodes" in value:
+        return all("x" in node and "y" in node for node in value["nodes"] or [])
+    return True
+
+from gradio.events import Dependency
+
+class NetworkGraph(Component):
+    """
+    Creates a network graph visualization component using Cosmograph. Can be used to display node-link diagrams
+    with customizable styling and interaction options. Clicking a node triggers the `click` and `select` events with
+    the node's id as event data.
+    """
+
+    EVENTS = [Events.change, Events.click, Events.select]
+
+    def __init__(
+        self,
+        value: dict[str, Any] | ColumnarGraph | GraphFile | GraphHandle | str | Path | None = None,
+        *,
+        # Data transfer
+        incremental_updates: bool = False,
+        node_fields: list[str] | None = None,
+        link_fields: list[str] | None = None,
+        compression: Literal["gzip"] | None = None,
+        validation: Literal["drop", "raise"] | None = None,
+        filterable: bool = False,
+        tiled: bool = False,
+        # Visual configuration
+        background_color: str | None = None,
+        node_size_scale: float = 1.0,
+        link_width_scale: float = 1.0,
+        scale_nodes_on_zoom: bool = True,
+        pixel_ratio: float = 2.0,
+        # Node appearance
+        node_greyout_opacity: float = 0.1,
+        focused_node_ring_color: str = "white",
+        render_hovered_node_ring: bool = True,
+        hovered_node_ring_color: str = "white",
+        node_color_by: str | None = None,
+        node_palette: dict[str, str] | None = None,
+        # Link appearance
+        render_links: bool = True,
+        link_arrows: bool = True,
+        link_arrows_size_scale: float = 1.0,
+        link_greyout_opacity: float = 0.1,
+        curved_links: bool = False,
+        curved_link_segments: int = 19,
+        curved_link_weight: float = 0.8,
+        curved_link_control_point_distance: float = 0.5,
+        link_visibility_min_transparency: float = 0.25,
+        link_visibility_distance_range: tuple[float, float] = (50, 150),
+        link_color_by: str | None = None,
+        link_palette: dict[str, str] | None = None,
+        # Label configuration
+        node_label_key: str = "id",
+        show_dynamic_labels: bool = True,
+        show_top_labels: bool = True,
+        show_top_labels_limit: int = 100,
+        show_hovered_node_label: bool = True,
+        # Interaction settings
+        disable_zoom: bool = False,
+        initial_zoom_level: float = 1.0,
+        fit_view_on_init: bool = True,
+        fit_view_delay: int = 250,
+        # Simulation parameters
+        disable_simulation: bool = False,
+        space_size: int = 4096,
+        simulation_decay: int = 1000,
+        simulation_friction: float = 0.85,
+        simulation_repulsion: float = 0.1,
+        simulation_repulsion_theta: float = 1.7,
+        simulation_link_spring: float = 1.0,
+        simulation_link_distance: float = 2.0,
+        simulation_gravity: float = 0.0,
+        simulation_center: float = 0.0,
+        simulation_repulsion_from_mouse: float = 2.0,
+        use_quadtree: bool = False,
+        repulsion_quadtree_levels: int = 12,
+        warm_start: bool = True,
+        # Performance
+        performance_mode: Literal["auto", "quality", "fast"] = "quality",
+        # Server-side layout
+        precompute_layout: bool = False,
+        layout_iterations: int = 300,
+        layout_time_budget: float | None = 5.0,
+        layout_cache: LayoutCache | None = None,
+        # Level of detail
+        max_nodes: int | None = None,
+        # Instrumentation
+        metrics: MetricsSink | Sequence[MetricsSink] | None = None,
+        # Standard Gradio parameters
+        label: str | I18nData | None = None,
+        info: str | I18nData | None = None,
+        every: float | None = None,
+        inputs: Component | Sequence[Component] | set[Component] | None = None,
+        show_label: bool = True,
+        container: bool = True,
+        scale: int | None = None,
+        min_width: int = 160,
+        min_height: int = 160,
+        visible: bool = True,
+        elem_id: str | None = None,
+        elem_classes: list[str] | str | None = None,
+        render: bool = True,
+        key: int | str | tuple[int | str, ...] | None = None,
+        preserved_by_key: list[str] | str | None = "value",
+    ):
+        """
+        Creates a network graph visualization component using Cosmograph.
+
+        Parameters:
+            value: A dictionary containing the graph data with 'nodes' and 'links' lists. Each node should have an 'id' property
+                and optionally 'color' and 'size'. Each link should have 'source' and 'target' properties referencing node IDs.
+                For large graphs, pass a `ColumnarGraph` or a dictionary whose 'nodes' and 'links' are pandas DataFrames or
+                pyarrow Tables instead; these are sent as packed binary columns rather than per-object JSON.
+                Graphs saved to disk with `save_graph` can be passed as a `GraphFile` or a path: the server never loads
+                them, the frontend fetches their columns straight from the file with HTTP range requests. The file is
+                served as is, so such values skip validation, coarsening, layout and field projection.
+                A `GraphHandle` returned by `store_graph` refers to a graph held once per process however many sessions
+                display it, e.g. the result of a query shared by several users. Event listeners then receive the handle
+                back rather than a copy of the graph.
+                A generator function can also yield `GraphBatch`es, each drawn as soon as it arrives on top of the nodes
+                already displayed (see `stream_graph`).
+
+        Data Transfer:
+            incremental_updates: If True, a new value is sent as the nodes and links added, removed or changed since the
+                value the frontend displays, and the frontend patches the displayed graph in place. The frontend fetches
+                new values once prepared, telling which version it holds, and events send back only that version. The
+                versions sent are remembered per component and page, and batches yielded by generators per component
+                and session, so give each incremental graph a distinct `key`, `elem_id` or `label`. Default is False.
+            node_fields: If set, the node fields sent to the frontend besides 'id', 'x', 'y', 'size', 'color',
+                `node_label_key` and `node_color_by`, e.g. fields shown when a node is clicked. Other fields stay on the server: they are added
+                back to the value passed to event listeners and fetched one node at a time when a node is clicked.
+                Applies to dictionary values. Default is None, which sends every field.
+            link_fields: Same as `node_fields` for links, which always keep 'source', 'target', 'color', 'width' and
+                'weight' as well as `link_color_by`. Only used when `node_fields` is set. Default is None, which keeps no other field.
+            compression: If "gzip", large values are sent gzip compressed and decompressed and decoded by the frontend in a
+                Web Worker, so the page stays responsive while they load. They are compressed in a worker thread rather than on
+                the event loop. Columnar values, mostly binary buffers already, are sent as they are. Default is None.
+            validation: How values with nodes lacking an id, duplicate node ids or links to unknown nodes are handled, both
+                when they are returned by a function and when they are sent to it through the API. "drop" drops those nodes
+                and links with a warning, "raise" raises an error, and None skips validation, as it costs a pass over every
+                link of large graphs. Node ids and link endpoints that are not strings are converted to strings unless this
+                is None. Default is None, so values are sent as they are given.
+            filterable: If True, a filter box lets users narrow the displayed graph with expressions such as
+                `label = Document AND size > 3` over node fields. The graph is kept on the server, indexed by field, and
+                only the nodes matching the filter and the links between them are sent. Default is False.
+            tiled: If True, values are served like map tiles: the frontend reports its viewport as it pans and zooms, and
+                only receives the nodes in view and the links between them. Zoomed out, each area only shows its most
+                connected nodes, so every view sends about as much data however large the graph. Nodes need positions,
+                from 'x' and 'y' or `precompute_layout`, and the simulation is disabled. The spatial index of a value is built
+                in a worker thread, once per distinct value. Default is False.
+
+        Visual Configuration:
+            background_color: The color of the graph background. Accepts any valid CSS color string.
+            node_size_scale: Scale factor for all node sizes. Default is 1.0.
+            link_width_scale: Scale factor for all link widths. Default is 1.0.
+            scale_nodes_on_zoom: Whether nodes should scale when zooming. Default is True.
+            pixel_ratio: Canvas pixel ratio for rendering quality. Default is 2.0.
+
+        Node Appearance:
+            node_greyout_opacity: Opacity of unselected nodes when selection is active (0-1). Default is 0.1.
+            focused_node_ring_color: Color of the ring around focused nodes. Default is "white".
+            render_hovered_node_ring: Whether to show a ring around hovered nodes. Default is True.
+            hovered_node_ring_color: Color of the ring around hovered nodes. Default is "white".
+            node_color_by: If set, nodes are colored by this categorical field, e.g. "label", instead of by their 'color'.
+                Values can then leave out per-node colors, and recoloring only needs a new `node_palette`, not a new value.
+                Default is None.
+            node_palette: Color of each category of `node_color_by`. Categories it doesn't list fall back to the node's
+                'color', or to a color picked from a built-in palette. Default is None.
+
+        Link Appearance:
+            render_links: Whether to render links between nodes. Default is True.
+            link_arrows: Whether to show arrows on links. Default is True.
+            link_arrows_size_scale: Scale factor for link arrow size. Default is 1.0.
+            link_greyout_opacity: Opacity of unselected links when selection is active (0-1). Default is 0.1.
+            curved_links: Whether to render curved links. Default is False.
+            curved_link_segments: Number of segments in curved links. Default is 19.
+            curved_link_weight: Weight factor for curve shape (0-1). Default is 0.8.
+            curved_link_control_point_distance: Distance of curve control point. Default is 0.5.
+            link_visibility_min_transparency: Minimum transparency for long links. Default is 0.25.
+            link_visibility_distance_range: Range for link length-based transparency (min, max). Default is (50, 150).
+            link_color_by: Same as `node_color_by` for links, e.g. "type". Default is None.
+            link_palette: Same as `node_palette` for `link_color_by`. Default is None.
+
+        Label Configuration:
+            node_label_key: Key from node data to use as label text. Default is "id".
+            show_dynamic_labels: Whether to show labels while zooming. Default is True.
+            show_top_labels: Whether to show labels for top nodes. Default is False.
+            show_top_labels_limit: Maximum number of top labels to show. Default is 100.
+            show_hovered_node_label: Whether to show label for hovered node. Default is True.
+
+        Interaction Settings:
+            disable_zoom: If True, prevents zooming and panning. Default is False.
+            initial_zoom_level: Starting zoom level. Default is 1.0.
+            fit_view_on_init: Whether to fit view to all nodes on init. Default is True.
+            fit_view_delay: Delay before fitting view on init (ms). Default is 250.
+
+        Simulation Parameters:
+            disable_simulation: If True, nodes won't move after placement. Default is False.
+            space_size: Size of simulation space (max 8192). Default is 4096.
+            simulation_decay: Force simulation decay coefficient. Default is 1000.
+            simulation_friction: Friction coefficient (0.8-1.0). Default is 0.85.
+            simulation_repulsion: Node repulsion force (0.0-2.0). Default is 0.1.
+            simulation_repulsion_theta: Barnes-Hut approximation criterion (0.3-2.0). Default is 1.7.
+            simulation_link_spring: Link spring force (0.0-2.0). Default is 1.0.
+            simulation_link_distance: Minimum distance between linked nodes. Default is 2.0.
+            simulation_gravity: Gravity force toward center (0.0-1.0). Default is 0.0.
+            simulation_center: Centering force (0.0-1.0). Default is 0.0.
+            simulation_repulsion_from_mouse: Mouse repulsion force (0.0-5.0). Default is 2.0.
+            use_quadtree: Whether to use quadtree algorithm. Default is False.
+            repulsion_quadtree_levels: Depth of quadtree approximation. Default is 12.
+            warm_start: If True, a new value sharing most of its nodes with the displayed one keeps their positions,
+                its new nodes start next to their placed neighbours, and the simulation resumes with low energy
+                instead of restarting. Default is True.
+
+        Performance:
+            performance_mode: How the costly rendering and simulation settings (`pixel_ratio`, `curved_links`,
+                `curved_link_segments`, `use_quadtree`, `repulsion_quadtree_levels`, `space_size` and
+                `show_top_labels_limit`) are chosen. "quality" uses them as given. "auto" treats them as the best
+                quality wanted: it lowers them for graphs with many nodes and links, then further while the measured
+                frame rate stays low. "fast" always uses the cheapest settings. Default is "quality".
+
+        Server-side Layout:
+            precompute_layout: If True, node positions are computed on the server for values that don't already have them,
+                and the browser simulation is disabled so the client only renders. The layout runs in a worker thread rather
+                than on the event loop, and the frontend fetches the laid out value once it is ready. Default is False.
+            layout_iterations: Maximum number of iterations of the server-side layout. Default is 300.
+            layout_time_budget: Maximum number of seconds spent on the server-side layout, or None for no limit. Default is 5.0.
+            layout_cache: A LayoutCache reusing the positions of graphs laid out before, e.g. with an on-disk directory to
+                persist them across restarts. Defaults to a process-wide in-memory cache.
+
+        Level of Detail:
+            max_nodes: If set, graphs with more nodes are coarsened on the server into communities, each shown as a single
+                weighted node, so that at most this many nodes are sent. Clicking a community node expands it into its members,
+                at most this many too.
+                Graphs are coarsened in a worker thread, like `precompute_layout` lays them out. Default is None.
+
+        Instrumentation:
+            metrics: A function, or a list of functions, called with a dictionary of metrics for every value processed:
+                the 'seconds' spent in preprocess and postprocess, the 'serialize_seconds' and 'payload_bytes' of the
+                value sent, and its 'nodes' and 'links' counts. The frontend then reports, for each value it displays, the
+                'decode_seconds', 'set_data_seconds', 'first_frame_seconds', 'simulation_fps' and 'settle_seconds' as a
+                "render" record. `LogSink` and `PrometheusSink` are ready-made sinks. Measuring the payload size serializes
+                it once more, so only set this when the metrics are used. Default is None.
+
+        Standard Gradio Parameters:
+            label: Component label shown in UI.
+            info: Tooltip information text.
+            every: Number of seconds between value updates.
+            inputs: Components that trigger value updates.
+            show_label: Whether to show the component label.
+            container: Whether to use container styling.
+            scale: Relative width compared to other components.
+            min_width: Minimum pixel width.
+            visible: Whether component is visible.
+            elem_id: HTML element ID.
+            elem_classes: HTML element classes.
+            render: Whether to render in Blocks context.
+            key: Unique key for component identity across renders.
+            preserved_by_key: Parameters to preserve across re-renders.
+        """
+        self.incremental_updates = incremental_updates
+        self.node_fields = node_fields
+        self.link_fields = link_fields
+        self.compression = compression
+        self.validation = validation
+        self.filterable = filterable
+        self.tiled = tiled
+
+        self.background_color = background_color
+        self.node_size_scale = node_size_scale
+        self.link_width_scale = link_width_scale
+        self.scale_nodes_on_zoom = scale_nodes_on_zoom
+        self.pixel_ratio = pixel_ratio
+
+        self.node_greyout_opacity = node_greyout_opacity
+        self.focused_node_ring_color = focused_node_ring_color
+        self.render_hovered_node_ring = render_hovered_node_ring
+        self.hovered_node_ring_color = hovered_node_ring_color
+        self.node_color_by = node_color_by
+        self.node_palette = node_palette
+
+        self.render_links = render_links
+        self.link_arrows = link_arrows
+        self.link_arrows_size_scale = link_arrows_size_scale
+        self.link_greyout_opacity = link_greyout_opacity
+        self.curved_links = curved_links
+        self.curved_link_segments = curved_link_segments
+        self.curved_link_weight = curved_link_weight
+        self.curved_link_control_point_distance = curved_link_control_point_distance
+        self.link_visibility_min_transparency = link_visibility_min_transparency
+        self.link_visibility_distance_range = link_visibility_distance_range
+        self.link_color_by = link_color_by
+        self.link_palette = link_palette
+
+        self.node_label_key = node_label_key
+        self.show_dynamic_labels = show_dynamic_labels
+        self.show_top_labels = show_top_labels
+        self.show_top_labels_limit = show_top_labels_limit
+        self.show_hovered_node_label = show_hovered_node_label
+
+        self.disable_zoom = disable_zoom
+        self.initial_zoom_level = initial_zoom_level
+        self.fit_view_on_init = fit_view_on_init
+        self.fit_view_delay = fit_view_delay
+
+        self.disable_simulation = disable_simulation or precompute_layout
+        self.space_size = space_size
+        self.simulation_decay = simulation_decay
+        self.simulation_friction = simulation_friction
+        self.simulation_repulsion = simulation_repulsion
+        self.simulation_repulsion_theta = simulation_repulsion_theta
+        self.simulation_link_spring = simulation_link_spring
+        self.simulation_link_distance = simulation_link_distance
+        self.simulation_gravity = simulation_gravity
+        self.simulation_center = simulation_center
+        self.simulation_repulsion_from_mouse = simulation_repulsion_from_mouse
+        self.use_quadtree = use_quadtree
+        self.repulsion_quadtree_levels = repulsion_quadtree_levels
+        self.warm_start = warm_start
+        self.performance_mode = performance_mode
+
+        self.precompute_layout = precompute_layout
+        self.layout_iterations = layout_iterations
+        self.layout_time_budget = layout_time_budget
+        # Not exposed as `layout_cache`, which would send it to the frontend with the other props
+        self._layout_cache = layout_cache or DEFAULT_LAYOUT_CACHE
+
+        self.max_nodes = max_nodes
+        # Not exposed as `metrics`, the frontend only needs to know whether to report anything
+        if metrics is None:
+            self._metrics: list[MetricsSink] = []
+        elif callable(metrics):
+            self._metrics = [metrics]
+        else:
+            self._metrics = list(metrics)
+
+        self.min_height = min_height
+
+        # The initial value is prepared right away: it is stored in the config sent on every page load, long after
+        # a pending payload would be dropped
+        self._defer = False
+        super().__init__(
+            label=label,
+            info=info,
+            every=every,
+            inputs=inputs,
+            show_label=show_label,
+            container=container,
+            scale=scale,
+            min_width=min_width,
+            visible=visible,
+            elem_id=elem_id,
+            elem_classes=elem_classes,
+            render=render,
+            key=key,
+            preserved_by_key=preserved_by_key,
+            value=value,
+        )
+        self._defer = True
+
+    def preprocess(self, payload):
+        """
+        This docstring is used to generate the docs for this custom component.
+        Parameters:
+            payload: the data to be preprocessed, sent from the frontend
+        Returns:
+            the data after preprocessing, sent to the user's function in the backend. Columnar values are
+            returned as a `ColumnarGraph`, values served from a graph file as a `GraphFile`, and values returned as a
+            `GraphHandle` as a handle to the same stored graph while it is stored.
+        """
+        if not self._metrics or not isinstance(payload, dict):
+            return self._preprocess(payload)
+        start = time.perf_counter()
+        value = self._preprocess(payload)
+        self._emit(
+            "preprocess", seconds=time.perf_counter() - start, nodes=_node_count(value), links=_link_count(value)
+        )
+        return value
+
+    def _preprocess(self, payload: Any) -> Any:
+        if not isinstance(payload, dict):
+            return payload
+        if payload.get("format") == "pending":
+            # Sent back before the frontend fetched it, e.g. on an event triggered while it was being prepared
+            future = PENDING_STORE.get(payload["token"])
+            if future is None or not future.done():
+                raise ValueError("The graph held by the frontend is still being prepared.")
+            _, payload, _ = future.result()
+        if payload.get("format") == "gzip":
+            payload = decompress_payload(payload)
+        if "handle" in payload:
+            handle = GRAPH_STORE.get(payload["handle"])
+            if handle is not None:
+                return handle
+        if payload.get("format") == "columnar":
+            return ColumnarGraph.from_payload(payload)
+        if payload.get("format") == "file":
+            return GraphFile.from_payload(payload)
+        if payload.get("format") == "tiled":
+            index = TILE_STORE.get(self._held_key(payload["version"]))
+            if index is None:
+                raise ValueError(
+                    "The tiled graph held by the frontend is no longer held by the server, reload the page."
+                )
+            return index.value
+        if payload.get("format") in ("delta", "held"):
+            # The frontend sends back the version it holds after patching its graph, rather than the whole graph
+            payload = DELTA_TRACKER.resolve(payload["version"])
+            if payload is None:
+                raise ValueError("The graph held by the frontend is no longer held by the server, reload the page.")
+        if self.node_fields is not None and "nodes" in payload and payload.get("version") is not None:
+            details = DETAIL_STORE.get(self._held_key(str(payload["version"])))
+            if details is not None:
+                payload = restore(payload, *details)
+            elif is_projected(payload, *self._projected_fields()):
+                # Rather than passing on nodes without their other fields. Batches are sent with all of them
+                raise ValueError(
+                    "The fields of the graph held by the frontend that were not sent to it are no longer held by the "
+                    "server, reload the page."
+                )
+        payload = {key: value for key, value in payload.items() if key != "version"}
+        if self.validation is not None and "nodes" in payload:
+            payload = validate_graph(payload, self.validation)
+        return payload
+
+    def postprocess(self, value):
+        """
+        This docstring is used to generate the docs for this custom component.
+        Parameters:
+            payload: the data to be postprocessed, sent from the user's function in the backend
+        Returns:
+            the data after postprocessing, sent to the frontend. Values that take long to prepare, e.g. laid out ones,
+            are sent as a "pending" payload that the frontend fetches with `graph_payload` once ready, except for the
+            initial value.
+        """
+        version = None
+        if isinstance(value, Fingerprinted):
+            value, version = value.value, value.version
+        if isinstance(value, (str, Path)):
+            value = GraphFile(value)
+        if self._defer and self._deferred(value):
+            # Postprocessing runs on the event loop every session shares: such values are prepared in a worker thread
+            # and fetched by the frontend with `graph_payload` once ready
+            return {
+                "format": "pending",
+                "token": PENDING_STORE.submit(functools.partial(self._prepare, value, version)),
+            }
+        return self._finish(*self._prepare(value, version))
+
+    def _deferred(self, value: Any) -> bool:
+        """
+        Whether `value` is prepared in a worker thread and fetched by the frontend, rather than returned by
+        `postprocess`, e.g. as laying it out takes too long to run on the event loop.
+        """
+        if isinstance(value, GraphHandle):
+            # Views and overlays build their value on access
+            return value.nodes is not None or value.overlay is not None or self._deferred(value.value)
+        if value is None or isinstance(value, (GraphFile, GraphBatch)):
+            return False
+        if self.tiled:
+            # Indexed into tiles, unless an equal value was already
+            return True
+        tables = isinstance(value, dict) and is_table(value.get("nodes"))
+        if self.incremental_updates and isinstance(value, dict) and not tables:
+            # Sent as a delta against the version the frontend holds, which it tells when fetching the value
+            return True
+        nodes = len(value["nodes"]) if tables else _node_count(value)
+        if self.max_nodes is not None and nodes > self.max_nodes:
+            # Coarsened into communities found by label propagation
+            return True
+        if (
+            self.compression == "gzip"
+            and isinstance(value, dict)
+            and not tables
+            and nodes + _link_count(value) >= _COMPRESSED_ITEMS
+        ):
+            return True
+        if tables:
+            return self.precompute_layout
+        return self.precompute_layout and not _has_positions(value)
+
+    def _prepare(self, value: Any, version: str | None = None) -> tuple[Any, Any, float]:
+        """
+        Builds the payload of `value`, returned with `value` and the seconds it took. `version` is the fingerprint of
+        `value` if it is already known.
+        """
+        start = time.perf_counter()
+        return value, self._to_payload(value, version), time.perf_counter() - start
+
+    def _finish(
+        self, value: Any, payload: Any, seconds: float, held: str | None = None, client: str | None = None
+    ) -> Any:
+        """
+        Encodes the payload of `value` for the frontend `client`, holding the version `held`, and compresses it. The
+        initial value has no client, it is sent to every page.
+        """
+        start = time.perf_counter()
+        if (
+            self.incremental_updates
+            and not isinstance(value, GraphBatch)
+            and isinstance(payload, dict)
+            and "nodes" in payload
+            and "format" not in payload
+            and payload.get("version") is not None
+        ):
+            payload = DELTA_TRACKER.encode((*self._delta_stream(), client), payload, payload["version"], held)
+        if client is not None and isinstance(payload, dict) and payload.get("version") is not None:
+            self._hold(payload, client)
+        if self.compression == "gzip":
+            payload = compress_payload(payload)
+        if self._metrics and isinstance(payload, dict):
+            seconds += time.perf_counter() - start
+            start = time.perf_counter()
+            payload_bytes = len(orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY, default=str))
+            self._emit(
+                "postprocess",
+                seconds=seconds,
+                serialize_seconds=time.perf_counter() - start,
+                payload_bytes=payload_bytes,
+                nodes=_node_count(value),
+                links=_link_count(value),
+                format=payload.get("format", "json"),
+            )
+        return payload
+
+    def _emit(self, stage: str, **fields: Any) -> None:
+        emit(self._metrics, {"stage": stage, "component": str(self.elem_id or self.label or self._id), **fields})
+
+    @server
+    def report_metrics(self, data: dict[str, Any]) -> None:
+        """Receives the render metrics measured by the frontend for the value it displays."""
+        if self._metrics:
+            self._emit("render", **render_fields(data))
+
+    def get_config(self):
+        config = super().get_config()
+        config["report_metrics"] = bool(self._metrics)
+        return config
+
+    def _to_payload(self, value: Any, version: str | None = None) -> Any:
+        if isinstance(value, GraphHandle):
+            # Stored graphs are keyed by content already, they aren't hashed again on every send
+            payload = self._to_payload(value.value, value.version)
+            # Sent back with events, so listeners receive the stored graph rather than a decoded copy
+            return {**payload, "handle": value.version} if isinstance(payload, dict) else payload
+        if isinstance(value, GraphFile):
+            return value.to_payload()
+        if isinstance(value, GraphBatch):
+            return DELTA_TRACKER.append(
+                (*self._delta_stream(), value.session),
+                value.nodes,
+                value.links,
+                fingerprint(value.to_value()),
+                reset=value.reset,
+            )
+        if isinstance(value, dict) and is_table(value.get("nodes")):
+            value = ColumnarGraph.from_tables(value["nodes"], value.get("links"))
+        if self.validation is not None and (
+            isinstance(value, ColumnarGraph) or (isinstance(value, dict) and "nodes" in value)
+        ):
+            value = validate_graph(value, self.validation)
+        if self.max_nodes is not None and _node_count(value) > self.max_nodes:
+            value = self._coarsen(value, version)
+            version = None
+        if self.precompute_layout and not _has_positions(value):
+            value = compute_layout(
+                value,
+                space_size=self.space_size,
+                cache=self._layout_cache,
+                iterations=self.layout_iterations,
+                time_budget=self.layout_time_budget,
+            )
+            if version is not None:
+                version = f"{version}:layout"
+        if version is None:
+            version = fingerprint(value)
+        if self.filterable and version is not None:
+            # The same value sent again keeps the indexes already built
+            FILTER_STORE.setdefault(self._held_key(version), functools.partial(GraphFilter, value))
+        if self.tiled and version is not None:
+            return self._tiled_payload(value, version)
+        if isinstance(value, ColumnarGraph):
+            return {**value.to_payload(), "version": version}
+        if version is None:
+            return value
+        if self.node_fields is not None:
+            # The version covers the fields left out, so changing only those still updates the frontend
+            value = self._project(value, version)
+        return {**value, "version": version}
+
+    def _hold(self, payload: dict[str, Any], client: str) -> None:
+        """Records that the page `client` displays `payload`, so what is kept for it stays until it displays others."""
+        if self.filterable:
+            FILTER_STORE.hold(self._held_key(payload["version"]), client)
+        if payload.get("format") == "tiled":
+            TILE_STORE.hold(self._held_key(payload["version"]), client)
+        if self.node_fields is not None:
+            DETAIL_STORE.hold(self._held_key(payload["version"]), client)
+            if payload.get("format") == "tiled":
+                DETAIL_STORE.hold(self._held_key(payload["overview"]["version"]), client)
+
+    def _projected_fields(self) -> tuple[list[str], list[str]]:
+        """The node and link fields sent on top of the ones Cosmograph reads, with `node_fields`."""
+        return (
+            [self.node_label_key, *([self.node_color_by] if self.node_color_by else []), *(self.node_fields or [])],
+            [*([self.link_color_by] if self.link_color_by else []), *(self.link_fields or [])],
+        )
+
+    def _project(self, value: dict[str, Any], version: str, client: str | None = None) -> dict[str, Any]:
+        """
+        Strips the fields not listed in `node_fields` and `link_fields`, keeping them for `version`, held by the page
+        `client` if given.
+        """
+        projected, node_details, link_details = project(value, *self._projected_fields())
+        DETAIL_STORE.put(self._held_key(version), (node_details, link_details), client)
+        return projected
+
+    @server
+    async def graph_payload(self, data: dict[str, Any]) -> Any:
+        """
+        Returns a value that `postprocess` prepares in a worker thread, once it is ready, with an 'error' instead if
+        it is invalid or no longer kept. With `incremental_updates`, it is a delta against the version
+        the frontend holds when that version is still remembered.
+        Parameters:
+            data: a dictionary with the 'token' of the "pending" payload sent by `postprocess`, the version the
+                frontend 'held', if any, and the 'client' id the frontend picked for itself, which versions sent to it
+                are remembered under
+        """
+        future = PENDING_STORE.get(data["token"])
+        if future is None:
+            return {"error": "The graph is no longer held by the server, run the event that sent it again."}
+        try:
+            prepared = await asyncio.wrap_future(future)
+        except ValueError as error:
+            return {"error": str(error)}
+        # Diffing and compressing large values take a while too
+        return await asyncio.to_thread(self._finish, *prepared, data.get("held"), data.get("client"))
+
+    @server
+    def node_details(self, data: dict[str, Any]) -> dict[str, Any] | None:
+        """
+        Returns the fields of a node that were not sent to the frontend because of `node_fields`.
+        Parameters:
+            data: a dictionary with the 'version' of the displayed graph, the 'id' of the node and the 'client' id of
+                the page, which then holds the fields of that graph
+        """
+        return DETAIL_STORE.node(self._held_key(data["version"]), data["id"], data.get("client"))
+
+    @server
+    def apply_filter(self, data: dict[str, Any]) -> dict[str, Any] | None:
+        """
+        Returns the subgraph of a displayed value induced by the nodes matching a filter expression, with an 'error'
+        instead if the expression is invalid, or None if the value is no longer kept and wasn't sent.
+        Parameters:
+            data: a dictionary with the 'version' of the unfiltered value, the 'filter' expression, the 'client' id of
+                the page, which then holds the value, and optionally the 'value' itself, as events send it back, to
+                filter when the server no longer keeps it
+        """
+        key, client = self._held_key(data["version"]), data.get("client")
+        graph_filter = FILTER_STORE.get(key, client)
+        if graph_filter is None:
+            if data.get("value") is None:
+                return None
+            try:
+                value = self.preprocess(data["value"])
+            except ValueError:
+                return None
+            if isinstance(value, GraphHandle):
+                value = value.value
+            graph_filter = FILTER_STORE.setdefault(key, functools.partial(GraphFilter, value), client)
+        if self.node_fields is not None:
+            # Events still send back the unfiltered value, whose fields are added back to it
+            DETAIL_STORE.hold(key, client)
+        try:
+            value = graph_filter.subgraph(data["filter"])
+        except ValueError as error:
+            return {"error": str(error)}
+        return self._view_payload(value, filter_version(data["version"], data["filter"]), client)
+
+    def _view_payload(
+        self, value: dict[str, Any] | ColumnarGraph, version: str, client: str | None = None
+    ) -> dict[str, Any]:
+        """
+        Payload of part of a displayed value, e.g. a filtered or tiled view, replacing it on the canvas as is on the
+        page `client`.
+        """
+        if isinstance(value, ColumnarGraph):
+            return {**value.to_payload(), "version": version}
+        # A coarse graph seen through such a view can't have its communities expanded
+        value = {key: item for key, item in value.items() if key not in ("version", "hierarchy")}
+        if self.node_fields is not None:
+            value = self._project(value, version, client)
+        return {**value, "version": version}
+
+    def _tiled_payload(self, value: dict[str, Any] | ColumnarGraph, version: str) -> dict[str, Any]:
+        index = TILE_STORE.setdefault(self._held_key(version), functools.partial(SpatialIndex, value))
+        return {
+            "format": "tiled",
+            "version": version,
+            "nodeCount": _node_count(value),
+            "linkCount": _link_count(value),
+            "bounds": index.bounds,
+            # The whole graph at its coarsest level, shown until the frontend asks for its viewport
+            "overview": self._view_payload(index.view(index.bounds), f"{version}:tiles:0"),
+        }
+
+    @server
+    def graph_tiles(self, data: dict[str, Any]) -> dict[str, Any] | None:
+        """
+        Returns the nodes and links of a tiled value to draw in a viewport, or None if the value is no longer kept.
+        Parameters:
+            data: a dictionary with the 'version' of the tiled value, the displayed 'viewport', as
+                [min x, min y, max x, max y] in the coordinates of the node positions, and the 'client' id of the page,
+                which then holds the value
+        """
+        client = data.get("client")
+        index = TILE_STORE.get(self._held_key(data["version"]), client)
+        if index is None:
+            return None
+        viewport = tuple(float(bound) for bound in data["viewport"])
+        tiles = ":".join(str(item) for item in index.tile_range(viewport))
+        return self._view_payload(index.view(viewport), f"{data['version']}:tiles:{tiles}", client)
+
+    def _coarsen(self, value: dict[str, Any] | ColumnarGraph, key: str | None = None) -> dict[str, Any]:
+        if key is None:
+            key = fingerprint(value)
+        hierarchy = HIERARCHY_STORE.get(key)
+        if hierarchy is None:
+            hierarchy = GraphHierarchy(value, self.max_nodes)
+            HIERARCHY_STORE.put(key, hierarchy)
+        return {
+            **hierarchy.view(label_key=self.node_label_key),
+            "version": view_version(key, frozenset()),
+            "hierarchy": key,
+        }
+
+    @server
+    def expand_community(self, data: dict[str, Any]) -> dict[str, Any] | None:
+        """
+        Returns the delta that replaces a community node of a coarsened graph by its members.
+        Parameters:
+            data: a dictionary with the 'hierarchy' key of the displayed graph, the ids of the communities it currently
+                has 'previous'ly expanded, the ids that should be 'expanded' and the 'client' id of the page
+        """
+        transform = None
+        if self.node_fields is not None:
+            # The fields left out of the members are then held by the page expanding them
+            transform = functools.partial(self._project, client=data.get("client"))
+        return HIERARCHY_STORE.expand(
+            data["hierarchy"],
+            set(data["previous"]),
+            set(data["expanded"]),
+            self.node_label_key,
+            transform=transform,
+        )
+
+    def attach_load_event(
+        self,
+        callable: Callable,
+        every: Timer | float | None,
+        inputs: Component | Sequence[Component] | set[Component] | None = None,
+    ):
+        if not (
+            inspect.iscoroutinefunction(callable)
+            or inspect.isgeneratorfunction(callable)
+            or inspect.isasyncgenfunction(callable)
+        ):
+            callable = self._skip_unchanged(callable)
+        super().attach_load_event(callable, every, inputs)
+
+    @staticmethod
+    def _skip_unchanged(fn: Callable) -> Callable:
+        # Only the event handler's thread knows which session it serves, so polled values
+        # are deduplicated here rather than in postprocess
+        sent = SessionVersions()
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            value = fn(*args, **kwargs)
+            request = LocalContext.request.get(None)
+            if isinstance(value, GraphHandle):
+                version = value.version
+            else:
+                version = fingerprint(value)
+                if version is not None:
+                    # Passed on so postprocess doesn't hash the value again
+                    value = Fingerprinted(value, version)
+            if request is None or request.session_hash is None or version is None:
+                return value
+            return value if sent.update(request.session_hash, version) else skip()
+
+        return wrapper
+
+    def _delta_stream(self) -> tuple:
+        # Copies created by gr.update() share these attributes with the original component
+        return (type(self).__name__, self.key, self.elem_id, str(self.label))
+
+    def _held_key(self, version: str) -> tuple:
+        """Key of what this component keeps for the value it sent as `version`, e.g. the fields it left out."""
+        return (*self._delta_stream(), version)
+
+    @server
+    def graph_value(self, version: str) -> dict[str, Any] | None:
+        """
+        Returns the full value previously sent as `version`, used by the frontend to recover when it receives a delta
+        against a version it does not hold.
+        """
+        return DELTA_TRACKER.resolve(version)
+
+    def example_payload(self):
+        return {
+            "nodes": [{"id": "a", "label": "A"}, {"id": "b", "label": "B"}],
+            "links": [{"source": "a", "target": "b"}],
+        }
+
+    def example_value(self):
+        return self.example_payload()
+
+    def api_info(self):
+        return {
+            "type": "object",
+            "properties": {
+                "nodes": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "id": {"type": "string"},
+                            "x": {"type": "number"},
+                            "y": {"type": "number"},
+                            "size": {"type": "number"},
+                            "color": {"type": "string"},
+                        },
+                        "required": ["id"],
+                        "additionalProperties": True,
+                    },
+                },
+                "links": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "source": {"type": "string"},
+                            "target": {"type": "string"},
+                            "color": {"type": "string"},
+                            "width": {"type": "number"},
+                        },
+                        "required": ["source", "target"],
+                        "additionalProperties": True,
+                    },
+                },
+            },
+            "required": ["nodes", "links"],
+            "description": "a graph, whose links reference the ids of its nodes",
+        }
+    from typing import Callable, Literal, Sequence, Any, TYPE_CHECKING
+    from gradio.blocks import Block
+    if TYPE_CHECKING:
+        from gradio.components import Timer
+        from gradio.components.base import Component
+
+    
+    def change(self,
+        fn: Callable[..., Any] | None = None,
+        inputs: Block | Sequence[Block] | set[Block] | None = None,
+        outputs: Block | Sequence[Block] | None = None,
+        api_name: str | None | Literal[False] = None,
+        scroll_to_output: bool = False,
+        show_progress: Literal["full", "minimal", "hidden"] = "full",
+        show_progress_on: Component | Sequence[Component] | None = None,
+        queue: bool | None = None,
+        batch: bool = False,
+        max_batch_size: int = 4,
+        preprocess: bool = True,
+        postprocess: bool = True,
+        cancels: dict[str, Any] | list[dict[str, Any]] | None = None,
+        every: Timer | float | None = None,
+        trigger_mode: Literal["once", "multiple", "always_last"] | None = None,
+        js: str | Literal[True] | None = None,
+        concurrency_limit: int | None | Literal["default"] = "default",
+        concurrency_id: str | None = None,
+        show_api: bool = True,
+        key: int | str | tuple[int | str, ...] | None = None,
+        api_description: str | None | Literal[False] = None,
+        validator: Callable[..., Any] | None = None,
+    
+        ) -> Dependency:
+        """
+        Parameters:
+            fn: the function to call when this event is triggered. Often a machine learning model's prediction function. Each parameter of the function corresponds to one input component, and the function should return a single value or a tuple of values, with each element in the tuple corresponding to one output component.
+            inputs: list of gradio.components to use as inputs. If the function takes no inputs, this should be an empty list.
+            outputs: list of gradio.components to use as outputs. If the function returns no outputs, this should be an empty list.
+            api_name: defines how the endpoint appears in the API docs. Can be a string, None, or False. If False, the endpoint will not be exposed in the api docs. If set to None, will use the functions name as the endpoint route. If set to a string, the endpoint will be exposed in the api docs with the given name.
+            scroll_to_output: if True, will scroll to output component on completion
+            show_progress: how to show the progress animation while event is running: "full" shows a spinner which covers the output component area as well as a runtime display in the upper right corner, "minimal" only shows the runtime display, "hidden" shows no progress animation at all
+            show_progress_on: Component or list of components to show the progress animation on. If None, will show the progress animation on all of the output components.
+            queue: if True, will place the request on the queue, if the queue has been enabled. If False, will not put this event on the queue, even if the queue has been enabled. If None, will use the queue setting of the gradio app.
+            batch: if True, then the function should process a batch of inputs, meaning that it should accept a list of input values for each parameter. The lists should be of equal length (and be up to length `max_batch_size`). The function is then *required* to return a tuple of lists (even if there is only 1 output component), with each list in the tuple corresponding to one output component.
+            max_batch_size: maximum number of inputs to batch together if this is called from the queue (only relevant if batch=True)
+            preprocess: if False, will not run preprocessing of component data before running 'fn' (e.g. leaving it as a base64 string if this method is called with the `Image` component).
+            postprocess: if False, will not run postprocessing of component data before returning 'fn' output to the browser.
+            cancels: a list of other events to cancel when this listener is triggered. For example, setting cancels=[click_event] will cancel the click_event, where click_event is the return value of another components .click method. Functions that have not yet run (or generators that are iterating) will be cancelled, but functions that are currently running will be allowed to finish.
+            every: continously calls `value` to recalculate it if `value` is a function (has no effect otherwise). Can provide a Timer whose tick resets `value`, or a float that provides the regular interval for the reset Timer.
+            trigger_mode: if "once" (default for all events except `.change()`) would not allow any submissions while an event is pending. If set to "multiple", unlimited submissions are allowed while pending, and "always_last" (default for `.change()` and `.key_up()` events) would allow a second submission after the pending event is complete.
+            js: optional frontend js method to run before running 'fn'. Input arguments for js method are values of 'inputs' and 'outputs', return should be a list of values for output components.
+            concurrency_limit: if set, this is the maximum number of this event that can be running simultaneously. Can be set to None to mean no concurrency_limit (any number of this event can be running simultaneously). Set to "default" to use the default concurrency limit (defined by the `default_concurrency_limit` parameter in `Blocks.queue()`, which itself is 1 by default).
+            concurrency_id: if set, this is the id of the concurrency group. Events with the same concurrency_id will be limited by the lowest set concurrency_limit.
+            show_api: whether to show this event in the "view API" page of the Gradio app, or in the ".view_api()" method of the Gradio clients. Unlike setting api_name to False, setting show_api to False will still allow downstream apps as well as the Clients to use this event. If fn is None, show_api will automatically be set to False.
+            key: A unique key for this event listener to be used in @gr.render(). If set, this value identifies an event as identical across re-renders when the key is identical.
+            api_description: Description of the API endpoint. Can be a string, None, or False. If set to a string, the endpoint will be exposed in the API docs with the given description. If None, the function's docstring will be used as the API endpoint description. If False, then no description will be displayed in the API docs.
+            validator: Optional validation function to run before the main function. If provided, this function will be executed first with queue=False, and only if it completes successfully will the main function be called. The validator receives the same inputs as the main function.
+        
+        """
+        ...
+    
+    def click(self,
+        fn: Callable[..., Any] | None = None,
+        inputs: Block | Sequence[Block] | set[Block] | None = None,
+        outputs: Block | Sequence[Block] | None = None,
+        api_name: str | None | Literal[False] = None,
+        scroll_to_output: bool = False,
+        show_progress: Literal["full", "minimal", "hidden"] = "full",
+        show_progress_on: Component | Sequence[Component] | None = None,
+        queue: bool | None = None,
+        batch: bool = False,
+        max_batch_size: int = 4,
+        preprocess: bool = True,
+        postprocess: bool = True,
+        cancels: dict[str, Any] | list[dict[str, Any]] | None = None,
+        every: Timer | float | None = None,
+        trigger_mode: Literal["once", "multiple", "always_last"] | None = None,
+        js: str | Literal[True] | None = None,
+        concurrency_limit: int | None | Literal["default"] = "default",
+        concurrency_id: str | None = None,
+        show_api: bool = True,
+        key: int | str | tuple[int | str, ...] | None = None,
+        api_description: str | None | Literal[False] = None,
+        validator: Callable[..., Any] | None = None,
+    
+        ) -> Dependency:
+        """
+        Parameters:
+            fn: the function to call when this event is triggered. Often a machine learning model's prediction function. Each parameter of the function corresponds to one input component, and the function should return a single value or a tuple of values, with each element in the tuple corresponding to one output component.
+            inputs: list of gradio.components to use as inputs. If the function takes no inputs, this should be an empty list.
+            outputs: list of gradio.components to use as outputs. If the function returns no outputs, this should be an empty list.
+            api_name: defines how the endpoint appears in the API docs. Can be a string, None, or False. If False, the endpoint will not be exposed in the api docs. If set to None, will use the functions name as the endpoint route. If set to a string, the endpoint will be exposed in the api docs with the given name.
+            scroll_to_output: if True, will scroll to output component on completion
+            show_progress: how to show the progress animation while event is running: "full" shows a spinner which covers the output component area as well as a runtime display in the upper right corner, "minimal" only shows the runtime display, "hidden" shows no progress animation at all
+            show_progress_on: Component or list of components to show the progress animation on. If None, will show the progress animation on all of the output components.
+            queue: if True, will place the request on the queue, if the queue has been enabled. If False, will not put this event on the queue, even if the queue has been enabled. If None, will use the queue setting of the gradio app.
+            batch: if True, then the function should process a batch of inputs, meaning that it should accept a list of input values for each parameter. The lists should be of equal length (and be up to length `max_batch_size`). The function is then *required* to return a tuple of lists (even if there is only 1 output component), with each list in the tuple corresponding to one output component.
+            max_batch_size: maximum number of inputs to batch together if this is called from the queue (only relevant if batch=True)
+            preprocess: if False, will not run preprocessing of component data before running 'fn' (e.g. leaving it as a base64 string if this method is called with the `Image` component).
+            postprocess: if False, will not run postprocessing of component data before returning 'fn' output to the browser.
+            cancels: a list of other events to cancel when this listener is triggered. For example, setting cancels=[click_event] will cancel the click_event, where click_event is the return value of another components .click method. Functions that have not yet run (or generators that are iterating) will be cancelled, but functions that are currently running will be allowed to finish.
+            every: continously calls `value` to recalculate it if `value` is a function (has no effect otherwise). Can provide a Timer whose tick resets `value`, or a float that provides the regular interval for the reset Timer.
+            trigger_mode: if "once" (default for all events except `.change()`) would not allow any submissions while an event is pending. If set to "multiple", unlimited submissions are allowed while pending, and "always_last" (default for `.change()` and `.key_up()` events) would allow a second submission after the pending event is complete.
+            js: optional frontend js method to run before running 'fn'. Input arguments for js method are values of 'inputs' and 'outputs', return should be a list of values for output components.
+            concurrency_limit: if set, this is the maximum number of this event that can be running simultaneously. Can be set to None to mean no concurrency_limit (any number of this event can be running simultaneously). Set to "default" to use the default concurrency limit (defined by the `default_concurrency_limit` parameter in `Blocks.queue()`, which itself is 1 by default).
+            concurrency_id: if set, this is the id of the concurrency group. Events with the same concurrency_id will be limited by the lowest set concurrency_limit.
+            show_api: whether to show this event in the "view API" page of the Gradio app, or in the ".view_api()" method of the Gradio clients. Unlike setting api_name to False, setting show_api to False will still allow downstream apps as well as the Clients to use this event. If fn is None, show_api will automatically be set to False.
+            key: A unique key for this event listener to be used in @gr.render(). If set, this value identifies an event as identical across re-renders when the key is identical.
+            api_description: Description of the API endpoint. Can be a string, None, or False. If set to a string, the endpoint will be exposed in the API docs with the given description. If None, the function's docstring will be used as the API endpoint description. If False, then no description will be displayed in the API docs.
+            validator: Optional validation function to run before the main function. If provided, this function will be executed first with queue=False, and only if it completes successfully will the main function be called. The validator receives the same inputs as the main function.
+        
+        """
+        ...
+    
+    def select(self,
+        fn: Callable[..., Any] | None = None,
+        inputs: Block | Sequence[Block] | set[Block] | None = None,
+        outputs: Block | Sequence[Block] | None = None,
+        api_name: str | None | Literal[False] = None,
+        scroll_to_output: bool = False,
+        show_progress: Literal["full", "minimal", "hidden"] = "full",
+        show_progress_on: Component | Sequence[Component] | None = None,
+        queue: bool | None = None,
+        batch: bool = False,
+        max_batch_size: int = 4,
+        preprocess: bool = True,
+        postprocess: bool = True,
+        cancels: dict[str, Any] | list[dict[str, Any]] | None = None,
+        every: Timer | float | None = None,
+        trigger_mode: Literal["once", "multiple", "always_last"] | None = None,
+        js: str | Literal[True] | None = None,
+        concurrency_limit: int | None | Literal["default"] = "default",
+        concurrency_id: str | None = None,
+        show_api: bool = True,
+        key: int | str | tuple[int | str, ...] | None = None,
+        api_description: str | None | Literal[False] = None,
+        validator: Callable[..., Any] | None = None,
+    
+        ) -> Dependency:
+        """
+        Parameters:
+            fn: the function to call when this event is triggered. Often a machine learning model's prediction function. Each parameter of the function corresponds to one input component, and the function should return a single value or a tuple of values, with each element in the tuple corresponding to one output component.
+            inputs: list of gradio.components to use as inputs. If the function takes no inputs, this should be an empty list.
+            outputs: list of gradio.components to use as outputs. If the function returns no outputs, this should be an empty list.
+            api_name: defines how the endpoint appears in the API docs. Can be a string, None, or False. If False, the endpoint will not be exposed in the api docs. If set to None, will use the functions name as the endpoint route. If set to a string, the endpoint will be exposed in the api docs with the given name.
+            scroll_to_output: if True, will scroll to output component on completion
+            show_progress: how to show the progress animation while event is running: "full" shows a spinner which covers the output component area as well as a runtime display in the upper right corner, "minimal" only shows the runtime display, "hidden" shows no progress animation at all
+            show_progress_on: Component or list of components to show the progress animation on. If None, will show the progress animation on all of the output components.
+            queue: if True, will place the request on the queue, if the queue has been enabled. If False, will not put this event on the queue, even if the queue has been enabled. If None, will use the queue setting of the gradio app.
+            batch: if True, then the function should process a batch of inputs, meaning that it should accept a list of input values for each parameter. The lists should be of equal length (and be up to length `max_batch_size`). The function is then *required* to return a tuple of lists (even if there is only 1 output component), with each list in the tuple corresponding to one output component.
+            max_batch_size: maximum number of inputs to batch together if this is called from the queue (only relevant if batch=True)
+            preprocess: if False, will not run preprocessing of component data before running 'fn' (e.g. leaving it as a base64 string if this method is called with the `Image` component).
+            postprocess: if False, will not run postprocessing of component data before returning 'fn' output to the browser.
+            cancels: a list of other events to cancel when this listener is triggered. For example, setting cancels=[click_event] will cancel the click_event, where click_event is the return value of another components .click method. Functions that have not yet run (or generators that are iterating) will be cancelled, but functions that are currently running will be allowed to finish.
+            every: continously calls `value` to recalculate it if `value` is a function (has no effect otherwise). Can provide a Timer whose tick resets `value`, or a float that provides the regular interval for the reset Timer.
+            trigger_mode: if "once" (default for all events except `.change()`) would not allow any submissions while an event is pending. If set to "multiple", unlimited submissions are allowed while pending, and "always_last" (default for `.change()` and `.key_up()` events) would allow a second submission after the pending event is complete.
+            js: optional frontend js method to run before running 'fn'. Input arguments for js method are values of 'inputs' and 'outputs', return should be a list of values for output components.
+            concurrency_limit: if set, this is the maximum number of this event that can be running simultaneously. Can be set to None to mean no concurrency_limit (any number of this event can be running simultaneously). Set to "default" to use the default concurrency limit (defined by the `default_concurrency_limit` parameter in `Blocks.queue()`, which itself is 1 by default).
+            concurrency_id: if set, this is the id of the concurrency group. Events with the same concurrency_id will be limited by the lowest set concurrency_limit.
+            show_api: whether to show this event in the "view API" page of the Gradio app, or in the ".view_api()" method of the Gradio clients. Unlike setting api_name to False, setting show_api to False will still allow downstream apps as well as the Clients to use this event. If fn is None, show_api will automatically be set to False.
+            key: A unique key for this event listener to be used in @gr.render(). If set, this value identifies an event as identical across re-renders when the key is identical.
+            api_description: Description of the API endpoint. Can be a string, None, or False. If set to a string, the endpoint will be exposed in the API docs with the given description. If None, the function's docstring will be used as the API endpoint description. If False, then no description will be displayed in the API docs.
+            validator: Optional validation function to run before the main function. If provided, this function will be executed first with queue=False, and only if it completes successfully will the main function be called. The validator receives the same inputs as the main function.
+        
+        """
+        ...
@@ -0,0 +1,303 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
+
+import orjson
+
+from .columnar import ColumnarGraph
+from .graph_store import GraphHandle
+
+# Parallel links between the same pair of nodes are told apart by their occurrence number.
+# The frontend builds the same keys for the full values it receives.
+_KEY_SEPARATOR = "\x1f"
+
+
+def link_keys(links: list[dict[str, Any]]) -> list[str]:
+    """
+    Returns a stable key for each link, made of its endpoints and its occurrence among parallel links.
+    """
+    seen: dict[tuple[str, str], int] = {}
+    keys = []
+    for link in links:
+        pair = (str(link["source"]), str(link["target"]))
+        occurrence = seen.get(pair, 0)
+        seen[pair] = occurrence + 1
+        keys.append(_KEY_SEPARATOR.join((*pair, str(occurrence))))
+    return keys
+
+
+def snapshot(value: dict[str, Any] | ColumnarGraph | GraphHandle) -> dict[str, dict[str, dict[str, Any]]]:
+    """
+    Indexes a graph value by node id and link key, copying each item so later mutations of the
+    value by the user's function don't alter what we remember as sent.
+    """
+    if isinstance(value, GraphHandle):
+        value = value.value
+    if isinstance(value, ColumnarGraph):
+        value = value.to_value()
+    links = value.get("links") or []
+    return {
+        "nodes": {str(node["id"]): dict(node) for node in value.get("nodes") or []},
+        "links": dict(zip(link_keys(links), (dict(link) for link in links))),
+    }
+
+
+def _diff_items(
+    old: dict[str, dict[str, Any]], new: dict[str, dict[str, Any]]
+) -> tuple[dict[str, dict[str, Any]], list[str]]:
+    upsert = {key: item for key, item in new.items() if old.get(key) != item}
+    remove = [key for key in old if key not in new]
+    return upsert, remove
+
+
+def diff_graphs(
+    old: dict[str, dict[str, dict[str, Any]]],
+    new: dict[str, dict[str, dict[str, Any]]],
+) -> dict[str, Any]:
+    """
+    Computes the changes between two snapshots.
+    Parameters:
+        old: snapshot of the value the frontend currently holds
+        new: snapshot of the value to display
+    Returns:
+        a dictionary with the nodes and links to upsert and the node ids and link keys to remove
+    """
+    node_upsert, node_remove = _diff_items(old["nodes"], new["nodes"])
+    link_upsert, link_remove = _diff_items(old["links"], new["links"])
+    return {
+        "nodes": {"upsert": list(node_upsert.values()), "remove": node_remove},
+        "links": {"upsert": link_upsert, "remove": link_remove},
+    }
+
+
+def merge_graphs(
+    value: dict[str, Any] | ColumnarGraph | GraphHandle | None, addition: dict[str, Any] | GraphHandle
+) -> dict[str, Any] | GraphHandle:
+    """
+    Merges the nodes and links of `addition` into `value`, e.g. to add the neighbourhood of a clicked node to the
+    displayed graph. Returned from a function with `incremental_updates=True`, only the added items are sent.
+    Parameters:
+        value: the displayed graph, or None. A ColumnarGraph is converted to a dictionary first, and a GraphHandle
+            gets an overlay of the stored graph, see `GraphHandle.merge`.
+        addition: a graph value with 'nodes' and 'links' lists, or a handle to one
+    Returns:
+        a new graph value, or a handle for a handle. Nodes and links already in `value` keep their attributes
+        (including their positions), updated with the ones from `addition`.
+    """
+    if isinstance(addition, GraphHandle):
+        addition = addition.value
+    if isinstance(value, GraphHandle):
+        return value.merge(addition)
+    if isinstance(value, ColumnarGraph):
+        value = value.to_value()
+    merged = snapshot(value or {})
+    added = snapshot(addition)
+    for kind in ("nodes", "links"):
+        for key, item in added[kind].items():
+            merged[kind][key] = {**merged[kind].get(key, {}), **item}
+    return {
+        **(value or {}),
+        "nodes": list(merged["nodes"].values()),
+        "links": list(merged["links"].values()),
+    }
+
+
+def delta_size(delta: dict[str, Any]) -> int:
+    """Number of nodes and links touched by a delta."""
+    return sum(
+        len(delta[kind]["upsert"]) + len(delta[kind]["remove"])
+        for kind in ("nodes", "links")
+    )
+
+
+def _digests(items: dict[str, dict[str, Any]]) -> dict[str, int]:
+    """Hashes each item, so what was sent can be compared with a new value without keeping a copy of it."""
+    return {
+        key: hash(orjson.dumps(item, option=orjson.OPT_SERIALIZE_NUMPY, default=str)) for key, item in items.items()
+    }
+
+
+class _Sent:
+    """A version sent to some streams: digests of its items to diff against, and its items to resolve it to."""
+
+    __slots__ = ("nodes", "links", "value", "streams")
+
+    def __init__(
+        self,
+        nodes: dict[str, dict[str, Any]],
+        links: dict[str, dict[str, Any]],
+        node_digests: dict[str, int] | None = None,
+        link_digests: dict[str, int] | None = None,
+    ):
+        self.nodes = _digests(nodes) if node_digests is None else node_digests
+        self.links = _digests(links) if link_digests is None else link_digests
+        # The value's own items rather than copies, listed anew so the value's lists can change
+        self.value = {"nodes": list(nodes.values()), "links": list(links.values())}
+        # Number of streams that may hold this version
+        self.streams = 0
+
+
+class DeltaTracker:
+    """
+    Remembers the versions each stream may hold, so a new value can be sent as a delta against the version its
+    frontend holds, and the value of a version can be recovered, e.g. by a frontend that missed an update or
+    sends a version back with an event. A stream is a component displayed in one page, or a component of one
+    session for batches. Versions are derived from the content sent, so each is remembered once however many
+    streams hold it, as digests of its nodes and links, until no stream holds it any longer.
+    """
+
+    def __init__(self, max_streams: int = 1024, history: int = 4):
+        self.max_streams = max_streams
+        self.history = history
+        # stream -> versions it may hold, oldest first
+        self._streams: OrderedDict[Hashable, list[str]] = OrderedDict()
+        self._sent: dict[str, _Sent] = {}
+        self._lock = threading.Lock()
+
+    def _hold(self, stream: Hashable, version: str, sent: _Sent, held: str | None) -> None:
+        """Records `version` as sent on `stream`, whose frontend reported holding `held`. Called with the lock held."""
+        previous = self._streams.pop(stream, [])
+        # The frontend no longer holds the versions older than the one it holds
+        kept = previous[previous.index(held) :] if held in previous else []
+        kept = [*(item for item in kept if item != version), version][-self.history :]
+        self._streams[stream] = kept
+        if version not in previous:
+            self._sent.setdefault(version, sent).streams += 1
+        for item in previous:
+            if item not in kept:
+                self._release(item)
+        while len(self._streams) > self.max_streams:
+            _, dropped = self._streams.popitem(last=False)
+            for item in dropped:
+                self._release(item)
+
+    def _release(self, version: str) -> None:
+        sent = self._sent[version]
+        sent.streams -= 1
+        if not sent.streams:
+            del self._sent[version]
+
+    def encode(
+        self,
+        stream: Hashable,
+        value: dict[str, Any],
+        version: str,
+        held: str | None = None,
+        max_ratio: float = 0.5,
+    ) -> dict[str, Any]:
+        """
+        Records `value` as sent on `stream` and returns what should be sent for it.
+        Parameters:
+            stream: identifies the component and the page it is sent to
+            value: a graph value with 'nodes' and 'links' lists
+            version: the content fingerprint of `value`
+            held: the version the frontend holds, if any
+            max_ratio: send the full value when the delta touches more than this fraction of the graph
+        Returns:
+            either the full value tagged with its version, or a delta against `held` with the other keys of `value`
+        """
+        links = value.get("links") or []
+        nodes = {str(node["id"]): node for node in value.get("nodes") or []}
+        links = dict(zip(link_keys(links), links))
+        current = _Sent(nodes, links)
+        with self._lock:
+            base = None if held is None else self._sent.get(held)
+            self._hold(stream, version, current, held)
+
+        full = {**value, "version": version}
+        if base is None:
+            return full
+        delta = {
+            "nodes": {
+                "upsert": [node for key, node in nodes.items() if base.nodes.get(key) != current.nodes[key]],
+                "remove": [key for key in base.nodes if key not in nodes],
+            },
+            "links": {
+                "upsert": {key: link for key, link in links.items() if base.links.get(key) != current.links[key]},
+                "remove": [key for key in base.links if key not in links],
+            },
+        }
+        if delta_size(delta) > max_ratio * (len(nodes) + len(links)):
+            return full
+        # e.g. the handle events send back, or the hierarchy of a coarse graph
+        extra = {key: item for key, item in value.items() if key not in ("nodes", "links", "version")}
+        return {**extra, "format": "delta", "base": held, "version": version, **delta}
+
+    def append(
+        self,
+        stream: Hashable,
+        nodes: list[dict[str, Any]],
+        links: list[dict[str, Any]],
+        batch_version: str,
+        reset: bool = False,
+    ) -> dict[str, Any]:
+        """
+        Adds a batch of nodes and links to the latest value of `stream` and returns what should be sent for it.
+        Parameters:
+            stream: identifies the component and the session the batch is sent to, so the batches of concurrent
+                sessions are added to their own graphs
+            nodes: nodes to add, replacing the nodes with the same ids
+            links: links to add, after the existing links between the same nodes
+            batch_version: the content fingerprint of the batch
+            reset: start a new graph from this batch instead of adding to the latest value
+        Returns:
+            the full value if there is nothing to add to, otherwise a delta against the previous version
+        """
+        with self._lock:
+            previous = None if reset else self._streams.get(stream)
+            base = previous[-1] if previous else None
+            version = hashlib.blake2b(
+                f"{base}:{batch_version}".encode(), digest_size=16
+            ).hexdigest()
+
+            added_nodes = {str(node["id"]): node for node in nodes}
+            added_links: dict[str, dict[str, Any]] = {}
+            if base is None:
+                current_nodes, current_links = dict(added_nodes), {}
+                node_digests, link_digests = {}, {}
+            else:
+                base_sent = self._sent[base]
+                current_nodes = {str(node["id"]): node for node in base_sent.value["nodes"]}
+                current_nodes.update(added_nodes)
+                current_links = dict(zip(base_sent.links, base_sent.value["links"]))
+                node_digests, link_digests = dict(base_sent.nodes), dict(base_sent.links)
+            for link in links:
+                pair = (str(link["source"]), str(link["target"]))
+                occurrence = 0
+                while _KEY_SEPARATOR.join((*pair, str(occurrence))) in current_links:
+                    occurrence += 1
+                key = _KEY_SEPARATOR.join((*pair, str(occurrence)))
+                current_links[key] = added_links[key] = link
+            # Only the batch is hashed, the digests of the items it adds to are known already
+            node_digests.update(_digests(added_nodes))
+            link_digests.update(_digests(added_links))
+            current = _Sent(current_nodes, current_links, node_digests, link_digests)
+            self._hold(stream, version, current, base)
+
+        if base is None:
+            return {**current.value, "version": version}
+        return {
+            "format": "delta",
+            "base": base,
+            "version": version,
+            "nodes": {"upsert": list(added_nodes.values()), "remove": []},
+            "links": {"upsert": added_links, "remove": []},
+        }
+
+    def resolve(self, version: str) -> dict[str, Any] | None:
+        """
+        Returns:
+            the full value sent as `version`, or None if no stream holds it any longer
+        """
+        with self._lock:
+            sent = self._sent.get(version)
+        if sent is None:
+            return None
+        return {**sent.value, "version": version}
+
+
+DELTA_TRACKER = DeltaTracker()
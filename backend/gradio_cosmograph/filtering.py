@@ -0,0 +1,306 @@
+from __future__ import annotations
+
+import functools
+import hashlib
+import re
+import threading
+from typing import Any, NamedTuple
+
+import numpy as np
+
+from .columnar import ColumnarGraph
+from .held import HeldStore
+from .layout import graph_arrays
+
+_TOKEN = re.compile(
+    r"""\s*(?:
+        (?P<number>-?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?|-?\.\d+)
+        |(?P<string>"[^"]*"|'[^']*')
+        |(?P<operator><=|>=|!=|=|<|>|\(|\)|,)
+        |(?P<word>[^\s=<>!(),'"]+)
+    )""",
+    re.VERBOSE,
+)
+_KEYWORDS = {"and", "or", "not", "in"}
+_COMPARISONS = {"=", "!=", "<", "<=", ">", ">="}
+
+# ("and" | "or", [predicates]), ("not", predicate), ("compare", field, operator, value) or ("in", field, [values])
+Predicate = tuple
+
+
+def parse_filter(expression: str) -> Predicate:
+    """
+    Parses a filter expression such as `label = Document AND size > 3`. Comparisons are `field op value` with one of
+    =, !=, <, <=, >, >=, or `field IN (value, ...)`, combined with AND, OR, NOT and parentheses. Values are numbers,
+    quoted strings or bare words; keywords are case-insensitive.
+    Raises:
+        ValueError: if the expression is malformed
+    """
+    tokens: list[tuple[str, str | float]] = []
+    position = 0
+    expression = expression.strip()
+    while position < len(expression):
+        match = _TOKEN.match(expression, position)
+        if match is None or match.end() == position:
+            raise ValueError(f"Invalid filter {expression!r} at {expression[position:]!r}")
+        position = match.end()
+        kind = match.lastgroup
+        text = match.group(kind)
+        if kind == "number":
+            tokens.append(("value", float(text)))
+        elif kind == "string":
+            tokens.append(("value", text[1:-1]))
+        elif kind == "word" and text.lower() in _KEYWORDS:
+            tokens.append(("keyword", text.lower()))
+        elif kind == "word":
+            tokens.append(("value", text))
+        else:
+            tokens.append(("operator", text))
+    parser = _Parser(tokens, expression)
+    predicate = parser.disjunction()
+    if parser.position != len(tokens):
+        raise ValueError(f"Invalid filter {expression!r}: unexpected {tokens[parser.position][1]!r}")
+    return predicate
+
+
+class _Parser:
+    """Recursive descent over the tokens, NOT binding tighter than AND, and AND tighter than OR."""
+
+    def __init__(self, tokens: list[tuple[str, str | float]], expression: str):
+        self.tokens = tokens
+        self.expression = expression
+        self.position = 0
+
+    def _peek(self) -> tuple[str, str | float] | None:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def _take(self, kind: str, text: str | None = None) -> str | float:
+        token = self._peek()
+        if token is None or token[0] != kind or (text is not None and token[1] != text):
+            found = "the end" if token is None else repr(token[1])
+            raise ValueError(f"Invalid filter {self.expression!r}: expected {text or kind}, found {found}")
+        self.position += 1
+        return token[1]
+
+    def disjunction(self) -> Predicate:
+        terms = [self.conjunction()]
+        while self._peek() == ("keyword", "or"):
+            self.position += 1
+            terms.append(self.conjunction())
+        return terms[0] if len(terms) == 1 else ("or", terms)
+
+    def conjunction(self) -> Predicate:
+        terms = [self.term()]
+        while self._peek() == ("keyword", "and"):
+            self.position += 1
+            terms.append(self.term())
+        return terms[0] if len(terms) == 1 else ("and", terms)
+
+    def term(self) -> Predicate:
+        if self._peek() == ("keyword", "not"):
+            self.position += 1
+            return ("not", self.term())
+        if self._peek() == ("operator", "("):
+            self.position += 1
+            predicate = self.disjunction()
+            self._take("operator", ")")
+            return predicate
+        field = str(self._take("value"))
+        if self._peek() == ("keyword", "in"):
+            self.position += 1
+            self._take("operator", "(")
+            values = [self._take("value")]
+            while self._peek() == ("operator", ","):
+                self.position += 1
+                values.append(self._take("value"))
+            self._take("operator", ")")
+            return ("in", field, values)
+        operator = self._take("operator")
+        if operator not in _COMPARISONS:
+            raise ValueError(f"Invalid filter {self.expression!r}: expected a comparison, found {operator!r}")
+        return ("compare", field, operator, self._take("value"))
+
+
+class _NumericIndex(NamedTuple):
+    order: np.ndarray  # node indices sorted by value, missing values last
+    ordered: np.ndarray
+    present: np.ndarray
+
+
+class _CategoryIndex(NamedTuple):
+    codes: dict[str, int]
+    node_codes: np.ndarray
+    bitmaps: dict[int, np.ndarray]  # filled as categories are queried
+
+
+class GraphFilter:
+    """
+    Selects the nodes of a graph value matching a filter expression, and the subgraph they induce. Indexes are built
+    per attribute on first use and kept for the next filters: numeric attributes are sorted, so ranges resolve with
+    binary searches, and categorical ones keep a bitmap per value.
+    """
+
+    def __init__(self, value: dict[str, Any] | ColumnarGraph):
+        """
+        Parameters:
+            value: a dictionary with 'nodes' and 'links' lists, or a ColumnarGraph
+        """
+        self.value = value
+        if isinstance(value, ColumnarGraph):
+            self.node_count = value.node_count
+        else:
+            self.node_count = len(value.get("nodes") or [])
+        self._indexes: dict[str, _NumericIndex | _CategoryIndex | None] = {}
+        self._lock = threading.Lock()
+
+    def _column(self, field: str) -> np.ndarray | None:
+        """Values of `field` for every node, as float64 (NaN when missing) or as strings, or None if no node has it."""
+        value = self.value
+        if isinstance(value, ColumnarGraph):
+            if field in ("x", "y", "size"):
+                column = getattr(value, field)
+                return None if column is None else np.asarray(column, dtype=np.float64)
+            if field == "id":
+                return None if value.ids is None else np.asarray(value.ids)
+            return value.labels.get(field)
+        values = [node.get(field) for node in value.get("nodes") or []]
+        present = [item for item in values if item is not None]
+        if not present:
+            return None
+        if all(isinstance(item, (int, float)) and not isinstance(item, bool) for item in present):
+            return np.array([np.nan if item is None else item for item in values], dtype=np.float64)
+        return np.array(["" if item is None else str(item) for item in values])
+
+    def _index(self, field: str) -> _NumericIndex | _CategoryIndex | None:
+        with self._lock:
+            if field not in self._indexes:
+                column = self._column(field)
+                if column is None:
+                    self._indexes[field] = None
+                elif column.dtype.kind == "f":
+                    order = np.argsort(column, kind="stable")
+                    self._indexes[field] = _NumericIndex(order, column[order], ~np.isnan(column))
+                else:
+                    categories, codes = np.unique(column, return_inverse=True)
+                    lookup = {str(category): code for code, category in enumerate(categories.tolist())}
+                    self._indexes[field] = _CategoryIndex(lookup, codes.reshape(-1), {})
+            return self._indexes[field]
+
+    def _bitmap(self, index: _CategoryIndex, category: str) -> np.ndarray:
+        code = index.codes.get(category)
+        if code is None:
+            return np.zeros(self.node_count, dtype=bool)
+        with self._lock:
+            if code not in index.bitmaps:
+                index.bitmaps[code] = index.node_codes == code
+            return index.bitmaps[code]
+
+    def _range(
+        self, index: _NumericIndex, low: float, high: float, low_inclusive: bool, high_inclusive: bool
+    ) -> np.ndarray:
+        # NaNs sort last, so searching for numbers never reaches them
+        start = np.searchsorted(index.ordered, low, side="left" if low_inclusive else "right")
+        stop = np.searchsorted(index.ordered, high, side="right" if high_inclusive else "left")
+        mask = np.zeros(self.node_count, dtype=bool)
+        mask[index.order[start:stop]] = True
+        return mask
+
+    def _compare(self, field: str, operator: str, operand: str | float) -> np.ndarray:
+        index = self._index(field)
+        if index is None:
+            return np.full(self.node_count, operator == "!=", dtype=bool)
+        if isinstance(index, _CategoryIndex):
+            if operator not in ("=", "!="):
+                raise ValueError(f"Field {field!r} holds text, it can only be compared with = and !=")
+            text = str(int(operand)) if isinstance(operand, float) and operand.is_integer() else str(operand)
+            mask = self._bitmap(index, text)
+            return ~mask if operator == "!=" else mask
+        if isinstance(operand, str):
+            raise ValueError(f"Field {field!r} holds numbers, it can't be compared with {operand!r}")
+        if operator == "=":
+            return self._range(index, operand, operand, True, True)
+        if operator == "!=":
+            return index.present & ~self._range(index, operand, operand, True, True)
+        if operator in ("<", "<="):
+            return self._range(index, -np.inf, operand, True, operator == "<=")
+        return self._range(index, operand, np.inf, operator == ">=", True)
+
+    def mask(self, predicate: Predicate | str) -> np.ndarray:
+        """
+        Returns:
+            whether each node matches `predicate`, a filter expression or the result of `parse_filter`
+        """
+        if isinstance(predicate, str):
+            predicate = parse_filter(predicate)
+        kind = predicate[0]
+        if kind == "and":
+            return functools.reduce(np.logical_and, (self.mask(term) for term in predicate[1]))
+        if kind == "or":
+            return functools.reduce(np.logical_or, (self.mask(term) for term in predicate[1]))
+        if kind == "not":
+            return ~self.mask(predicate[1])
+        if kind == "in":
+            return functools.reduce(
+                np.logical_or,
+                (self._compare(predicate[1], "=", value) for value in predicate[2]),
+                np.zeros(self.node_count, dtype=bool),
+            )
+        return self._compare(*predicate[1:])
+
+    @functools.cached_property
+    def _links(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        _, source, target, indices = graph_arrays(self.value)
+        return source, target, indices
+
+    def links_between(self, keep: np.ndarray) -> np.ndarray:
+        """
+        Returns:
+            the sorted indices of the links whose ends are both kept, given whether each node is kept
+        """
+        source, target, indices = self._links
+        return indices[keep[source] & keep[target]]
+
+    def take(self, nodes: np.ndarray, links: np.ndarray) -> dict[str, Any] | ColumnarGraph:
+        """
+        Returns:
+            the value restricted to the nodes and links at the sorted indices `nodes` and `links`. Dictionary values
+            share their node and link dictionaries with the filtered value.
+        """
+        value = self.value
+        if isinstance(value, ColumnarGraph):
+            return value.take(nodes, links)
+        all_nodes = value.get("nodes") or []
+        all_links = value.get("links") or []
+        return {
+            **value,
+            "nodes": [all_nodes[i] for i in nodes.tolist()],
+            "links": [all_links[i] for i in links.tolist()],
+        }
+
+    def subgraph(self, predicate: Predicate | str) -> dict[str, Any] | ColumnarGraph:
+        """
+        Returns:
+            the nodes matching `predicate` and the links between them, in the same form as the filtered value
+        """
+        keep = self.mask(predicate)
+        return self.take(np.flatnonzero(keep), self.links_between(keep))
+
+
+def filter_graph(value: dict[str, Any] | ColumnarGraph, expression: str) -> dict[str, Any] | ColumnarGraph:
+    """
+    Keeps the nodes of a graph value matching a filter expression such as `label = Document AND size > 3` (see
+    `parse_filter`), and the links between them. Use a `GraphFilter` to filter the same graph repeatedly.
+    """
+    return GraphFilter(value).subgraph(expression)
+
+
+def filter_version(version: str, expression: str) -> str:
+    digest = hashlib.blake2b(" ".join(expression.split()).encode(), digest_size=8).hexdigest()
+    return f"{version}:filter:{digest}"
+
+
+class FilterStore(HeldStore[GraphFilter]):
+    """Keeps a GraphFilter for the values pages display, by component and version, so they can be filtered later."""
+
+
+FILTER_STORE = FilterStore()
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any
+
+import numpy as np
+import orjson
+
+from .columnar import ColumnarGraph, _table_columns, is_table
+from .graph_file import GraphFile
+
+
+class Fingerprinted:
+    """
+    A value returned by an event handler together with the fingerprint the handler already computed for it, e.g. to
+    skip polled values a session displays, so postprocessing doesn't hash it again.
+    """
+
+    __slots__ = ("value", "version")
+
+    def __init__(self, value: Any, version: str):
+        self.value = value
+        self.version = version
+
+
+def _hash_column(hasher: Any, name: str, column: Any) -> None:
+    """Hashes the buffer of a column rather than its values one by one."""
+    column = np.asarray(column)
+    if column.dtype.kind == "O":
+        column = column.astype(str)
+    hasher.update(f"{name}:{column.dtype.str}:{len(column)}".encode())
+    hasher.update(np.ascontiguousarray(column).data)
+
+
+def fingerprint(value: Any) -> str | None:
+    """
+    Computes a content hash of a graph value, used as its version token.
+    Parameters:
+        value: a ColumnarGraph or a dictionary with 'nodes' and 'links'. A dictionary that already carries a
+            'version' is trusted and not hashed, and a GraphFile is versioned by its path, size and modification time.
+            Columns, of a ColumnarGraph or of pandas/pyarrow tables, are hashed as buffers.
+    Returns:
+        a hex digest, or None if `value` is not a graph value
+    """
+    if isinstance(value, GraphFile):
+        return value.version
+    hasher = hashlib.blake2b(digest_size=16)
+    if isinstance(value, ColumnarGraph):
+        hasher.update(str(value.node_count).encode())
+        for key in ("ids", "x", "y", "size", "color", "source", "target", "link_width", "link_color"):
+            column = getattr(value, key)
+            if column is not None:
+                _hash_column(hasher, key, column)
+        for prefix, columns in (("node", value.labels), ("link", value.link_labels)):
+            for key, column in columns.items():
+                _hash_column(hasher, f"{prefix}:{key}", column)
+        return hasher.hexdigest()
+
+    if not isinstance(value, dict) or "nodes" not in value:
+        return None
+    if value.get("version"):
+        return str(value["version"])
+    if is_table(value["nodes"]):
+        for prefix in ("nodes", "links"):
+            if value.get(prefix) is not None:
+                for key, column in _table_columns(value[prefix]).items():
+                    _hash_column(hasher, f"{prefix}:{key}", column)
+        return hasher.hexdigest()
+    hasher.update(
+        orjson.dumps(
+            [value.get("nodes"), value.get("links")],
+            option=orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+            default=str,
+        )
+    )
+    return hasher.hexdigest()
+
+
+class SessionVersions:
+    """
+    Remembers the version of the last value sent to each session, so a value a session already displays
+    can be skipped instead of resent.
+    """
+
+    def __init__(self, max_sessions: int = 1024):
+        self.max_sessions = max_sessions
+        self._versions: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def update(self, session: str, version: str) -> bool:
+        """
+        Records `version` as sent to `session`.
+        Returns:
+            whether it differs from the version previously sent to that session
+        """
+        with self._lock:
+            changed = self._versions.get(session) != version
+            self._versions[session] = version
+            self._versions.move_to_end(session)
+            while len(self._versions) > self.max_sessions:
+                self._versions.popitem(last=False)
+        return changed
@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import struct
+import threading
+import zipfile
+from pathlib import Path
+from typing import Any
+
+import gradio
+import numpy as np
+from gradio.data_classes import FileData
+
+from .columnar import ColumnarGraph, encode_strings
+
+# Numeric columns are stored with the wire dtypes, so the frontend can view the fetched bytes directly
+_FILE_DTYPES = {np.dtype("<f4"): "float32", np.dtype("<u4"): "uint32"}
+_NODE_COLUMNS = {"ids": "id", "x": "x", "y": "y", "size": "size", "color": "color"}
+_LINK_COLUMNS = {"source": "source", "target": "target", "link_width": "width", "link_color": "color"}
+_LABEL_PREFIXES = {"labels.": "nodes", "link_labels.": "links"}
+_LOCAL_HEADER = struct.Struct("<4sHHHHHIIIHH")
+
+# Files registered with Gradio to be served in place, with range request support, rather than copied to its cache
+_SERVED_PATHS: set[Path] = set()
+_SERVED_LOCK = threading.Lock()
+
+
+def _column_ranges(path: Path) -> dict[str, tuple[int, int, np.dtype, tuple[int, ...]]]:
+    """
+    Locates the raw data of every array of an uncompressed .npz file, without reading it.
+    Returns:
+        for each array name, the offset and size in bytes of its data within the file, its dtype and its shape
+    """
+    ranges = {}
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as file:
+        for info in archive.infolist():
+            if not info.filename.endswith(".npy"):
+                continue
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path} is compressed, graph files must be written with `save_graph`.")
+            file.seek(info.header_offset)
+            header = _LOCAL_HEADER.unpack(file.read(_LOCAL_HEADER.size))
+            file.seek(info.header_offset + _LOCAL_HEADER.size + header[-2] + header[-1])
+            version = np.lib.format.read_magic(file)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(file)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(file)
+            if fortran_order and len(shape) > 1:
+                raise ValueError(f"Array {info.filename!r} of {path} must be one-dimensional.")
+            if dtype.hasobject:
+                raise ValueError(f"Array {info.filename!r} of {path} holds Python objects, which can't be served.")
+            size = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+            ranges[info.filename[: -len(".npy")]] = (file.tell(), size, dtype, shape)
+    return ranges
+
+
+class GraphFile:
+    """
+    A graph stored on disk as an uncompressed .npz file of columns. Returned from a function, it is never loaded by
+    the server: the frontend fetches the columns it needs straight from the file with HTTP range requests. Arrow IPC
+    and Parquet tables are converted to such a file once, next to them.
+    """
+
+    def __init__(self, path: str | Path, links: str | Path | None = None):
+        """
+        Parameters:
+            path: an .npz file written by `save_graph`, or an Arrow IPC (.arrow, .feather) or Parquet (.parquet)
+                node table with the columns described in `ColumnarGraph.from_tables`.
+            links: the Arrow IPC or Parquet link table, when `path` is a node table.
+        """
+        path = Path(path).resolve()
+        if path.suffix != ".npz":
+            path = _convert_tables(path, None if links is None else Path(links).resolve())
+        self.path = path
+        self._layout: dict[str, Any] | None = None
+        self._layout_key: tuple[int, int] | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> str:
+        """Changes whenever the file is rewritten."""
+        stat = self.path.stat()
+        return hashlib.blake2b(f"{self.path}:{stat.st_size}:{stat.st_mtime_ns}".encode(), digest_size=16).hexdigest()
+
+    def layout(self) -> dict[str, Any]:
+        """
+        Returns:
+            where each column lies in the file, in the form sent to the frontend, without the file itself
+        """
+        stat = self.path.stat()
+        key = (stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            if self._layout is None or self._layout_key != key:
+                self._layout = self._read_layout()
+                self._layout_key = key
+            return self._layout
+
+    def _read_layout(self) -> dict[str, Any]:
+        ranges = _column_ranges(self.path)
+        nodes: dict[str, Any] = {}
+        links: dict[str, Any] = {}
+
+        def describe(name: str) -> dict[str, Any]:
+            offset, size, dtype, shape = ranges.pop(name)
+            if len(shape) != 1:
+                raise ValueError(f"Column {name!r} of {self.path} must be one-dimensional.")
+            if dtype.kind == "U":
+                return {"offset": offset, "bytes": size, "dtype": "utf32", "width": dtype.itemsize // 4}
+            if dtype not in _FILE_DTYPES:
+                raise ValueError(
+                    f"Column {name!r} of {self.path} has dtype {dtype}, expected float32 or uint32. "
+                    "Write graph files with `save_graph`."
+                )
+            return {"offset": offset, "bytes": size, "dtype": _FILE_DTYPES[dtype]}
+
+        for name, key in _NODE_COLUMNS.items():
+            if name in ranges:
+                nodes[key] = describe(name)
+        for name, key in _LINK_COLUMNS.items():
+            if name in ranges:
+                links[key] = describe(name)
+        if "source" not in links or "target" not in links:
+            raise ValueError(f"{self.path} has no 'source' and 'target' columns.")
+        # Labels sit next to the other columns, as in columnar payloads
+        for name in sorted(ranges):
+            for prefix, group in _LABEL_PREFIXES.items():
+                if not name.startswith(prefix) or name.endswith(".codes"):
+                    continue
+                columns = nodes if group == "nodes" else links
+                key = name[len(prefix) :]
+                if key.endswith(".categories"):
+                    key = key[: -len(".categories")]
+                    columns[key] = {"categories": describe(name), "codes": describe(f"{prefix}{key}.codes")}
+                else:
+                    columns[key] = describe(name)
+
+        if "node_count" in ranges:
+            offset, _, dtype, _ = ranges["node_count"]
+            node_count = int(np.memmap(self.path, dtype=dtype, mode="r", offset=offset, shape=(1,))[0])
+        elif nodes:
+            column = next(iter(nodes.values()))
+            node_count = column["bytes"] // (4 * column.get("width", 1))
+        else:
+            node_count = 0
+        return {"nodeCount": node_count, "linkCount": links["source"]["bytes"] // 4, "nodes": nodes, "links": links}
+
+    def to_payload(self) -> dict[str, Any]:
+        """
+        Returns:
+            the wire representation sent to the frontend: the file, served as is, and where each column lies in it
+        """
+        with _SERVED_LOCK:
+            if self.path not in _SERVED_PATHS:
+                gradio.set_static_paths([self.path])
+                _SERVED_PATHS.add(self.path)
+        return {
+            "format": "file",
+            "version": self.version,
+            "file": FileData(path=str(self.path), size=self.path.stat().st_size).model_dump(),
+            **self.layout(),
+        }
+
+    @classmethod
+    def from_payload(cls, payload: dict[str, Any]) -> GraphFile:
+        """Inverse of `to_payload`. Only files this process sent to the frontend are accepted."""
+        path = Path(payload["file"]["path"]).resolve()
+        if path not in _SERVED_PATHS:
+            raise ValueError(f"{path} was not sent as a graph file by this app.")
+        return cls(path)
+
+    def to_graph(self) -> ColumnarGraph:
+        """
+        Returns:
+            the graph as a ColumnarGraph, whose numeric columns are memory-mapped from the file
+        """
+        ranges = _column_ranges(self.path)
+        columns = {
+            name: np.memmap(self.path, dtype=dtype, mode="r", offset=offset, shape=shape)
+            for name, (offset, _, dtype, shape) in ranges.items()
+        }
+        labels: dict[str, dict[str, Any]] = {"labels.": {}, "link_labels.": {}}
+        for name, column in columns.items():
+            for prefix, group in labels.items():
+                if not name.startswith(prefix) or name.endswith(".codes"):
+                    continue
+                key = name[len(prefix) :]
+                if key.endswith(".categories"):
+                    key = key[: -len(".categories")]
+                    group[key] = np.asarray(column)[columns[f"{prefix}{key}.codes"]]
+                else:
+                    group[key] = column
+        node_count = columns.get("node_count")
+        return ColumnarGraph(
+            columns["source"],
+            columns["target"],
+            ids=columns.get("ids"),
+            x=columns.get("x"),
+            y=columns.get("y"),
+            size=columns.get("size"),
+            color=columns.get("color"),
+            labels=labels["labels."],
+            link_width=columns.get("link_width"),
+            link_color=columns.get("link_color"),
+            link_labels=labels["link_labels."],
+            node_count=None if node_count is None else int(node_count[0]),
+            indices=True,
+        )
+
+
+def save_graph(graph: ColumnarGraph, path: str | Path) -> Path:
+    """
+    Writes a ColumnarGraph as an uncompressed .npz file that `GraphFile` can serve. Numeric columns are stored as
+    float32 or uint32, and string columns that repeat a few values as a category table and codes.
+    Returns:
+        the path written
+    """
+    path = Path(path)
+    arrays: dict[str, np.ndarray] = {"node_count": np.array([graph.node_count], dtype="<u4")}
+    for name in ("x", "y", "size", "link_width"):
+        column = getattr(graph, name)
+        if column is not None:
+            arrays[name] = np.ascontiguousarray(column, dtype="<f4")
+    for name in ("source", "target", "color", "link_color"):
+        column = getattr(graph, name)
+        if column is not None:
+            arrays[name] = np.ascontiguousarray(column, dtype="<u4")
+    if graph.ids is not None:
+        arrays["ids"] = graph.ids
+    for prefix, columns in (("labels.", graph.labels), ("link_labels.", graph.link_labels)):
+        for key, column in columns.items():
+            encoded = encode_strings(column)
+            if isinstance(encoded, list):
+                arrays[f"{prefix}{key}"] = column
+            else:
+                categories, codes = np.unique(column, return_inverse=True)
+                arrays[f"{prefix}{key}.categories"] = categories
+                arrays[f"{prefix}{key}.codes"] = codes.reshape(-1).astype("<u4")
+    # Written to a temporary file first, so a GraphFile never serves a half written one
+    temporary = path.with_name(f".{path.name}.tmp")
+    with open(temporary, "wb") as file:
+        np.savez(file, **arrays)
+    os.replace(temporary, path)
+    return path
+
+
+def _convert_tables(nodes: Path, links: Path | None) -> Path:
+    """Converts Arrow IPC or Parquet tables to a graph file next to them, unless it is already up to date."""
+    target = nodes.with_name(f"{nodes.stem}.graph.npz")
+    sources = [nodes, *([links] if links is not None else [])]
+    if target.exists() and target.stat().st_mtime_ns >= max(source.stat().st_mtime_ns for source in sources):
+        return target
+    try:
+        from pyarrow import feather, parquet
+    except ImportError as error:
+        raise ImportError("Reading Arrow IPC or Parquet graph files requires `pyarrow`.") from error
+
+    def read(source: Path):
+        if source.suffix == ".parquet":
+            return parquet.read_table(source)
+        if source.suffix in (".arrow", ".feather", ".ipc"):
+            return feather.read_table(source, memory_map=True)
+        raise ValueError(f"Unsupported graph file {source}, expected .npz, .arrow, .feather or .parquet.")
+
+    save_graph(ColumnarGraph.from_tables(read(nodes), read(links) if links is not None else None), target)
+    return target
@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any
+
+import numpy as np
+
+from .columnar import ColumnarGraph
+from .filtering import GraphFilter, Predicate
+from .fingerprint import fingerprint
+
+
+def _freeze(value: dict[str, Any] | ColumnarGraph) -> None:
+    """Makes the columns of a stored ColumnarGraph read-only, as every handle shares them."""
+    if not isinstance(value, ColumnarGraph):
+        return
+    for column in (*vars(value).values(), *value.labels.values(), *value.link_labels.values()):
+        if isinstance(column, np.ndarray) and column.flags.writeable:
+            column.flags.writeable = False
+
+
+class _Entry:
+    __slots__ = ("_filter", "lock", "references", "value")
+
+    def __init__(self, value: dict[str, Any] | ColumnarGraph):
+        self.value = value
+        self.references = 0
+        self.lock = threading.Lock()
+        self._filter: GraphFilter | None = None
+
+    @property
+    def filter(self) -> GraphFilter:
+        # Indexes are built once per stored graph, whichever handle filters it
+        with self.lock:
+            if self._filter is None:
+                self._filter = GraphFilter(self.value)
+            return self._filter
+
+
+class GraphHandle:
+    """
+    A reference to a graph held by a `GraphStore`, usable as the value of a `NetworkGraph`. Copying a handle, e.g.
+    when `gr.State` copies its value for each session, only copies the reference. A handle can also be a view of part
+    of the stored graph, e.g. a filtered one, which only holds the indices of its nodes and links, or an overlay of
+    the stored graph, e.g. one expanded with the neighbourhood of a clicked node, which only holds the nodes and links
+    merged into it.
+    """
+
+    __slots__ = ("__weakref__", "_overlay_version", "key", "links", "nodes", "overlay", "store")
+
+    def __init__(
+        self,
+        store: GraphStore,
+        key: str,
+        nodes: np.ndarray | None = None,
+        links: np.ndarray | None = None,
+        overlay: dict[str, Any] | None = None,
+    ):
+        self.store = store
+        self.key = key
+        self.nodes = nodes
+        self.links = links
+        self.overlay = overlay
+        self._overlay_version = None if overlay is None else fingerprint(overlay)
+        store._acquire(key)
+        weakref.finalize(self, store._release, key)
+
+    @property
+    def version(self) -> str:
+        """Identifies the graph this handle refers to, shared by every handle to the same graph, view or overlay."""
+        version = self.key
+        if self.nodes is not None:
+            hasher = hashlib.blake2b(digest_size=8)
+            hasher.update(np.ascontiguousarray(self.nodes, dtype=np.int64).data)
+            hasher.update(np.ascontiguousarray(self.links, dtype=np.int64).data)
+            version = f"{version}:view:{hasher.hexdigest()}"
+        if self.overlay is not None:
+            version = f"{version}:overlay:{self._overlay_version}"
+        return version
+
+    @property
+    def value(self) -> dict[str, Any] | ColumnarGraph:
+        """
+        The graph itself, which must not be modified. Views build their value from the stored graph on each access,
+        sharing its node and link dictionaries or copying the columns of their nodes and links, and so do overlays,
+        as a dictionary merging their nodes and links into those of the stored graph.
+        """
+        # Imported here as the delta module accepts handles in turn
+        from .delta import merge_graphs
+
+        entry = self.store._entry(self.key)
+        value = entry.value if self.nodes is None else entry.filter.take(self.nodes, self.links)
+        if self.overlay is None:
+            return value
+        return merge_graphs(value, self.overlay)
+
+    def merge(self, addition: dict[str, Any]) -> GraphHandle:
+        """
+        Returns:
+            a handle to this graph with the nodes and links of `addition` merged in, as by `merge_graphs`. The stored
+            graph is shared rather than copied, the handle only holds the nodes and links merged into it.
+        """
+        # Imported here as the delta module accepts handles in turn
+        from .delta import merge_graphs
+
+        overlay = merge_graphs(self.overlay, addition)
+        return self.store._register_view(GraphHandle(self.store, self.key, self.nodes, self.links, overlay))
+
+    def view(self, nodes: np.ndarray, links: np.ndarray | None = None) -> GraphHandle:
+        """
+        Returns:
+            a handle to part of this graph, the nodes at the indices `nodes` and the links at the indices `links`, or
+            the links between those nodes if omitted. Indices are relative to this handle's graph.
+        """
+        if self.overlay is not None:
+            raise ValueError("Only handles without merged nodes and links have views.")
+        entry = self.store._entry(self.key)
+        nodes = np.unique(np.asarray(nodes, dtype=np.int64))
+        if self.nodes is not None:
+            nodes = self.nodes[nodes]
+        if links is None:
+            keep = np.zeros(entry.filter.node_count, dtype=bool)
+            keep[nodes] = True
+            links = entry.filter.links_between(keep)
+        else:
+            links = np.unique(np.asarray(links, dtype=np.int64))
+            if self.links is not None:
+                links = self.links[links]
+        return self.store._register_view(GraphHandle(self.store, self.key, nodes, links))
+
+    def filter(self, predicate: Predicate | str) -> GraphHandle:
+        """
+        Returns:
+            a handle to the nodes of this graph matching a filter expression (see `parse_filter`) and the links between
+            them, resolved with the indexes of the stored graph
+        """
+        if self.overlay is not None:
+            raise ValueError("Only handles without merged nodes and links can be filtered.")
+        mask = self.store._entry(self.key).filter.mask(predicate)
+        if self.nodes is not None:
+            inside = np.zeros(len(mask), dtype=bool)
+            inside[self.nodes] = True
+            mask = mask & inside
+            return self.view(np.searchsorted(self.nodes, np.flatnonzero(mask)))
+        return self.view(np.flatnonzero(mask))
+
+    def __copy__(self) -> GraphHandle:
+        return GraphHandle(self.store, self.key, self.nodes, self.links, self.overlay)
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> GraphHandle:
+        return self.__copy__()
+
+    def __repr__(self) -> str:
+        return f"GraphHandle({self.version!r})"
+
+
+class GraphStore:
+    """
+    Holds graphs once per process, however many sessions display them. Graphs are keyed by content, so storing a graph
+    equal to one already held returns a handle to the one held. A graph stays stored while any handle to it is alive,
+    then among the `max_released` most recently released ones, so a value sent to the frontend can still be found
+    when it comes back with an event.
+    """
+
+    def __init__(self, max_released: int = 16):
+        self.max_released = max_released
+        self._entries: dict[str, _Entry] = {}
+        self._released: OrderedDict[str, None] = OrderedDict()
+        self._views: weakref.WeakValueDictionary[str, GraphHandle] = weakref.WeakValueDictionary()
+        self._lock = threading.RLock()
+
+    def put(self, value: dict[str, Any] | ColumnarGraph, key: str | None = None) -> GraphHandle:
+        """
+        Parameters:
+            value: a dictionary with 'nodes' and 'links' lists, or a ColumnarGraph. It must not be modified once stored.
+            key: identifies the graph, e.g. the query that produced it, its content hash if omitted
+        Returns:
+            a handle to the stored graph, which is `value` unless an equal graph was already stored
+        """
+        if key is None:
+            key = fingerprint(value)
+            if key is None:
+                raise ValueError("Only graph values, with 'nodes' and 'links', can be stored.")
+        with self._lock:
+            if key not in self._entries:
+                _freeze(value)
+                self._entries[key] = _Entry(value)
+                # Released until a handle refers to it
+                self._released[key] = None
+            return GraphHandle(self, key)
+
+    def get(self, version: str) -> GraphHandle | None:
+        """
+        Returns:
+            a handle to the graph or view with this version, or None if it is no longer stored
+        """
+        view = self._views.get(version)
+        if view is not None:
+            return view.__copy__()
+        with self._lock:
+            if version not in self._entries:
+                return None
+            return GraphHandle(self, version)
+
+    def __contains__(self, version: str) -> bool:
+        return version in self._entries or version in self._views
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _entry(self, key: str) -> _Entry:
+        return self._entries[key]
+
+    def _register_view(self, view: GraphHandle) -> GraphHandle:
+        self._views.setdefault(view.version, view)
+        return view
+
+    def _acquire(self, key: str) -> None:
+        with self._lock:
+            self._entries[key].references += 1
+            self._released.pop(key, None)
+
+    def _release(self, key: str) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.references -= 1
+            if entry.references > 0:
+                return
+            self._released[key] = None
+            self._released.move_to_end(key)
+            while len(self._released) > self.max_released:
+                released, _ = self._released.popitem(last=False)
+                del self._entries[released]
+
+
+GRAPH_STORE = GraphStore()
+
+
+def store_graph(value: dict[str, Any] | ColumnarGraph, key: str | None = None) -> GraphHandle:
+    """
+    Stores a graph in the process-wide `GraphStore`, see `GraphStore.put`. Returning the handle from a function, or
+    keeping it in a `gr.State`, shares the graph between sessions instead of holding a copy per session.
+    """
+    return GRAPH_STORE.put(value, key)
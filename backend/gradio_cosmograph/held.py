@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import threading
+from collections import Counter, OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class HeldStore(Generic[T]):
+    """
+    Keeps entries built for the values sent to the frontend, e.g. the indexes used to filter them, for as long as a
+    page displays them. Each page, identified by the client id its frontend picks, holds the last `history` entries it
+    used; entries no page holds yet, e.g. those of a value still on its way to the frontend, are kept while they are
+    among the `max_recent` most recently put. Pages are forgotten least recently used first beyond `max_clients`.
+    """
+
+    def __init__(self, max_recent: int = 16, max_clients: int = 1024, history: int = 4):
+        self.max_recent = max_recent
+        self.max_clients = max_clients
+        self.history = history
+        self._entries: dict[Hashable, T] = {}
+        self._recent: OrderedDict[Hashable, None] = OrderedDict()
+        # client -> keys it holds, least recently used first
+        self._clients: OrderedDict[Hashable, list[Hashable]] = OrderedDict()
+        self._holders: Counter[Hashable] = Counter()
+        self._lock = threading.Lock()
+
+    def put(self, key: Hashable, entry: T, client: Hashable | None = None) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._touch(key)
+            if client is not None:
+                self._hold(key, client)
+
+    def setdefault(self, key: Hashable, build: Callable[[], T], client: Hashable | None = None) -> T:
+        """Returns the entry of `key`, built and put first if there is none, e.g. as the same value was sent again."""
+        entry = self.get(key, client)
+        if entry is None:
+            entry = build()
+            self.put(key, entry, client)
+        return entry
+
+    def get(self, key: Hashable, client: Hashable | None = None) -> T | None:
+        """
+        Returns:
+            the entry of `key`, now held by `client` if given, or None if it is no longer kept
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and client is not None:
+                self._hold(key, client)
+            return entry
+
+    def hold(self, key: Hashable, client: Hashable) -> None:
+        """Records that the page `client` displays the value of `key`, if its entry is still kept."""
+        self.get(key, client)
+
+    def _touch(self, key: Hashable) -> None:
+        self._recent[key] = None
+        self._recent.move_to_end(key)
+        while len(self._recent) > self.max_recent:
+            self._discard(self._recent.popitem(last=False)[0])
+
+    def _hold(self, key: Hashable, client: Hashable) -> None:
+        held = self._clients.pop(client, [])
+        if key in held:
+            held.remove(key)
+        else:
+            self._holders[key] += 1
+        held.append(key)
+        self._clients[client] = held[-self.history :]
+        self._release(held[: -self.history])
+        while len(self._clients) > self.max_clients:
+            self._release(self._clients.popitem(last=False)[1])
+
+    def _release(self, keys: list[Hashable]) -> None:
+        for key in keys:
+            self._holders[key] -= 1
+            self._discard(key)
+
+    def _discard(self, key: Hashable) -> None:
+        """Drops `key` if neither a page holds it nor it was recently put."""
+        if key in self._recent or self._holders[key] > 0:
+            return
+        self._entries.pop(key, None)
+        del self._holders[key]
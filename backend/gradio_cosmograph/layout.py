@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import functools
+import time
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from .columnar import ColumnarGraph
+from .validation import GraphIndex
+
+if TYPE_CHECKING:
+    from .layout_cache import LayoutCache
+    from .workers import GraphJobPool
+
+# Below this many nodes, repulsion is computed exactly between every pair of nodes
+_EXACT_REPULSION_MAX_NODES = 1000
+_EPSILON = 1e-9
+
+
+def _exact_repulsion(positions: np.ndarray) -> np.ndarray:
+    delta = positions[:, None, :] - positions[None, :, :]
+    distance2 = np.einsum("ijk,ijk->ij", delta, delta)
+    np.fill_diagonal(distance2, np.inf)
+    return np.einsum("ijk,ij->ik", delta, 1.0 / np.maximum(distance2, _EPSILON))
+
+
+def _grid_repulsion(positions: np.ndarray, grid_size: int) -> np.ndarray:
+    """
+    Approximates repulsion the way Barnes-Hut does with a single level: nodes are binned into a grid,
+    distant nodes are replaced by the centroid of their cell, and nodes sharing a cell are pushed away
+    from that cell's centroid.
+    """
+    lower = positions.min(axis=0)
+    span = max(float((positions.max(axis=0) - lower).max()), _EPSILON)
+    cell_xy = np.minimum(
+        ((positions - lower) / span * grid_size).astype(np.int64), grid_size - 1
+    )
+    cells = cell_xy[:, 0] * grid_size + cell_xy[:, 1]
+
+    occupied, node_cell, mass = np.unique(cells, return_inverse=True, return_counts=True)
+    centroids = np.stack(
+        [
+            np.bincount(node_cell, weights=positions[:, 0], minlength=len(occupied)),
+            np.bincount(node_cell, weights=positions[:, 1], minlength=len(occupied)),
+        ],
+        axis=1,
+    ) / mass[:, None]
+
+    delta = centroids[:, None, :] - centroids[None, :, :]
+    distance2 = np.einsum("ijk,ijk->ij", delta, delta)
+    np.fill_diagonal(distance2, np.inf)
+    cell_force = np.einsum("ijk,ij->ik", delta, mass[None, :] / np.maximum(distance2, _EPSILON))
+
+    offset = positions - centroids[node_cell]
+    offset_distance2 = np.einsum("ij,ij->i", offset, offset) + _EPSILON
+    return cell_force[node_cell] + offset * ((mass[node_cell] - 1) / offset_distance2)[:, None]
+
+
+def _attraction(positions: np.ndarray, source: np.ndarray, target: np.ndarray) -> np.ndarray:
+    delta = positions[target] - positions[source]
+    force = delta * np.sqrt(np.einsum("ij,ij->i", delta, delta))[:, None]
+    node_count = len(positions)
+    return np.stack(
+        [
+            np.bincount(source, weights=force[:, axis], minlength=node_count)
+            - np.bincount(target, weights=force[:, axis], minlength=node_count)
+            for axis in (0, 1)
+        ],
+        axis=1,
+    )
+
+
+def force_layout(
+    source: Any,
+    target: Any,
+    node_count: int,
+    *,
+    iterations: int = 300,
+    time_budget: float | None = None,
+    initial_positions: np.ndarray | None = None,
+    start_temperature: float | None = None,
+    grid_size: int = 32,
+    seed: int = 0,
+    progress: Callable[[float], None] | None = None,
+) -> np.ndarray:
+    """
+    Computes a Fruchterman-Reingold force-directed layout with vectorized NumPy operations.
+    Parameters:
+        source: source node index of each link
+        target: target node index of each link
+        node_count: number of nodes
+        iterations: maximum number of iterations
+        time_budget: maximum number of seconds to spend, the layout found so far is returned once it is exceeded
+        initial_positions: (node_count, 2) array of starting positions, random if omitted
+        start_temperature: maximum distance a node can move in the first iteration. Defaults to a tenth of the
+            initial layout's side; use a lower value to refine an existing layout rather than reshape it
+        grid_size: cells per side of the grid used to approximate repulsion on large graphs
+        seed: seed of the random starting positions
+        progress: called after every iteration with the fraction of the iterations done; it may raise to stop the
+            layout, e.g. `JobCancelled` in a `GraphJobPool` job
+    Returns:
+        a (node_count, 2) float array of positions, with an ideal link length of 1
+    """
+    if node_count == 0:
+        return np.empty((0, 2))
+    source = np.asarray(source, dtype=np.int64)
+    target = np.asarray(target, dtype=np.int64)
+    not_loop = source != target
+    source, target = source[not_loop], target[not_loop]
+
+    side = np.sqrt(node_count)
+    if initial_positions is None:
+        positions = np.random.default_rng(seed).random((node_count, 2)) * side
+    else:
+        positions = np.array(initial_positions, dtype=np.float64)
+    repulsion = (
+        _exact_repulsion
+        if node_count <= _EXACT_REPULSION_MAX_NODES
+        else lambda p: _grid_repulsion(p, grid_size)
+    )
+
+    if start_temperature is None:
+        start_temperature = side / 10
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+    for iteration in range(iterations):
+        temperature = start_temperature * (1 - iteration / iterations)
+        displacement = repulsion(positions) + _attraction(positions, source, target)
+        length = np.sqrt(np.einsum("ij,ij->i", displacement, displacement))
+        positions += displacement * (
+            np.minimum(length, temperature) / np.maximum(length, _EPSILON)
+        )[:, None]
+        if progress is not None:
+            progress((iteration + 1) / iterations)
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+    return positions
+
+
+def seed_positions(
+    positions: np.ndarray, source: Any, target: Any, seed: int = 0
+) -> np.ndarray:
+    """
+    Gives a starting position to the nodes that don't have one yet.
+    Parameters:
+        positions: (node_count, 2) array, with NaN rows for nodes that need a position
+        source: source node index of each link
+        target: target node index of each link
+        seed: seed of the random jitter
+    Returns:
+        a copy of `positions` where each missing node is placed next to the mean of its placed neighbours, or at a
+        random spot within the placed nodes' bounds if it has none
+    """
+    positions = np.array(positions, dtype=np.float64)
+    missing = np.isnan(positions).any(axis=1)
+    if not missing.any():
+        return positions
+    rng = np.random.default_rng(seed)
+    node_count = len(positions)
+
+    source = np.asarray(source, dtype=np.int64)
+    target = np.asarray(target, dtype=np.int64)
+    ends = np.concatenate([source, target])
+    neighbours = np.concatenate([target, source])
+    useful = missing[ends] & ~missing[neighbours]
+    ends, neighbours = ends[useful], neighbours[useful]
+    counts = np.bincount(ends, minlength=node_count)
+    seeded = missing & (counts > 0)
+    for axis in (0, 1):
+        sums = np.bincount(ends, weights=positions[neighbours, axis], minlength=node_count)
+        positions[seeded, axis] = sums[seeded] / counts[seeded]
+    positions[seeded] += rng.normal(scale=0.5, size=(int(seeded.sum()), 2))
+
+    unplaced = missing & ~seeded
+    if unplaced.any():
+        placed = positions[~missing]
+        if len(placed):
+            lower, upper = placed.min(axis=0), placed.max(axis=0)
+        else:
+            lower, upper = np.zeros(2), np.full(2, np.sqrt(node_count))
+        positions[unplaced] = lower + rng.random((int(unplaced.sum()), 2)) * (upper - lower)
+    return positions
+
+
+def fit_to_space(positions: np.ndarray, space_size: float, margin: float = 0.1) -> np.ndarray:
+    """
+    Scales and centers positions to fill Cosmograph's simulation space, leaving `margin` of it empty on each side.
+    """
+    if len(positions) == 0:
+        return positions.astype(np.float32)
+    lower = positions.min(axis=0)
+    span = max(float((positions.max(axis=0) - lower).max()), _EPSILON)
+    extent = space_size * (1 - 2 * margin)
+    fitted = (positions - lower) / span * extent
+    fitted += (space_size - fitted.max(axis=0)) / 2
+    return fitted.astype(np.float32)
+
+
+def graph_arrays(
+    value: dict[str, Any] | ColumnarGraph,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns the node ids, the link endpoint indices and, for each of those links, its index in the value.
+    Links to unknown nodes are skipped, and links to a repeated id go to the first node with that id.
+    """
+    if isinstance(value, ColumnarGraph):
+        ids = value.ids if value.ids is not None else np.arange(value.node_count).astype(str)
+        return (
+            ids,
+            value.source.astype(np.int64),
+            value.target.astype(np.int64),
+            np.arange(value.link_count),
+        )
+
+    index = GraphIndex(value)
+    links = np.flatnonzero(index.keep_links)
+    return index.ids, index.source[links], index.target[links], links
+
+
+def compute_layout(
+    value: dict[str, Any] | ColumnarGraph,
+    *,
+    space_size: float = 4096,
+    cache: LayoutCache | None = None,
+    pool: GraphJobPool | None = None,
+    **kwargs: Any,
+) -> dict[str, Any] | ColumnarGraph:
+    """
+    Lays out a graph value on the server, so it can be displayed with `disable_simulation=True`.
+    Parameters:
+        value: a dictionary with 'nodes' and 'links' lists, or a ColumnarGraph
+        space_size: the `space_size` of the NetworkGraph displaying the value
+        cache: a LayoutCache to reuse the positions of graphs laid out before
+        pool: a GraphJobPool to run the layout in, so it doesn't hold the calling thread's GIL and is cancelled when
+            the same session starts another job
+        kwargs: passed to `force_layout`, or to `GraphJobPool.run` with a pool
+    Returns:
+        a copy of `value` with the 'x' and 'y' of every node set
+    """
+    ids, source, target, _ = graph_arrays(value)
+    layout = force_layout if pool is None else functools.partial(pool.run, force_layout)
+    if cache is None:
+        positions = layout(source, target, len(ids), **kwargs)
+    else:
+        positions = cache.layout(ids, source, target, layout=layout, **kwargs)
+    positions = fit_to_space(positions, space_size)
+
+    if isinstance(value, ColumnarGraph):
+        return value.with_columns(x=positions[:, 0], y=positions[:, 1])
+    return {
+        **value,
+        "nodes": [
+            {**node, "x": x, "y": y}
+            for node, (x, y) in zip(value.get("nodes") or [], positions.tolist())
+        ],
+    }
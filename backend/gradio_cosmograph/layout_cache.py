@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from .layout import force_layout, seed_positions
+
+
+def topology_key(ids: np.ndarray, source: np.ndarray, target: np.ndarray) -> str:
+    """
+    Hashes the node id set and the link set of a graph, independently of the order nodes and links are listed in.
+    Parameters:
+        ids: node ids as strings
+        source: source node index of each link
+        target: target node index of each link
+    Returns:
+        a hex digest identifying the graph's topology
+    """
+    hasher = hashlib.blake2b(digest_size=20)
+    hasher.update("\x00".join(np.sort(ids).tolist()).encode())
+    hasher.update(b"\x01")
+    edges = np.char.add(np.char.add(ids[source], "\x1f"), ids[target])
+    hasher.update("\x00".join(np.sort(edges).tolist()).encode())
+    return hasher.hexdigest()
+
+
+def _align(cached_ids: np.ndarray, cached_positions: np.ndarray, ids: np.ndarray) -> np.ndarray:
+    """Looks up the cached position of each of `ids`, NaN where a node isn't cached."""
+    positions = np.full((len(ids), 2), np.nan)
+    if len(cached_ids) == 0:
+        return positions
+    found = np.minimum(np.searchsorted(cached_ids, ids), len(cached_ids) - 1)
+    hit = cached_ids[found] == ids
+    positions[hit] = cached_positions[found[hit]]
+    return positions
+
+
+# Layout arguments that only change how long it may take, not the layout it converges to
+_UNKEYED_ARGUMENTS = ("time_budget", "progress")
+
+
+class LayoutCache:
+    """
+    An LRU cache of node positions keyed by graph topology and layout arguments, with an in-memory tier and an
+    optional on-disk tier of .npz files. Graphs seen before get their positions back without any layout work; graphs
+    that mostly overlap a cached one start from its positions and only need a short refinement. Layouts cut short by
+    their time budget are only kept as such starting points, so a later run can finish them.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 32,
+        directory: str | Path | None = None,
+        max_disk_entries: int = 512,
+        min_overlap: float = 0.5,
+        refine_fraction: float = 0.2,
+    ):
+        """
+        Parameters:
+            max_entries: number of layouts kept in memory.
+            directory: where layouts are persisted, or None to keep them in memory only.
+            max_disk_entries: number of layout files kept in `directory`, least recently used ones are deleted.
+            min_overlap: fraction of a graph's nodes that must be in a cached layout for it to be used as a warm start.
+            refine_fraction: fraction of the layout iterations spent refining a warm start.
+        """
+        self.max_entries = max_entries
+        self.directory = None if directory is None else Path(directory)
+        self.max_disk_entries = max_disk_entries
+        self.min_overlap = min_overlap
+        self.refine_fraction = refine_fraction
+        # key -> (sorted node ids, positions in the same order)
+        self._entries: OrderedDict[str, tuple[np.ndarray, np.ndarray]] = OrderedDict()
+        self._lock = threading.Lock()
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        assert self.directory is not None
+        return self.directory / f"{key}.npz"
+
+    def get(self, key: str) -> tuple[np.ndarray, np.ndarray] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            with np.load(path) as stored:
+                entry = (stored["ids"], stored["positions"])
+            os.utime(path)
+        except (FileNotFoundError, OSError, ValueError, KeyError):
+            return None
+        self._remember(key, entry)
+        return entry
+
+    def put(self, key: str, ids: np.ndarray, positions: np.ndarray) -> None:
+        order = np.argsort(ids)
+        entry = (ids[order], np.asarray(positions, dtype=np.float32)[order])
+        self._remember(key, entry)
+        if self.directory is not None:
+            self._persist(key, entry)
+
+    def _remember(self, key: str, entry: tuple[np.ndarray, np.ndarray]) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _persist(self, key: str, entry: tuple[np.ndarray, np.ndarray]) -> None:
+        assert self.directory is not None
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".npz.tmp")
+        with os.fdopen(descriptor, "wb") as file:
+            np.savez(file, ids=entry[0], positions=entry[1])
+        os.replace(temporary, self._path(key))
+
+        stored = self._files()
+        for path in stored[: max(0, len(stored) - self.max_disk_entries)]:
+            path.unlink(missing_ok=True)
+
+    def _files(self) -> list[Path]:
+        """The layout files, least recently used first."""
+        assert self.directory is not None
+        # Other threads or processes sharing the directory may remove files while they are listed
+        stored = []
+        for path in self.directory.glob("*.npz"):
+            try:
+                stored.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue
+        return [path for _, path in sorted(stored)]
+
+    def _stored(self, skip: set[str]) -> Iterator[tuple[str, np.ndarray]]:
+        """Yields the key and node ids of the layout files not in `skip`, most recently used first."""
+        for path in reversed(self._files()):
+            if path.stem in skip:
+                continue
+            try:
+                with np.load(path) as layout:
+                    cached_ids = layout["ids"]
+            except (FileNotFoundError, OSError, ValueError, KeyError):
+                continue
+            yield path.stem, cached_ids
+
+    def closest(self, ids: np.ndarray) -> np.ndarray | None:
+        """
+        Returns:
+            the positions of `ids` in the cached layout, in memory or on disk, sharing the most nodes with them (NaN
+            for nodes it doesn't have), or None if no layout shares at least `min_overlap` of them
+        """
+        if not len(ids):
+            return None
+        with self._lock:
+            entries = list(self._entries.items())
+        best, best_overlap = None, self.min_overlap
+        for key, (cached_ids, _) in entries:
+            overlap = np.isin(ids, cached_ids).mean()
+            if overlap >= best_overlap:
+                best, best_overlap = key, overlap
+        if self.directory is not None:
+            # Only the ids of the files are read, the positions of the best one are then loaded with `get`
+            for key, cached_ids in self._stored({key for key, _ in entries}):
+                overlap = np.isin(ids, cached_ids).mean()
+                if overlap > best_overlap or (best is None and overlap >= best_overlap):
+                    best, best_overlap = key, overlap
+        entry = None if best is None else self.get(best)
+        return None if entry is None else _align(*entry, ids)
+
+    @staticmethod
+    def key(topology: str, converged: bool = True, **kwargs: Any) -> str:
+        """
+        Parameters:
+            topology: the `topology_key` of the graph
+            converged: False for layouts cut short by their time budget
+            kwargs: the arguments of the layout, those that don't change its result are ignored
+        Returns:
+            the key of a layout in the cache
+        """
+        arguments = sorted((name, value) for name, value in kwargs.items() if name not in _UNKEYED_ARGUMENTS)
+        digest = hashlib.blake2b(repr(arguments).encode(), digest_size=8).hexdigest()
+        return f"{topology}-{digest}" if converged else f"{topology}-{digest}-partial"
+
+    def layout(
+        self,
+        ids: np.ndarray,
+        source: np.ndarray,
+        target: np.ndarray,
+        *,
+        iterations: int = 300,
+        layout: Callable[..., np.ndarray] = force_layout,
+        **kwargs: Any,
+    ) -> np.ndarray:
+        """
+        Same as `force_layout`, but served from the cache when possible. Layouts cut short by `time_budget` aren't
+        served again, only used as a warm start.
+        Parameters:
+            ids: node ids as strings
+            source: source node index of each link
+            target: target node index of each link
+            iterations: iterations of a layout from scratch; a warm start uses `refine_fraction` of them
+            layout: computes the layouts not cached, `force_layout` or a function with the same signature
+            kwargs: passed to `layout`
+        Returns:
+            a (node_count, 2) array of positions
+        """
+        topology = topology_key(ids, source, target)
+        entry = self.get(self.key(topology, iterations=iterations, **kwargs))
+        if entry is not None:
+            return _align(*entry, ids)
+
+        initial = self.closest(ids)
+        started = time.perf_counter()
+        if initial is None:
+            positions = layout(source, target, len(ids), iterations=iterations, **kwargs)
+        else:
+            positions = layout(
+                source,
+                target,
+                len(ids),
+                iterations=max(1, int(iterations * self.refine_fraction)),
+                initial_positions=seed_positions(initial, source, target),
+                start_temperature=1.0,
+                **kwargs,
+            )
+        # The layout returns what it has once its time budget is spent, possibly later than that when it waited for
+        # a worker, in which case a finished layout is only kept as a warm start as well
+        time_budget = kwargs.get("time_budget")
+        converged = time_budget is None or time.perf_counter() - started <= time_budget
+        self.put(self.key(topology, converged, iterations=iterations, **kwargs), ids, positions)
+        return positions
+
+
+DEFAULT_LAYOUT_CACHE = LayoutCache()
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import logging
+import math
+import re
+import threading
+import time
+from collections.abc import Callable, Sequence
+from typing import Any
+
+import orjson
+
+# A sink receives every metrics record, a dictionary with the 'stage' it measures ("preprocess", "postprocess" or
+# "render" for the frontend), the 'component' it comes from, a 'timestamp' and numeric fields such as 'seconds'.
+MetricsSink = Callable[[dict[str, Any]], None]
+
+# The fields the frontend reports for a rendered value, as in its `RenderMetrics`
+RENDER_FIELDS = frozenset(
+    ("nodes", "links", "decode_seconds", "set_data_seconds", "first_frame_seconds", "simulation_fps", "settle_seconds")
+)
+
+logger = logging.getLogger(__name__)
+
+
+def render_fields(data: Any) -> dict[str, float]:
+    """The render metrics fields of `data`, as sent by a client: unknown fields and non finite values are dropped."""
+    if not isinstance(data, dict):
+        return {}
+    return {
+        field: value
+        for field, value in data.items()
+        if field in RENDER_FIELDS
+        and isinstance(value, (int, float))
+        and not isinstance(value, bool)
+        and math.isfinite(value)
+    }
+
+
+def emit(sinks: Sequence[MetricsSink], record: dict[str, Any]) -> None:
+    """Hands `record` to every sink. A failing sink is logged rather than failing the event."""
+    record = {"timestamp": time.time(), **record}
+    for sink in sinks:
+        try:
+            sink(record)
+        except Exception:
+            logger.exception("Metrics sink %r failed", sink)
+
+
+class LogSink:
+    """Logs each record as a JSON line."""
+
+    def __init__(self, logger: logging.Logger | None = None, level: int = logging.INFO):
+        """
+        Parameters:
+            logger: where records are logged, defaults to this module's logger.
+            level: level records are logged at.
+        """
+        self.logger = logger or logging.getLogger(__name__)
+        self.level = level
+
+    def __call__(self, record: dict[str, Any]) -> None:
+        self.logger.log(self.level, "graph metrics %s", orjson.dumps(record).decode())
+
+
+class PrometheusSink:
+    """
+    Aggregates the numeric fields of the records it receives into summaries, per stage and component, and exports them
+    in the Prometheus text format, e.g. from a `/metrics` route.
+    """
+
+    def __init__(self, prefix: str = "cosmograph"):
+        """
+        Parameters:
+            prefix: prefix of the exported metric names.
+        """
+        self.prefix = prefix
+        # metric name -> component -> [sum, count]
+        self._summaries: dict[str, dict[str, list[float]]] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, record: dict[str, Any]) -> None:
+        stage = record.get("stage", "unknown")
+        component = str(record.get("component", ""))
+        with self._lock:
+            for field, value in record.items():
+                if field == "timestamp" or isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                if not math.isfinite(value):
+                    continue
+                # Stages and fields may come from clients, metric names are restricted to what Prometheus accepts
+                name = re.sub(r"[^a-zA-Z0-9_]", "_", f"{self.prefix}_{stage}_{field}")
+                summary = self._summaries.setdefault(name, {})
+                totals = summary.setdefault(component, [0.0, 0])
+                totals[0] += value
+                totals[1] += 1
+
+    def export(self) -> str:
+        """
+        Returns:
+            the sum and count of every metric, in the Prometheus text exposition format
+        """
+        lines = []
+        with self._lock:
+            for name, summary in sorted(self._summaries.items()):
+                lines.append(f"# TYPE {name} summary")
+                for component, (total, count) in sorted(summary.items()):
+                    label = component.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+                    lines.append(f'{name}_sum{{component="{label}"}} {total:g}')
+                    lines.append(f'{name}_count{{component="{label}"}} {count}')
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import concurrent.futures
+import threading
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+
+class PendingStore:
+    """
+    Prepares payloads in worker threads rather than on the event loop that runs `postprocess`, keeping their futures
+    by token until the frontend fetches them. Payloads still being prepared are always kept, and the `max_entries`
+    most recent ready ones.
+    """
+
+    def __init__(self, max_entries: int = 64, max_workers: int | None = None):
+        self.max_entries = max_entries
+        self.max_workers = max_workers
+        self._executor: concurrent.futures.ThreadPoolExecutor | None = None
+        self._entries: OrderedDict[str, concurrent.futures.Future] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, prepare: Callable[[], Any]) -> str:
+        """
+        Returns:
+            the token the result of `prepare` is fetched with
+        """
+        token = uuid.uuid4().hex
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    self.max_workers, thread_name_prefix="gradio_cosmograph"
+                )
+            self._entries[token] = self._executor.submit(prepare)
+            ready = [key for key, future in self._entries.items() if future.done()]
+            for key in ready[: len(ready) - self.max_entries]:
+                del self._entries[key]
+        return token
+
+    def get(self, token: str) -> concurrent.futures.Future | None:
+        with self._lock:
+            return self._entries.get(token)
+
+
+PENDING_STORE = PendingStore()
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from collections.abc import Hashable, Iterable
+from typing import Any
+
+from .delta import link_keys
+from .held import HeldStore
+
+# Fields Cosmograph itself reads, always sent to the frontend
+_NODE_DISPLAY_FIELDS = ("id", "x", "y", "size", "color", "expandable", "count")
+_LINK_DISPLAY_FIELDS = ("source", "target", "color", "width", "weight")
+
+
+def project(
+    value: dict[str, Any], node_fields: Iterable[str], link_fields: Iterable[str]
+) -> tuple[dict[str, Any], dict[str, dict[str, Any]], dict[str, dict[str, Any]]]:
+    """
+    Splits a graph value into what the canvas needs and everything else.
+    Parameters:
+        value: a dictionary with 'nodes' and 'links' lists
+        node_fields: node fields sent on top of the ones Cosmograph reads, e.g. the label key
+        link_fields: link fields sent on top of the ones Cosmograph reads
+    Returns:
+        the projected value, then the other fields of each node by node id and of each link by link key, for the
+        nodes and links that have any
+    """
+    keep_nodes = {*_NODE_DISPLAY_FIELDS, *node_fields}
+    keep_links = {*_LINK_DISPLAY_FIELDS, *link_fields}
+    nodes = value.get("nodes") or []
+    links = value.get("links") or []
+    nodes, node_details = _split(nodes, keep_nodes, [str(node["id"]) for node in nodes])
+    links, link_details = _split(links, keep_links, link_keys(links))
+    return {**value, "nodes": nodes, "links": links}, node_details, link_details
+
+
+def _split(
+    items: list[dict[str, Any]], keep: set[str], keys: Iterable[str]
+) -> tuple[list[dict[str, Any]], dict[str, dict[str, Any]]]:
+    projected = []
+    details = {}
+    for item, key in zip(items, keys):
+        if keep.issuperset(item):
+            projected.append(item)
+            continue
+        projected.append({field: item[field] for field in item if field in keep})
+        details[key] = {field: item[field] for field in item if field not in keep}
+    return projected, details
+
+
+def is_projected(value: dict[str, Any], node_fields: Iterable[str], link_fields: Iterable[str]) -> bool:
+    """Whether the nodes and links of `value` only have the fields `project` keeps."""
+    keep_nodes = {*_NODE_DISPLAY_FIELDS, *node_fields}
+    keep_links = {*_LINK_DISPLAY_FIELDS, *link_fields}
+    return all(keep_nodes.issuperset(node) for node in value.get("nodes") or []) and all(
+        keep_links.issuperset(link) for link in value.get("links") or []
+    )
+
+
+def restore(
+    value: dict[str, Any], node_details: dict[str, dict[str, Any]], link_details: dict[str, dict[str, Any]]
+) -> dict[str, Any]:
+    """Inverse of `project`: adds the stored fields back to the nodes and links of a value sent by the frontend."""
+    links = value.get("links") or []
+    return {
+        **value,
+        "nodes": [{**node, **node_details.get(str(node["id"]), {})} for node in value.get("nodes") or []],
+        "links": [{**link, **link_details.get(key, {})} for link, key in zip(links, link_keys(links))],
+    }
+
+
+class DetailStore(HeldStore[tuple[dict, dict]]):
+    """
+    Keeps the fields left out of projected values, by component and version, so they can be fetched one node at a
+    time and added back when the value comes back from the frontend.
+    """
+
+    def node(self, key: Hashable, node_id: str, client: Hashable | None = None) -> dict[str, Any] | None:
+        """
+        Returns:
+            the stored fields of a node of the value stored as `key`, or None if that value is no longer stored
+        """
+        entry = self.get(key, client)
+        return None if entry is None else entry[0].get(str(node_id), {})
+
+
+DETAIL_STORE = DetailStore(max_recent=32)
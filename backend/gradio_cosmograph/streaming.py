@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from typing import Any
+
+from gradio.context import LocalContext
+
+
+class GraphBatch:
+    """
+    Nodes and links to add to the graph already displayed. Yielded from a generator function, each batch is drawn as
+    soon as it arrives, without resetting the nodes drawn so far. Batches are added to the graph of the session whose
+    event built them, as only the event handler's thread knows it.
+    """
+
+    def __init__(
+        self,
+        nodes: list[dict[str, Any]] | None = None,
+        links: list[dict[str, Any]] | None = None,
+        *,
+        reset: bool = False,
+    ):
+        """
+        Parameters:
+            nodes: nodes to add, as dictionaries with at least an 'id'.
+            links: links to add, as dictionaries with 'source' and 'target'. Their nodes must be in this batch or an
+                earlier one.
+            reset: whether this batch starts a new graph, replacing the one displayed. Set it on the first batch.
+        """
+        self.nodes = nodes or []
+        self.links = links or []
+        self.reset = reset
+        request = LocalContext.request.get(None)
+        self.session: str | None = getattr(request, "session_hash", None)
+
+    def to_value(self) -> dict[str, Any]:
+        return {"nodes": self.nodes, "links": self.links}
+
+
+def stream_graph(
+    value: dict[str, Any], first_batch: int = 2000, batch_size: int = 20000
+) -> Iterator[GraphBatch]:
+    """
+    Splits a graph value into batches to yield from a generator function, so the first nodes are drawn while the
+    rest is still being sent.
+    Parameters:
+        value: a dictionary with 'nodes' and 'links' lists
+        first_batch: number of nodes in the first batch, kept small so it is drawn quickly
+        batch_size: number of nodes in each following batch
+    Returns:
+        batches holding the nodes in their original order, each with the links whose nodes are both in it or in
+        an earlier batch
+    """
+    nodes = value.get("nodes") or []
+    links = value.get("links") or []
+    starts = [0, *range(min(first_batch, len(nodes)), len(nodes), batch_size)]
+    batch_of = {}
+    for batch, start in enumerate(starts):
+        end = starts[batch + 1] if batch + 1 < len(starts) else len(nodes)
+        for node in nodes[start:end]:
+            batch_of[str(node["id"])] = batch
+
+    batch_links: list[list[dict[str, Any]]] = [[] for _ in starts]
+    last = len(starts) - 1
+    for link in links:
+        batch = max(
+            batch_of.get(str(link["source"]), last),
+            batch_of.get(str(link["target"]), last),
+        )
+        batch_links[batch].append(link)
+
+    for batch, start in enumerate(starts):
+        end = starts[batch + 1] if batch + 1 < len(starts) else len(nodes)
+        yield GraphBatch(nodes[start:end], batch_links[batch], reset=batch == 0)
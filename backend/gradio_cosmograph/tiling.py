@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+from .columnar import ColumnarGraph
+from .held import HeldStore
+from .layout import graph_arrays
+
+# A view spans about this many tiles across, so its payload stays about the same at every zoom level
+_TILES_PER_VIEW = 4
+_MAX_LEVEL = 24
+
+
+def _spread_bits(values: np.ndarray) -> np.ndarray:
+    """Interleaves zeros between the bits of 32 bit integers, to build Morton codes."""
+    values = values.astype(np.uint64) & np.uint64(0xFFFFFFFF)
+    for shift, mask in ((16, 0x0000FFFF0000FFFF), (8, 0x00FF00FF00FF00FF), (4, 0x0F0F0F0F0F0F0F0F)):
+        values = (values | (values << np.uint64(shift))) & np.uint64(mask)
+    for shift, mask in ((2, 0x3333333333333333), (1, 0x5555555555555555)):
+        values = (values | (values << np.uint64(shift))) & np.uint64(mask)
+    return values
+
+
+def _concatenate_ranges(starts: np.ndarray, stops: np.ndarray) -> np.ndarray:
+    """All the integers of the ranges [start, stop), in order."""
+    lengths = np.maximum(stops - starts, 0)
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return offsets + np.arange(total)
+
+
+class SpatialIndex:
+    """
+    A quadtree over the node positions of a graph value, answering which nodes and links to draw in a viewport the way
+    map tiles do. Each tile of each level shows its most important nodes, and the nodes shown by the tiles above it,
+    so zooming in only ever adds nodes. The tree is stored as the nodes sorted by the level from which they are shown,
+    then by Morton code, which makes every tile a contiguous range of that order.
+    """
+
+    def __init__(
+        self,
+        value: dict[str, Any] | ColumnarGraph,
+        importance: np.ndarray | None = None,
+        nodes_per_tile: int = 256,
+    ):
+        """
+        Parameters:
+            value: a dictionary with 'nodes' and 'links' lists, or a ColumnarGraph, whose nodes all have positions
+            importance: which nodes to show first when zoomed out, their degree if omitted
+            nodes_per_tile: nodes shown per tile of the level being displayed, on top of those of the levels above
+        """
+        self.value = value
+        if isinstance(value, ColumnarGraph):
+            if value.x is None or value.y is None:
+                raise ValueError("Tiled graphs need node positions, set `precompute_layout=True` or 'x' and 'y'.")
+            x, y = np.asarray(value.x, dtype=np.float64), np.asarray(value.y, dtype=np.float64)
+        else:
+            nodes = value.get("nodes") or []
+            try:
+                x = np.array([node["x"] for node in nodes], dtype=np.float64)
+                y = np.array([node["y"] for node in nodes], dtype=np.float64)
+            except KeyError as error:
+                raise ValueError(
+                    "Tiled graphs need node positions, set `precompute_layout=True` or 'x' and 'y'."
+                ) from error
+        _, source, target, link_indices = graph_arrays(value)
+        node_count = len(x)
+        self.node_count = node_count
+        if importance is None:
+            importance = np.bincount(source, minlength=node_count) + np.bincount(target, minlength=node_count)
+
+        self.bounds = (
+            (float(x.min()), float(y.min()), float(x.max()), float(y.max())) if node_count else (0.0, 0.0, 1.0, 1.0)
+        )
+        self.extent = max(self.bounds[2] - self.bounds[0], self.bounds[3] - self.bounds[1], 1e-9)
+        # Deep enough for the deepest tiles to hold about nodes_per_tile nodes
+        self.levels = int(np.clip(np.ceil(np.log(max(node_count / nodes_per_tile, 1)) / np.log(4)) + 2, 1, _MAX_LEVEL))
+        cells = 1 << self.levels
+        column = np.clip(((x - self.bounds[0]) / self.extent * cells).astype(np.int64), 0, cells - 1)
+        row = np.clip(((y - self.bounds[1]) / self.extent * cells).astype(np.int64), 0, cells - 1)
+        morton = (_spread_bits(column) | (_spread_bits(row) << np.uint64(1))).astype(np.int64)
+
+        # The level from which each node is shown: the first one where it ranks among its tile's most important
+        by_importance = np.argsort(-np.asarray(importance, dtype=np.float64), kind="stable")
+        first_level = np.full(node_count, self.levels, dtype=np.int64)
+        for level in range(self.levels - 1, -1, -1):
+            tiles = morton[by_importance] >> (2 * (self.levels - level))
+            order = np.argsort(tiles, kind="stable")
+            grouped = tiles[order]
+            starts = np.flatnonzero(np.r_[True, grouped[1:] != grouped[:-1]])
+            rank = np.arange(node_count) - np.repeat(starts, np.diff(np.r_[starts, node_count]))
+            shown = by_importance[order[rank < nodes_per_tile]]
+            first_level[shown] = level
+
+        keys = (first_level << (2 * self.levels)) | morton
+        self._order = np.argsort(keys, kind="stable")
+        self._keys = keys[self._order]
+
+        # Links by source, to find the links between the nodes of a view without scanning them all
+        by_source = np.argsort(source, kind="stable")
+        self._link_order = link_indices[by_source]
+        self._link_targets = target[by_source]
+        self._link_starts = np.r_[0, np.cumsum(np.bincount(source, minlength=node_count))]
+
+    def tile_range(self, viewport: tuple[float, float, float, float]) -> tuple[int, int, int, int, int]:
+        """
+        Returns:
+            the level whose tiles are about a `_TILES_PER_VIEW`th of the width of `viewport`, then the column and row of
+            the first and last of its tiles overlapping `viewport`
+        """
+        width = max(viewport[2] - viewport[0], viewport[3] - viewport[1], 1e-9)
+        level = int(np.clip(np.round(np.log2(self.extent * _TILES_PER_VIEW / width)), 0, self.levels))
+        cells = 1 << level
+        first_column, first_row, last_column, last_row = (
+            int(np.clip((bound - self.bounds[axis % 2]) / self.extent * cells, 0, cells - 1))
+            for axis, bound in enumerate(viewport)
+        )
+        return level, first_column, first_row, last_column, last_row
+
+    def query(self, viewport: tuple[float, float, float, float]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Parameters:
+            viewport: the area displayed, as (min x, min y, max x, max y) in the coordinates of the node positions
+        Returns:
+            the sorted indices of the nodes of the tiles overlapping `viewport` shown at its zoom level, and the
+            indices of the links between them
+        """
+        level, first_column, first_row, last_column, last_row = self.tile_range(viewport)
+        columns, rows = np.meshgrid(
+            np.arange(first_column, last_column + 1, dtype=np.int64),
+            np.arange(first_row, last_row + 1, dtype=np.int64),
+        )
+        tiles = (_spread_bits(columns.ravel()) | (_spread_bits(rows.ravel()) << np.uint64(1))).astype(np.int64)
+        shift = 2 * (self.levels - level)
+        # Every (level shown from, tile) pair is a contiguous range of the sorted keys
+        shown_from = np.arange(level + 1, dtype=np.int64)[:, None] << (2 * self.levels)
+        lows = (shown_from | (tiles << shift)[None, :]).ravel()
+        highs = (shown_from | ((tiles + 1) << shift)[None, :]).ravel()
+        positions = _concatenate_ranges(
+            np.searchsorted(self._keys, lows, side="left"), np.searchsorted(self._keys, highs, side="left")
+        )
+        nodes = np.sort(self._order[positions])
+
+        kept = np.zeros(self.node_count, dtype=bool)
+        kept[nodes] = True
+        candidates = _concatenate_ranges(self._link_starts[nodes], self._link_starts[nodes + 1])
+        links = np.sort(self._link_order[candidates[kept[self._link_targets[candidates]]]])
+        return nodes, links
+
+    def view(self, viewport: tuple[float, float, float, float]) -> dict[str, Any] | ColumnarGraph:
+        """
+        Returns:
+            the nodes and links to draw in `viewport`, in the same form as the indexed value
+        """
+        nodes, links = self.query(viewport)
+        if isinstance(self.value, ColumnarGraph):
+            return self.value.take(nodes, links)
+        all_nodes = self.value.get("nodes") or []
+        all_links = self.value.get("links") or []
+        return {
+            "nodes": [all_nodes[i] for i in nodes.tolist()],
+            "links": [all_links[i] for i in links.tolist()],
+        }
+
+
+class TileStore(HeldStore[SpatialIndex]):
+    """Keeps the spatial index of the tiled values pages display, by component and version."""
+
+
+TILE_STORE = TileStore(max_recent=8)
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import warnings
+import weakref
+from itertools import repeat
+from typing import Any, Literal
+
+import numpy as np
+
+from .columnar import ColumnarGraph
+
+
+def _coerce_ids(values: list[Any]) -> tuple[list[Any], int]:
+    """Turns ids that aren't strings into strings, keeping missing ones as None."""
+    if set(map(type, values)) <= {str}:
+        return values, 0
+    coerced = [value if type(value) is str or value is None else str(value) for value in values]
+    return coerced, sum(1 for value in values if type(value) is not str and value is not None)
+
+
+def _id_array(values: list[str | None]) -> tuple[np.ndarray, np.ndarray]:
+    """Returns ids as a NumPy string array, with "" for the missing ones, and where they are missing."""
+    missing = np.zeros(len(values), dtype=bool)
+    if None in values:
+        missing = np.fromiter((value is None for value in values), dtype=bool, count=len(values))
+        values = ["" if value is None else value for value in values]
+    # fromiter with the final width is about twice as fast as letting np.array find it
+    dtype = f"<U{max(map(len, values), default=1) or 1}"
+    return np.fromiter(values, dtype=dtype, count=len(values)), missing
+
+
+def _hash_ids(ids: np.ndarray) -> np.ndarray:
+    """64-bit polynomial hashes of a NumPy string array, computed one character position at a time."""
+    hashes = np.zeros(len(ids), dtype=np.uint64)
+    for column in ids.view(np.uint32).reshape(len(ids), ids.itemsize // 4).T:
+        hashes = hashes * np.uint64(1_000_003) + column
+    return hashes
+
+
+class GraphIndex:
+    """
+    Checks a graph value and maps the endpoints of its links to node indices. Ids are compared as NumPy arrays: the
+    distinct node ids are sorted once and each endpoint is looked up with a binary search. `source` and
+    `target` hold the index of each link's endpoints among all nodes, -1 for unknown ones, and `keep_nodes` and
+    `keep_links` which nodes and links a valid value keeps.
+    """
+
+    def __init__(self, value: dict[str, Any]):
+        """
+        Parameters:
+            value: a dictionary with 'nodes' and 'links' lists
+        """
+        self.value = value
+        nodes = value.get("nodes") or []
+        links = value.get("links") or []
+        ids, coerced_nodes = _coerce_ids([node.get("id") for node in nodes])
+        sources, coerced_sources = _coerce_ids([link.get("source") for link in links])
+        targets, coerced_targets = _coerce_ids([link.get("target") for link in links])
+        self.coerced = coerced_nodes + coerced_sources + coerced_targets
+        self._ids, self._sources, self._targets = ids, sources, targets
+
+        self.ids, self._missing = _id_array(ids)
+        present = np.flatnonzero(~self._missing)
+        present_ids = self.ids[present]
+        # Ids are sorted and looked up by a hash, faster to compare than strings. np.unique sorts stably, so the first
+        # occurrence of a duplicated id is the one kept
+        unique, first, inverse = np.unique(_hash_ids(present_ids), return_index=True, return_inverse=True)
+        hashed = not (present_ids[first][inverse.reshape(-1)] != present_ids).any()
+        if not hashed:
+            # Two distinct ids share a hash, look up the ids themselves
+            unique, first = np.unique(present_ids, return_index=True)
+        first = present[first]
+        self.keep_nodes = np.zeros(len(ids), dtype=bool)
+        self.keep_nodes[first] = True
+        self.source = self._lookup(unique, first, hashed, *_id_array(sources))
+        self.target = self._lookup(unique, first, hashed, *_id_array(targets))
+        self.keep_links = (self.source >= 0) & (self.target >= 0)
+
+        self.missing_ids = len(ids) - len(present)
+        self.duplicate_ids = len(present) - len(unique)
+        self.dangling_links = len(links) - int(self.keep_links.sum())
+
+    def _lookup(
+        self, unique: np.ndarray, first: np.ndarray, hashed: bool, endpoints: np.ndarray, missing: np.ndarray
+    ) -> np.ndarray:
+        """Index of the node each endpoint refers to, or -1 for unknown ones."""
+        if not len(unique):
+            return np.full(len(endpoints), -1, dtype=np.int64)
+        # Endpoints longer than every id are cut to compute their key, they are then told apart by the comparison
+        keys = endpoints.astype(self.ids.dtype)
+        if hashed:
+            # Looking up sorted keys walks the same part of `unique` in a row
+            keys = _hash_ids(keys)
+            order = np.argsort(keys)
+            positions = np.empty(len(keys), dtype=np.int64)
+            positions[order] = np.searchsorted(unique, keys[order])
+        else:
+            positions = np.searchsorted(unique, keys)
+        positions = np.minimum(positions, len(unique) - 1)
+        found = (self.ids[first[positions]] == endpoints) & ~missing
+        return np.where(found, first[positions], -1)
+
+    @property
+    def valid(self) -> bool:
+        return not (self.missing_ids or self.duplicate_ids or self.dangling_links)
+
+    def problems(self) -> list[str]:
+        """Describes what is wrong with the value, empty if it is valid."""
+        problems = []
+        if self.missing_ids:
+            problems.append(f"{self.missing_ids} node(s) without an 'id'")
+        if self.duplicate_ids:
+            example = str(self.ids[~self.keep_nodes & ~self._missing][0])
+            problems.append(f"{self.duplicate_ids} duplicate node id(s), e.g. {example!r}")
+        if self.dangling_links:
+            first = int(np.argmin(self.keep_links))
+            problems.append(
+                f"{self.dangling_links} link(s) to unknown nodes, e.g. "
+                f"{self._sources[first]!r} -> {self._targets[first]!r}"
+            )
+        return problems
+
+    def normalized(self) -> dict[str, Any]:
+        """
+        Returns:
+            the value with string ids, without the nodes lacking an id or repeating an earlier one, and without the
+            links to unknown nodes. The value itself is returned when there was nothing to change.
+        """
+        if self.valid and not self.coerced:
+            return self.value
+        if self.valid:
+            keep_nodes, keep_links = repeat(True), repeat(True)
+        else:
+            keep_nodes, keep_links = self.keep_nodes.tolist(), self.keep_links.tolist()
+        nodes = [
+            node if node.get("id") is node_id else {**node, "id": node_id}
+            for node, node_id, keep in zip(self.value.get("nodes") or [], self._ids, keep_nodes)
+            if keep
+        ]
+        links = [
+            link
+            if link.get("source") is source and link.get("target") is target
+            else {**link, "source": source, "target": target}
+            for link, source, target, keep in zip(
+                self.value.get("links") or [], self._sources, self._targets, keep_links
+            )
+            if keep
+        ]
+        return {**self.value, "nodes": nodes, "links": links}
+
+
+# Graphs already found valid, e.g. cached results returned again, aren't checked twice
+_VALID_COLUMNAR: weakref.WeakSet[ColumnarGraph] = weakref.WeakSet()
+
+
+def _deduplicate_columnar(graph: ColumnarGraph, on_invalid: Literal["drop", "raise"]) -> ColumnarGraph:
+    if graph.ids is None or graph in _VALID_COLUMNAR:
+        return graph
+    _, first, inverse = np.unique(graph.ids, return_index=True, return_inverse=True)
+    if len(first) == graph.node_count:
+        _VALID_COLUMNAR.add(graph)
+        return graph
+    duplicates = graph.node_count - len(first)
+    message = f"Invalid graph value: {duplicates} duplicate node id(s)"
+    if on_invalid == "raise":
+        raise ValueError(message)
+    warnings.warn(f"{message}, dropped.", stacklevel=3)
+
+    # Links to a duplicate now point at the first node with its id
+    keep = np.zeros(graph.node_count, dtype=bool)
+    keep[first] = True
+    dense = np.cumsum(keep) - 1
+    remap = dense[first[inverse.reshape(-1)]]
+    node_columns = {
+        key: None if getattr(graph, key) is None else getattr(graph, key)[keep]
+        for key in ("ids", "x", "y", "size", "color")
+    }
+    deduplicated = graph.with_columns(
+        source=remap[graph.source].astype(np.uint32),
+        target=remap[graph.target].astype(np.uint32),
+        **node_columns,
+    )
+    deduplicated.labels = {key: column[keep] for key, column in graph.labels.items()}
+    deduplicated.node_count = int(keep.sum())
+    return deduplicated
+
+
+def validate_graph(
+    value: dict[str, Any] | ColumnarGraph, on_invalid: Literal["drop", "raise"] = "drop"
+) -> dict[str, Any] | ColumnarGraph:
+    """
+    Checks a graph value before it is sent to the frontend, where invalid values crash or silently lose links.
+    Parameters:
+        value: a dictionary with 'nodes' and 'links' lists, or a ColumnarGraph
+        on_invalid: "drop" to drop nodes without an id, nodes repeating an earlier id and links to unknown nodes with a
+            warning, or "raise" to raise a ValueError describing them
+    Returns:
+        the value with ids converted to strings and invalid items dropped, or `value` itself if it was already valid.
+        ColumnarGraphs have their links checked when they are built, so only their node ids are checked here.
+    """
+    if isinstance(value, ColumnarGraph):
+        return _deduplicate_columnar(value, on_invalid)
+    index = GraphIndex(value)
+    if not index.valid:
+        message = f"Invalid graph value: {', '.join(index.problems())}"
+        if on_invalid == "raise":
+            raise ValueError(message)
+        warnings.warn(f"{message}, dropped.", stacklevel=2)
+    return index.normalized()
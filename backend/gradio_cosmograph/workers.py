@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import concurrent.futures
+import multiprocessing
+import struct
+import threading
+import time
+from collections.abc import Callable, Hashable
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, NamedTuple
+
+import numpy as np
+from gradio.context import LocalContext
+
+# A job's control block holds two doubles, each written by one process only: whether it was cancelled, by the process
+# that submitted it, and the fraction of the job done, by the process running it
+_CONTROL = struct.Struct("dd")
+_FIELD = struct.Struct("d")
+_CANCELLED_OFFSET = 0
+_PROGRESS_OFFSET = _FIELD.size
+_POLL_INTERVAL = 0.1
+
+
+class JobCancelled(Exception):
+    """Raised in a job cancelled by `Job.cancel` or superseded by a newer job, and by `Job.result` for it."""
+
+
+class _SharedArray(NamedTuple):
+    name: str
+    shape: tuple[int, ...]
+    dtype: str
+
+
+def _share(value: Any, blocks: list[SharedMemory]) -> Any:
+    """Copies a NumPy array into a new shared memory block and returns its description, other values as they are."""
+    if not isinstance(value, np.ndarray) or value.dtype.hasobject or value.nbytes == 0:
+        return value
+    block = SharedMemory(create=True, size=value.nbytes)
+    blocks.append(block)
+    np.ndarray(value.shape, dtype=value.dtype, buffer=block.buf)[...] = value
+    return _SharedArray(block.name, value.shape, value.dtype.str)
+
+
+def _attach(value: Any, blocks: list[SharedMemory]) -> Any:
+    if not isinstance(value, _SharedArray):
+        return value
+    block = SharedMemory(name=value.name)
+    blocks.append(block)
+    array = np.ndarray(value.shape, dtype=np.dtype(value.dtype), buffer=block.buf)
+    array.flags.writeable = False
+    return array
+
+
+def _run(function: Callable[..., Any], control_name: str, args: tuple, kwargs: dict[str, Any]) -> Any:
+    """Runs a job in a worker process, on views of the shared arrays of its arguments."""
+    control = SharedMemory(name=control_name)
+    blocks: list[SharedMemory] = []
+
+    def progress(fraction: float) -> None:
+        _FIELD.pack_into(control.buf, _PROGRESS_OFFSET, fraction)
+        if _FIELD.unpack_from(control.buf, _CANCELLED_OFFSET)[0]:
+            raise JobCancelled
+
+    try:
+        progress(0.0)
+        args = tuple(_attach(value, blocks) for value in args)
+        kwargs = {key: _attach(value, blocks) for key, value in kwargs.items()}
+        result = function(*args, progress=progress, **kwargs)
+        # The result is sent back once the blocks are closed, so it can't be a view of them
+        if isinstance(result, np.ndarray) and not result.flags.owndata:
+            result = result.copy()
+        return result
+    finally:
+        del args, kwargs
+        for block in (*blocks, control):
+            try:
+                block.close()
+            except BufferError:
+                # Still viewed from the traceback of a failed job, the block is unmapped once that is collected
+                pass
+
+
+class Job:
+    """A job submitted to a `GraphJobPool`."""
+
+    def __init__(self, future: concurrent.futures.Future, control: SharedMemory, blocks: list[SharedMemory]):
+        self._future = future
+        self._control: SharedMemory | None = control
+        self._blocks = blocks
+        self._progress = 0.0
+        self._lock = threading.Lock()
+        future.add_done_callback(self._release)
+
+    def _release(self, _: concurrent.futures.Future) -> None:
+        with self._lock:
+            if self._control is None:
+                return
+            _, self._progress = _CONTROL.unpack_from(self._control.buf)
+            for block in (*self._blocks, self._control):
+                block.close()
+                block.unlink()
+            self._control = None
+            self._blocks = []
+
+    @property
+    def progress(self) -> float:
+        """The fraction of the job done, as last reported by the job."""
+        with self._lock:
+            if self._control is None:
+                return self._progress
+            return _CONTROL.unpack_from(self._control.buf)[1]
+
+    def cancel(self) -> None:
+        """Stops the job: it is dropped if it hasn't started, or raises `JobCancelled` when it next reports progress."""
+        if self._future.cancel():
+            return
+        with self._lock:
+            if self._control is not None:
+                _FIELD.pack_into(self._control.buf, _CANCELLED_OFFSET, 1.0)
+
+    def cancelled(self) -> bool:
+        with self._lock:
+            if self._control is not None:
+                return bool(_CONTROL.unpack_from(self._control.buf)[0])
+        return self._future.cancelled() or isinstance(self._future.exception(), JobCancelled)
+
+    def done(self) -> bool:
+        return self._future.done()
+
+    def result(self, timeout: float | None = None, progress: Callable[[float], Any] | None = None) -> Any:
+        """
+        Waits for the job to finish.
+        Parameters:
+            timeout: seconds to wait at most, forever if None
+            progress: called with the fraction of the job done while waiting, e.g. a `gr.Progress` to show it on the
+                event's output components
+        Returns:
+            the job function's result
+        Raises:
+            JobCancelled: if the job was cancelled
+            TimeoutError: if the job is still running after `timeout` seconds
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            while progress is not None:
+                wait = _POLL_INTERVAL if deadline is None else min(_POLL_INTERVAL, deadline - time.monotonic())
+                try:
+                    return self._future.result(max(wait, 0))
+                except concurrent.futures.TimeoutError:
+                    if deadline is not None and time.monotonic() >= deadline:
+                        raise
+                    progress(self.progress)
+            return self._future.result(timeout)
+        except concurrent.futures.CancelledError as error:
+            raise JobCancelled from error
+
+
+def _session_scope(function: Callable[..., Any]) -> Hashable | None:
+    request = LocalContext.request.get(None)
+    session = getattr(request, "session_hash", None)
+    if session is None:
+        return None
+    return (session, getattr(function, "__module__", None), getattr(function, "__qualname__", repr(function)))
+
+
+class GraphJobPool:
+    """
+    Runs layout and graph analytics jobs, such as `force_layout` or `label_propagation`, in worker processes so they
+    don't hold up the Gradio worker that submits them. NumPy array arguments are handed over through shared memory
+    rather than pickled. Jobs are grouped by scope, by default the Gradio session and the function run, and submitting
+    a job cancels the one still running in its scope, so a new query from a user supersedes their previous one.
+    """
+
+    def __init__(self, max_workers: int | None = None):
+        """
+        Parameters:
+            max_workers: number of worker processes, started on the first job, the number of CPUs if None
+        """
+        self.max_workers = max_workers
+        self._executor: concurrent.futures.ProcessPoolExecutor | None = None
+        self._scopes: dict[Hashable, Job] = {}
+        self._lock = threading.Lock()
+
+    def _start(self) -> concurrent.futures.ProcessPoolExecutor:
+        if self._executor is None:
+            # Forking a threaded server process is unsafe, workers start from a fresh interpreter instead
+            self._executor = concurrent.futures.ProcessPoolExecutor(
+                self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def submit(self, function: Callable[..., Any], *args: Any, scope: Hashable | None = None, **kwargs: Any) -> Job:
+        """
+        Parameters:
+            function: a module level function, called with `args`, `kwargs` and a `progress` callback that it must
+                call regularly with the fraction of its work done, which raises `JobCancelled` once it is cancelled
+            scope: the job cancelled by this one, if still running, is the last one submitted with the same scope.
+                Defaults to the Gradio session submitting the job and `function`, or to no scope outside of events.
+        Returns:
+            the submitted job
+        """
+        if scope is None:
+            scope = _session_scope(function)
+        blocks: list[SharedMemory] = []
+        control = SharedMemory(create=True, size=_CONTROL.size)
+        _CONTROL.pack_into(control.buf, 0, 0.0, 0.0)
+        try:
+            shared_args = tuple(_share(value, blocks) for value in args)
+            shared_kwargs = {key: _share(value, blocks) for key, value in kwargs.items()}
+            with self._lock:
+                try:
+                    future = self._start().submit(_run, function, control.name, shared_args, shared_kwargs)
+                except BrokenProcessPool:
+                    # A worker died, e.g. killed for its memory use: start a new pool
+                    self._executor = None
+                    future = self._start().submit(_run, function, control.name, shared_args, shared_kwargs)
+                job = Job(future, control, blocks)
+                superseded = self._scopes.get(scope) if scope is not None else None
+                if scope is not None:
+                    self._scopes[scope] = job
+        except BaseException:
+            for block in (*blocks, control):
+                block.close()
+                block.unlink()
+            raise
+        if superseded is not None:
+            superseded.cancel()
+        if scope is not None:
+            future.add_done_callback(lambda _: self._forget(scope, job))
+        return job
+
+    def _forget(self, scope: Hashable, job: Job) -> None:
+        with self._lock:
+            if self._scopes.get(scope) is job:
+                del self._scopes[scope]
+
+    def run(
+        self,
+        function: Callable[..., Any],
+        *args: Any,
+        scope: Hashable | None = None,
+        progress: Callable[[float], Any] | None = None,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        Submits a job and waits for its result, see `submit` and `Job.result`. A Gradio event function can let
+        `JobCancelled` propagate, or return `gr.skip()` instead, when a newer event of the same session superseded it.
+        """
+        return self.submit(function, *args, scope=scope, **kwargs).result(progress=progress)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Cancels every job and stops the worker processes. The pool starts new ones if more jobs are submitted."""
+        with self._lock:
+            jobs = list(self._scopes.values())
+            executor, self._executor = self._executor, None
+        for job in jobs:
+            job.cancel()
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,17 @@
+from types import SimpleNamespace
+
+import pytest
+from gradio.context import LocalContext
+
+
+@pytest.fixture
+def session():
+    """Enters the Gradio session with the given hash, as in an event handler."""
+    tokens = []
+
+    def enter(session_hash):
+        tokens.append(LocalContext.request.set(SimpleNamespace(session_hash=session_hash)))
+
+    yield enter
+    for token in reversed(tokens):
+        LocalContext.request.reset(token)
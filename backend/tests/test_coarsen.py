@@ -0,0 +1,84 @@
+import asyncio
+
+import numpy as np
+import pytest
+from gradio_cosmograph import NetworkGraph
+from gradio_cosmograph.coarsen import HIERARCHY_STORE, GraphHierarchy, label_propagation
+
+
+def cliques(count, size):
+    """`count` cliques of `size` nodes, each linked to the next by a single link."""
+    nodes = [{"id": f"{clique}-{member}"} for clique in range(count) for member in range(size)]
+    links = [
+        {"source": f"{clique}-{a}", "target": f"{clique}-{b}"}
+        for clique in range(count)
+        for a in range(size)
+        for b in range(a + 1, size)
+    ]
+    links += [{"source": f"{clique}-0", "target": f"{clique + 1}-0"} for clique in range(count - 1)]
+    return {"nodes": nodes, "links": links}
+
+
+def test_label_propagation_finds_cliques():
+    graph = cliques(3, 8)
+    ids = {node["id"]: index for index, node in enumerate(graph["nodes"])}
+    source = np.array([ids[link["source"]] for link in graph["links"]])
+    target = np.array([ids[link["target"]] for link in graph["links"]])
+    labels = label_propagation(source, target, len(ids)).tolist()
+    assert [len(set(labels[clique * 8 : clique * 8 + 8])) for clique in range(3)] == [1, 1, 1]
+    assert len(set(labels)) == 3
+
+
+def test_label_propagation_without_links():
+    assert label_propagation(np.array([], dtype=int), np.array([], dtype=int), 3).tolist() == [0, 1, 2]
+
+
+def test_top_level_is_at_most_max_nodes():
+    hierarchy = GraphHierarchy(cliques(10, 5), 4)
+    view = hierarchy.view()
+    assert len(view["nodes"]) <= 4
+    assert all(node["expandable"] for node in view["nodes"])
+    assert sum(node["count"] for node in view["nodes"]) == 50
+
+
+def test_every_community_expands_into_a_bounded_number_of_nodes():
+    # Disconnected nodes never merge into communities, they are chunked instead
+    value = {"nodes": [{"id": str(index)} for index in range(1000)], "links": []}
+    hierarchy = GraphHierarchy(value, 10)
+    for level, assignment in enumerate(hierarchy.assignments):
+        members = np.bincount(assignment)
+        assert members.max() <= 10
+        # A community of a single community would expand into that one node
+        assert level == 0 or members.min() > 1
+
+
+def test_expanding_a_community_shows_its_members():
+    hierarchy = GraphHierarchy(cliques(6, 5), 6)
+    top = hierarchy.view()["nodes"]
+    expanded = hierarchy.view({top[0]["id"]})["nodes"]
+    assert top[0]["id"] not in {node["id"] for node in expanded}
+    assert len(top) < len(expanded) <= len(top) - 1 + 6
+    assert sum(node.get("count", 1) for node in expanded) == 30
+
+
+def test_max_nodes_must_leave_room_for_communities():
+    with pytest.raises(ValueError):
+        GraphHierarchy(cliques(2, 2), 1)
+
+
+def test_coarse_values_keep_their_hierarchy_through_deltas():
+    graph = NetworkGraph(incremental_updates=True, max_nodes=4, label="coarse")
+    first = asyncio.run(graph.graph_payload({"token": graph.postprocess(cliques(8, 5))["token"], "client": "page"}))
+    assert first["hierarchy"]
+    grown = cliques(8, 5)
+    grown["nodes"][0]["color"] = "#ff0000"
+    token = graph.postprocess(grown)["token"]
+    second = asyncio.run(graph.graph_payload({"token": token, "held": first["version"], "client": "page"}))
+    assert second["format"] == "delta"
+    assert second["hierarchy"] != first["hierarchy"]
+
+    community = HIERARCHY_STORE.get(second["hierarchy"]).view()["nodes"][0]["id"]
+    delta = graph.expand_community({"hierarchy": second["hierarchy"], "previous": [], "expanded": [community]})
+    assert delta["base"] == second["version"]
+    assert community in delta["nodes"]["remove"]
+    assert HIERARCHY_STORE.get(second["hierarchy"]) is not None
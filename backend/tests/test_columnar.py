@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+from gradio_cosmograph import ColumnarGraph
+from gradio_cosmograph.columnar import pack_colors
+
+
+def test_integer_ids_are_looked_up_rather_than_used_as_positions():
+    graph = ColumnarGraph([10], [20], ids=[30, 10, 20])
+    assert graph.source.tolist() == [1]
+    assert graph.target.tolist() == [2]
+    assert graph.to_value()["links"] == [{"source": "10", "target": "20"}]
+
+
+def test_integer_ids_matching_positions_of_other_nodes():
+    graph = ColumnarGraph([0], [1], ids=[2, 0, 1])
+    assert (graph.source.tolist(), graph.target.tolist()) == ([1], [2])
+
+
+def test_indices_flag_uses_endpoints_as_positions():
+    graph = ColumnarGraph([0], [1], ids=[2, 0, 1], indices=True)
+    assert (graph.source.tolist(), graph.target.tolist()) == ([0], [1])
+
+
+def test_endpoints_are_positions_without_ids():
+    graph = ColumnarGraph(np.array([0, 2]), np.array([1, 0]), node_count=3)
+    assert (graph.source.tolist(), graph.target.tolist()) == ([0, 2], [1, 0])
+
+
+def test_string_ids():
+    graph = ColumnarGraph(["b"], ["a"], ids=["a", "b"])
+    assert (graph.source.tolist(), graph.target.tolist()) == ([1], [0])
+
+
+def test_unknown_id_is_rejected():
+    with pytest.raises(ValueError, match="unknown node ids"):
+        ColumnarGraph([10], [40], ids=[30, 10, 20])
+
+
+def test_links_by_id_require_ids():
+    with pytest.raises(ValueError, match="require node `ids`"):
+        ColumnarGraph(["a"], ["b"], node_count=2)
+
+
+def test_index_out_of_range_is_rejected():
+    with pytest.raises(ValueError, match="out of range"):
+        ColumnarGraph([0], [3], ids=[2, 0, 1], indices=True)
+
+
+def test_payload_round_trip_keeps_links():
+    graph = ColumnarGraph([10, 20], [20, 30], ids=[30, 10, 20], x=[0.0, 1.0, 2.0], y=[3.0, 4.0, 5.0])
+    restored = ColumnarGraph.from_payload(graph.to_payload())
+    assert restored.ids.tolist() == ["30", "10", "20"]
+    assert (restored.source.tolist(), restored.target.tolist()) == ([1, 2], [2, 0])
+    assert restored.x.tolist() == [0.0, 1.0, 2.0]
+
+
+def test_css_colors_are_packed():
+    colors = [
+        "#abc",
+        "#aabbcc80",
+        "rgb(170, 187, 204)",
+        "rgba(170, 187, 204, 0.5)",
+        "rgb(100% 0% 0% / 50%)",
+        "SteelBlue",
+    ]
+    assert pack_colors(colors).tolist() == [0xAABBCCFF, 0xAABBCC80, 0xAABBCCFF, 0xAABBCC80, 0xFF000080, 0x4682B4FF]
+    assert pack_colors(["transparent", "hsl(0, 100%, 50%)"]).tolist() == [0, 0xFF0000FF]
+
+
+@pytest.mark.parametrize("color", ["#abcde", "#zzzzzz", "rgb(1, 2)", "rgb(a, b, c)", "not a color"])
+def test_unsupported_colors_raise(color):
+    with pytest.raises(ValueError, match="Unsupported color"):
+        pack_colors([color])
+
+
+def test_repeated_labels_are_sent_as_categories():
+    graph = ColumnarGraph([0], [1], labels={"kind": ["x", "y", "x", "x"], "name": ["a", "b", "c", "d"]})
+    nodes = graph.to_payload()["nodes"]
+    assert nodes["kind"]["categories"] == ["x", "y"]
+    assert nodes["name"] == ["a", "b", "c", "d"]
+    assert ColumnarGraph.from_payload(graph.to_payload()).labels["kind"].tolist() == ["x", "y", "x", "x"]
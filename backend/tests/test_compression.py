@@ -0,0 +1,51 @@
+import base64
+import gzip
+
+import numpy as np
+import pytest
+from gradio_cosmograph import ColumnarGraph, NetworkGraph
+from gradio_cosmograph.compression import compress_payload, decompress_payload
+
+LARGE = {
+    "nodes": [{"id": str(i), "label": f"node {i}"} for i in range(5000)],
+    "links": [{"source": str(i), "target": str(i + 1)} for i in range(4999)],
+    "version": "v1",
+}
+
+
+def test_large_payloads_round_trip():
+    compressed = compress_payload(LARGE)
+    assert compressed["format"] == "gzip"
+    assert compressed["version"] == "v1"
+    assert decompress_payload(compressed) == LARGE
+
+
+def test_small_payloads_are_sent_as_they_are():
+    small = {"nodes": [{"id": "a"}], "links": []}
+    assert compress_payload(small) is small
+
+
+def test_columnar_payloads_are_not_compressed():
+    source = np.arange(100_000) % 1000
+    payload = ColumnarGraph(source, source[::-1], node_count=1000).to_payload()
+    assert compress_payload(payload) is payload
+
+
+def test_decompressed_size_is_capped():
+    bomb = {"format": "gzip", "data": base64.b64encode(gzip.compress(b" " * 1_000_000)).decode()}
+    with pytest.raises(ValueError, match="larger than 1000 bytes"):
+        decompress_payload(bomb, max_bytes=1000)
+
+
+def test_invalid_compressed_data_raises_a_value_error():
+    with pytest.raises(ValueError, match="Invalid compressed graph"):
+        decompress_payload({"format": "gzip", "data": base64.b64encode(b"not gzip").decode()})
+    truncated = gzip.compress(b"{}" * 1000)[:20]
+    with pytest.raises(ValueError, match="truncated"):
+        decompress_payload({"format": "gzip", "data": base64.b64encode(truncated).decode()})
+
+
+def test_compressed_values_sent_back_are_decompressed():
+    graph = NetworkGraph(compression="gzip")
+    value = graph.preprocess(compress_payload(LARGE))
+    assert len(value["nodes"]) == 5000
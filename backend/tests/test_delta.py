@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+from gradio_cosmograph import NetworkGraph, merge_graphs
+from gradio_cosmograph.delta import DeltaTracker
+
+GRAPH = {"nodes": [{"id": "a"}, {"id": "b"}], "links": [{"source": "a", "target": "b"}]}
+GROWN = {"nodes": [*GRAPH["nodes"], {"id": "c"}], "links": GRAPH["links"]}
+
+
+def test_encode_diffs_against_the_version_held():
+    tracker = DeltaTracker()
+    first = tracker.encode("page", GRAPH, "first")
+    assert first == {**GRAPH, "version": "first"}
+    # Other pages are sent other values in between
+    tracker.encode("other page", {"nodes": [{"id": "x"}], "links": []}, "other")
+
+    delta = tracker.encode("page", {**GROWN, "handle": "stored"}, "grown", held="first")
+    assert delta["format"] == "delta"
+    assert delta["base"] == "first"
+    assert delta["handle"] == "stored"
+    assert delta["nodes"] == {"upsert": [{"id": "c"}], "remove": []}
+    assert delta["links"] == {"upsert": {}, "remove": []}
+
+
+def test_changed_and_removed_items_are_sent():
+    tracker = DeltaTracker()
+    large = {"nodes": [{"id": item} for item in "abcdefgh"], "links": GRAPH["links"]}
+    tracker.encode("page", large, "large")
+    changed = {"nodes": [{"id": "a", "size": 2}, *large["nodes"][1:]], "links": []}
+    delta = tracker.encode("page", changed, "changed", held="large")
+    assert delta["nodes"] == {"upsert": [{"id": "a", "size": 2}], "remove": []}
+    assert delta["links"] == {"upsert": {}, "remove": ["a\x1fb\x1f0"]}
+
+
+def test_encode_sends_the_full_value_for_unknown_versions():
+    tracker = DeltaTracker()
+    tracker.encode("page", GRAPH, "first")
+    assert tracker.encode("page", GROWN, "grown", held="unknown") == {**GROWN, "version": "grown"}
+
+
+def test_versions_are_forgotten_once_no_stream_holds_them():
+    tracker = DeltaTracker(history=4)
+    tracker.encode("page", GRAPH, "first")
+    tracker.encode("other page", GRAPH, "first")
+    # The page now holds "grown", so it no longer needs "first"
+    tracker.encode("page", GROWN, "grown", held="first")
+    tracker.encode("page", GRAPH, "again", held="grown")
+    assert tracker.resolve("first") is not None
+    tracker.encode("other page", GROWN, "grown", held="first")
+    tracker.encode("other page", GRAPH, "again", held="grown")
+    assert tracker.resolve("first") is None
+    assert tracker.resolve("grown")["nodes"] == GROWN["nodes"]
+
+
+def test_least_recent_streams_are_dropped():
+    tracker = DeltaTracker(max_streams=2)
+    tracker.encode("first page", GRAPH, "first")
+    tracker.encode("second page", GROWN, "grown")
+    tracker.encode("third page", GROWN, "grown")
+    assert tracker.resolve("first") is None
+    assert tracker.resolve("grown") is not None
+
+
+def test_the_value_sent_is_resolved_even_if_changed_afterwards():
+    tracker = DeltaTracker()
+    value = {"nodes": [{"id": "a"}], "links": []}
+    tracker.encode("page", value, "first")
+    value["nodes"].append({"id": "b"})
+    assert tracker.resolve("first") == {"nodes": [{"id": "a"}], "links": [], "version": "first"}
+
+
+def test_incremental_values_are_fetched_as_deltas_against_the_version_held():
+    graph = NetworkGraph(incremental_updates=True, label="fetched")
+    pending = graph.postprocess(GRAPH)
+    assert pending["format"] == "pending"
+    full = asyncio.run(graph.graph_payload({"token": pending["token"], "held": None, "client": "page"}))
+    assert full["nodes"] == GRAPH["nodes"]
+
+    pending = graph.postprocess(GROWN)
+    delta = asyncio.run(graph.graph_payload({"token": pending["token"], "held": full["version"], "client": "page"}))
+    assert delta["format"] == "delta"
+    assert delta["base"] == full["version"]
+    # A page displaying another value gets the whole graph
+    other = asyncio.run(graph.graph_payload({"token": pending["token"], "held": "unknown", "client": "other"}))
+    assert other["nodes"] == GROWN["nodes"]
+
+    # Events send back the version held after the delta
+    assert graph.preprocess({"format": "held", "version": delta["version"]}) == GROWN
+
+
+def test_initial_values_can_be_diffed_against():
+    graph = NetworkGraph(GRAPH, incremental_updates=True, label="initial")
+    pending = graph.postprocess(GROWN)
+    delta = asyncio.run(graph.graph_payload({"token": pending["token"], "held": graph.value["version"]}))
+    assert delta["format"] == "delta"
+
+
+def test_versions_no_longer_held_are_reported():
+    graph = NetworkGraph(incremental_updates=True, label="expired")
+    with pytest.raises(ValueError, match="reload the page"):
+        graph.preprocess({"format": "held", "version": "expired"})
+    assert graph.preprocess({**GROWN, "version": "expired"}) == GROWN
+
+
+def test_merged_neighbourhoods_keep_the_attributes_of_displayed_nodes():
+    displayed = {"nodes": [{"id": "a", "x": 1.0}, {"id": "b"}], "links": GRAPH["links"]}
+    merged = merge_graphs(
+        displayed, {"nodes": [{"id": "a", "degree": 2}, {"id": "c"}], "links": [{"source": "a", "target": "c"}]}
+    )
+    assert merged["nodes"] == [{"id": "a", "x": 1.0, "degree": 2}, {"id": "b"}, {"id": "c"}]
+    assert len(merged["links"]) == 2
+    assert displayed["nodes"][0] == {"id": "a", "x": 1.0}
+
+
+def test_merged_values_are_sent_as_the_items_added():
+    graph = NetworkGraph(incremental_updates=True, label="expand")
+    full = asyncio.run(graph.graph_payload({"token": graph.postprocess(GRAPH)["token"], "client": "page"}))
+    pending = graph.postprocess(
+        merge_graphs(GRAPH, {"nodes": [{"id": "c"}], "links": [{"source": "b", "target": "c"}]})
+    )
+    delta = asyncio.run(graph.graph_payload({"token": pending["token"], "held": full["version"], "client": "page"}))
+    assert delta["format"] == "delta"
+    assert delta["base"] == full["version"]
+    assert graph.preprocess({"format": "held", "version": delta["version"]})["nodes"] == [*GRAPH["nodes"], {"id": "c"}]
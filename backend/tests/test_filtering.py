@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from gradio_cosmograph import ColumnarGraph, GraphFilter, NetworkGraph, filter_graph
+from gradio_cosmograph.filtering import FILTER_STORE, parse_filter
+
+GRAPH = {
+    "nodes": [
+        {"id": "a", "label": "Document", "size": 1},
+        {"id": "b", "label": "Document", "size": 5},
+        {"id": "c", "label": "Person", "size": 4},
+        {"id": "d", "label": "Person"},
+    ],
+    "links": [
+        {"source": "a", "target": "b"},
+        {"source": "b", "target": "c"},
+        {"source": "c", "target": "d"},
+    ],
+}
+
+
+def ids(value):
+    return [node["id"] for node in value["nodes"]]
+
+
+def test_parse_filter_binds_not_then_and_then_or():
+    assert parse_filter("a = 1 OR NOT b = x AND c IN (1, 'y')") == (
+        "or",
+        [("compare", "a", "=", 1.0), ("and", [("not", ("compare", "b", "=", "x")), ("in", "c", [1.0, "y"])])],
+    )
+
+
+@pytest.mark.parametrize("expression", ["size >", "size = 1 AND", "(size = 1", "size ~ 1", "size = 1 2"])
+def test_malformed_filters_raise(expression):
+    with pytest.raises(ValueError, match="Invalid filter"):
+        parse_filter(expression)
+
+
+def test_filters_keep_matching_nodes_and_the_links_between_them():
+    filtered = filter_graph(GRAPH, "size >= 4 OR label = Document")
+    assert ids(filtered) == ["a", "b", "c"]
+    assert filtered["links"] == GRAPH["links"][:2]
+
+
+def test_nodes_missing_a_field_do_not_match_comparisons_on_it():
+    assert ids(filter_graph(GRAPH, "size < 100")) == ["a", "b", "c"]
+    assert ids(filter_graph(GRAPH, "label IN (Person) AND NOT size > 1")) == ["d"]
+
+
+def test_indexes_are_reused_across_filters():
+    graph_filter = GraphFilter(GRAPH)
+    assert np.flatnonzero(graph_filter.mask("label = Person")).tolist() == [2, 3]
+    assert np.flatnonzero(graph_filter.mask("label != Person")).tolist() == [0, 1]
+
+
+def test_columnar_values_are_filtered_as_columns():
+    graph = ColumnarGraph(["a", "b"], ["b", "c"], ids=["a", "b", "c"], size=[1, 2, 3], labels={"kind": ["x", "y", "y"]})
+    filtered = filter_graph(graph, "kind = y")
+    assert filtered.ids.tolist() == ["b", "c"]
+    assert (filtered.source.tolist(), filtered.target.tolist()) == ([0], [1])
+
+
+def test_numbers_and_words_are_not_compared():
+    with pytest.raises(ValueError, match="holds numbers"):
+        filter_graph(GRAPH, "size = big")
+
+
+def test_apply_filter_on_a_displayed_value():
+    graph = NetworkGraph(filterable=True)
+    version = graph.postprocess(GRAPH)["version"]
+    filtered = graph.apply_filter({"version": version, "filter": "label = Person", "client": "page"})
+    assert ids(filtered) == ["c", "d"]
+    assert filtered["version"] != version
+    assert "error" in graph.apply_filter({"version": version, "filter": "label ="})
+
+
+def test_filters_dropped_by_the_server_are_rebuilt_from_the_value_sent(monkeypatch):
+    monkeypatch.setattr(FILTER_STORE, "_entries", {})
+    graph = NetworkGraph(filterable=True)
+    payload = graph.postprocess(GRAPH)
+    FILTER_STORE._entries.clear()
+    data = {"version": payload["version"], "filter": "size > 4", "client": "page"}
+    assert graph.apply_filter(data) is None
+    assert ids(graph.apply_filter({**data, "value": payload})) == ["b"]
+    # Kept again for the next filters
+    assert ids(graph.apply_filter({**data, "filter": "size < 4"})) == ["a"]
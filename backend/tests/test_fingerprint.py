@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+from gradio_cosmograph import ColumnarGraph, NetworkGraph
+from gradio_cosmograph import cosmograph as cosmograph_module
+from gradio_cosmograph.fingerprint import Fingerprinted, fingerprint
+
+GRAPH = {"nodes": [{"id": "a"}, {"id": "b"}], "links": [{"source": "a", "target": "b"}]}
+
+
+def test_equal_values_share_a_fingerprint():
+    assert fingerprint(GRAPH) == fingerprint({"links": [{"target": "b", "source": "a"}], "nodes": GRAPH["nodes"]})
+    assert fingerprint(GRAPH) != fingerprint({**GRAPH, "nodes": GRAPH["nodes"][::-1]})
+
+
+def test_versioned_values_are_not_hashed():
+    assert fingerprint({**GRAPH, "version": "v1"}) == "v1"
+    assert fingerprint({"data": []}) is None
+
+
+def test_columnar_labels_are_hashed():
+    graph = ColumnarGraph([0], [1], labels={"name": ["a", "b"]})
+    assert fingerprint(graph) == fingerprint(ColumnarGraph([0], [1], labels={"name": ["a", "b"]}))
+    assert fingerprint(graph) != fingerprint(ColumnarGraph([0], [1], labels={"name": ["ab", ""]}))
+
+
+def test_tables_are_hashed_by_their_columns():
+    # Their repr, elided past a few rows, would not tell these apart
+    nodes = pd.DataFrame({"id": [str(i) for i in range(1000)]})
+    changed = nodes.copy()
+    changed.loc[500, "id"] = "x"
+    assert fingerprint({"nodes": nodes, "links": None}) != fingerprint({"nodes": changed, "links": None})
+    assert fingerprint({"nodes": nodes, "links": None}) == fingerprint({"nodes": nodes.copy(), "links": None})
+
+
+def test_polled_values_are_fingerprinted_once(monkeypatch, session):
+    graph, calls = NetworkGraph(), []
+
+    def counted(value):
+        calls.append(value)
+        return fingerprint(value)
+
+    monkeypatch.setattr(cosmograph_module, "fingerprint", counted)
+    session("polling")
+    poll = graph._skip_unchanged(lambda: {"nodes": GRAPH["nodes"], "links": GRAPH["links"]})
+    value = poll()
+    assert isinstance(value, Fingerprinted)
+    assert graph.postprocess(value)["version"] == value.version
+    assert len(calls) == 1
+    # Skipped once the session displays it
+    assert not isinstance(poll(), Fingerprinted)
+
+
+def test_columnar_fingerprints_cover_every_column():
+    source = np.arange(10)
+    graph = ColumnarGraph(source, source[::-1], node_count=10)
+    assert fingerprint(graph) != fingerprint(graph.with_columns(size=np.ones(10)))
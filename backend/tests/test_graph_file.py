@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from gradio_cosmograph import ColumnarGraph, GraphFile, NetworkGraph, save_graph
+
+GRAPH = ColumnarGraph(
+    ["a", "b"],
+    ["b", "c"],
+    ids=["a", "b", "c"],
+    x=[0.0, 1.0, 2.0],
+    y=[0.0, 1.0, 0.0],
+    labels={"kind": ["x", "x", "x"], "name": ["first", "second", "third"]},
+    link_color=["#ff0000", "#00ff00"],
+)
+
+
+def test_saved_graphs_round_trip(tmp_path):
+    graph = GraphFile(save_graph(GRAPH, tmp_path / "graph.npz")).to_graph()
+    assert graph.to_value() == GRAPH.to_value()
+
+
+def test_layout_points_at_the_bytes_of_each_column(tmp_path):
+    path = save_graph(GRAPH, tmp_path / "graph.npz")
+    layout = GraphFile(path).layout()
+    assert (layout["nodeCount"], layout["linkCount"]) == (3, 2)
+    data = path.read_bytes()
+    x = layout["nodes"]["x"]
+    assert np.frombuffer(data[x["offset"] : x["offset"] + x["bytes"]], dtype="<f4").tolist() == [0.0, 1.0, 2.0]
+    # Repeated labels are sent as categories and codes, distinct ones as they are
+    assert set(layout["nodes"]["kind"]) == {"categories", "codes"}
+    assert layout["nodes"]["name"]["dtype"] == "utf32"
+
+
+def test_versions_change_when_the_file_is_rewritten(tmp_path):
+    graph_file = GraphFile(save_graph(GRAPH, tmp_path / "graph.npz"))
+    version = graph_file.version
+    save_graph(GRAPH.with_columns(size=np.ones(3)), graph_file.path)
+    assert graph_file.version != version
+    assert "size" in graph_file.layout()["nodes"]
+
+
+def test_compressed_files_are_rejected(tmp_path):
+    path = tmp_path / "graph.npz"
+    np.savez_compressed(path, source=np.zeros(1, "<u4"), target=np.zeros(1, "<u4"))
+    with pytest.raises(ValueError, match="compressed"):
+        GraphFile(path).layout()
+
+
+def test_paths_are_served_as_files_and_sent_back_as_graph_files(tmp_path):
+    path = save_graph(GRAPH, tmp_path / "graph.npz")
+    graph = NetworkGraph()
+    payload = graph.postprocess(str(path))
+    assert payload["format"] == "file"
+    assert payload["version"] == GraphFile(path).version
+    assert graph.preprocess(payload).path == path.resolve()
+
+
+def test_only_files_sent_by_the_app_are_accepted(tmp_path):
+    path = save_graph(GRAPH, tmp_path / "other.npz")
+    with pytest.raises(ValueError, match="was not sent"):
+        NetworkGraph().preprocess({"format": "file", "file": {"path": str(path)}})
+
+
+def test_parquet_tables_are_converted_once(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    parquet = pytest.importorskip("pyarrow.parquet")
+    parquet.write_table(pa.table({"id": ["a", "b"]}), tmp_path / "nodes.parquet")
+    parquet.write_table(pa.table({"source": ["a"], "target": ["b"]}), tmp_path / "links.parquet")
+    graph_file = GraphFile(tmp_path / "nodes.parquet", tmp_path / "links.parquet")
+    assert graph_file.path == (tmp_path / "nodes.graph.npz").resolve()
+    version = graph_file.version
+    assert GraphFile(tmp_path / "nodes.parquet", tmp_path / "links.parquet").version == version
+    assert graph_file.to_graph().to_value()["links"] == [{"source": "a", "target": "b"}]
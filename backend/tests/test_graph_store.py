@@ -0,0 +1,70 @@
+import copy
+import gc
+
+import numpy as np
+import pytest
+from gradio_cosmograph import ColumnarGraph, GraphStore, NetworkGraph, store_graph
+
+GRAPH = {
+    "nodes": [{"id": "a", "kind": "x"}, {"id": "b", "kind": "y"}, {"id": "c", "kind": "y"}],
+    "links": [{"source": "a", "target": "b"}, {"source": "b", "target": "c"}],
+}
+
+
+def test_equal_graphs_are_stored_once():
+    store = GraphStore()
+    first = store.put(GRAPH)
+    second = store.put({"nodes": list(GRAPH["nodes"]), "links": list(GRAPH["links"])})
+    assert first.version == second.version
+    assert second.value is GRAPH
+    assert len(store) == 1
+
+
+def test_copies_share_the_stored_graph():
+    handle = GraphStore().put(GRAPH)
+    assert copy.deepcopy(handle).value is handle.value
+
+
+def test_released_graphs_are_kept_among_the_most_recent():
+    store = GraphStore(max_released=1)
+    version = store.put(GRAPH, key="first").version
+    gc.collect()
+    assert store.get(version) is not None
+    store.put(GRAPH, key="second")
+    gc.collect()
+    assert store.get(version) is None
+    assert "second" in store
+
+
+def test_views_and_filters_hold_indices_of_the_stored_graph():
+    handle = GraphStore().put(GRAPH)
+    view = handle.filter("kind = y")
+    assert (view.nodes.tolist(), view.links.tolist()) == ([1, 2], [1])
+    assert view.value["links"] == [GRAPH["links"][1]]
+    # Filtering a view only keeps the nodes it has
+    assert view.filter("kind != z").version == view.version
+    assert handle.store.get(view.version).version == view.version
+
+
+def test_overlays_merge_without_copying_the_stored_graph():
+    handle = GraphStore().put(GRAPH)
+    merged = handle.merge({"nodes": [{"id": "d"}], "links": [{"source": "c", "target": "d"}]})
+    assert [node["id"] for node in merged.value["nodes"]] == ["a", "b", "c", "d"]
+    assert len(handle.value["nodes"]) == 3
+    with pytest.raises(ValueError, match="without merged nodes"):
+        merged.filter("kind = y")
+
+
+def test_stored_columnar_graphs_are_read_only():
+    graph = ColumnarGraph(np.array([0]), np.array([1]), node_count=2)
+    GraphStore().put(graph)
+    with pytest.raises(ValueError, match="read-only"):
+        graph.source[0] = 1
+
+
+def test_handles_are_sent_with_their_version_and_come_back_as_handles():
+    handle = store_graph(GRAPH)
+    graph = NetworkGraph()
+    payload = graph.postprocess(handle)
+    assert payload["version"] == payload["handle"] == handle.version
+    assert graph.preprocess(payload).value is GRAPH
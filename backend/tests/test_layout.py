@@ -0,0 +1,60 @@
+import numpy as np
+from gradio_cosmograph import ColumnarGraph, compute_layout, force_layout
+from gradio_cosmograph.layout import fit_to_space, seed_positions
+
+
+def test_linked_nodes_end_up_closer_than_unlinked_ones():
+    # Two triangles joined by a single link
+    source = [0, 1, 2, 3, 4, 5, 2]
+    target = [1, 2, 0, 4, 5, 3, 3]
+    positions = force_layout(source, target, 6, seed=1)
+    assert positions.shape == (6, 2)
+    within = np.linalg.norm(positions[0] - positions[1])
+    across = np.linalg.norm(positions[0] - positions[4])
+    assert within < across
+
+
+def test_layout_is_deterministic_for_a_seed():
+    first = force_layout([0, 1], [1, 2], 3, seed=3, iterations=20)
+    second = force_layout([0, 1], [1, 2], 3, seed=3, iterations=20)
+    assert np.array_equal(first, second)
+
+
+def test_progress_is_reported_and_can_stop_the_layout():
+    reported = []
+
+    def progress(fraction):
+        reported.append(fraction)
+        if fraction >= 0.5:
+            raise KeyboardInterrupt
+
+    try:
+        force_layout([0], [1], 2, iterations=10, progress=progress)
+    except KeyboardInterrupt:
+        pass
+    assert reported == [0.1, 0.2, 0.3, 0.4, 0.5]
+
+
+def test_seed_positions_places_new_nodes_next_to_their_neighbours():
+    positions = np.array([[0.0, 0.0], [100.0, 100.0], [np.nan, np.nan]])
+    seeded = seed_positions(positions, [2], [1])
+    assert np.array_equal(seeded[:2], positions[:2])
+    assert np.linalg.norm(seeded[2] - positions[1]) < 5
+
+
+def test_fit_to_space_keeps_positions_within_the_margin():
+    fitted = fit_to_space(np.array([[-5.0, 0.0], [5.0, 2.0]]), 1000)
+    assert fitted.min() >= 100
+    assert fitted.max() <= 900
+
+
+def test_compute_layout_sets_positions_of_dict_and_columnar_values():
+    value = {"nodes": [{"id": "a", "label": "A"}, {"id": "b"}], "links": [{"source": "a", "target": "b"}]}
+    laid_out = compute_layout(value, space_size=1024)
+    assert laid_out["nodes"][0]["label"] == "A"
+    assert all(0 <= node["x"] <= 1024 and 0 <= node["y"] <= 1024 for node in laid_out["nodes"])
+    assert "x" not in value["nodes"][0]
+
+    columnar = compute_layout(ColumnarGraph([0], [1], ids=["a", "b"], indices=True), space_size=1024)
+    assert columnar.x is not None and columnar.y is not None
+    assert len(columnar.x) == 2
@@ -0,0 +1,72 @@
+import time
+
+import numpy as np
+from gradio_cosmograph import LayoutCache
+from gradio_cosmograph.layout_cache import topology_key
+
+IDS = np.array(["a", "b", "c", "d"])
+SOURCE = np.array([0, 1, 2])
+TARGET = np.array([1, 2, 3])
+
+
+class Layouts:
+    """Records the layouts computed, returning each node at its index."""
+
+    def __init__(self, seconds=0.0):
+        self.seconds = seconds
+        self.calls = []
+
+    def __call__(self, source, target, node_count, **kwargs):
+        self.calls.append(kwargs)
+        time.sleep(self.seconds)
+        return np.stack([np.arange(node_count), np.zeros(node_count)], axis=1).astype(float)
+
+
+def test_topology_key_ignores_the_order_of_nodes_and_links():
+    reordered = np.array(["d", "c", "b", "a"])
+    # c -> d, b -> c, a -> b
+    assert topology_key(IDS, SOURCE, TARGET) == topology_key(reordered, np.array([1, 2, 3]), np.array([0, 1, 2]))
+    assert topology_key(IDS, SOURCE, TARGET) != topology_key(reordered, np.array([1, 2, 3]), np.array([0, 1, 0]))
+
+
+def test_cached_layouts_are_served_again():
+    cache, layouts = LayoutCache(), Layouts()
+    first = cache.layout(IDS, SOURCE, TARGET, layout=layouts)
+    second = cache.layout(IDS[::-1], 3 - SOURCE, 3 - TARGET, layout=layouts)
+    assert len(layouts.calls) == 1
+    assert np.array_equal(second, first[::-1])
+
+
+def test_layout_arguments_are_part_of_the_key():
+    cache, layouts = LayoutCache(), Layouts()
+    cache.layout(IDS, SOURCE, TARGET, layout=layouts, iterations=10)
+    cache.layout(IDS, SOURCE, TARGET, layout=layouts, iterations=300, time_budget=5.0)
+    cache.layout(IDS, SOURCE, TARGET, layout=layouts, iterations=300, time_budget=10.0)
+    # The second layout starts from the first, and the third is the second as only the time budget changed
+    assert len(layouts.calls) == 2
+    assert "initial_positions" in layouts.calls[1]
+
+
+def test_layouts_cut_short_are_only_warm_starts():
+    cache, layouts = LayoutCache(), Layouts(seconds=0.05)
+    cache.layout(IDS, SOURCE, TARGET, layout=layouts, time_budget=0.01)
+    cache.layout(IDS, SOURCE, TARGET, layout=layouts, time_budget=0.01)
+    assert len(layouts.calls) == 2
+    assert "initial_positions" not in layouts.calls[0]
+    assert np.array_equal(layouts.calls[1]["initial_positions"][:, 0], np.arange(4))
+
+
+def test_closest_reads_layouts_from_disk(tmp_path):
+    LayoutCache(directory=tmp_path).layout(IDS, SOURCE, TARGET, layout=Layouts())
+    cache = LayoutCache(directory=tmp_path)
+    closest = cache.closest(np.array(["c", "a", "e"]))
+    assert np.array_equal(closest[:2], [[2, 0], [0, 0]])
+    assert np.isnan(closest[2]).all()
+    assert cache.closest(np.array(["e", "f"])) is None
+
+
+def test_disk_entries_are_bounded(tmp_path):
+    cache = LayoutCache(directory=tmp_path, max_disk_entries=2)
+    for iterations in (1, 2, 3):
+        cache.layout(IDS, SOURCE, TARGET, layout=Layouts(), iterations=iterations)
+    assert len(list(tmp_path.glob("*.npz"))) == 2
@@ -0,0 +1,47 @@
+import math
+
+from gradio_cosmograph import PrometheusSink
+from gradio_cosmograph.metrics import render_fields
+
+
+def test_render_fields_keep_known_finite_numbers():
+    fields = render_fields(
+        {
+            "nodes": 10,
+            "settle_seconds": 1.5,
+            "simulation_fps": math.inf,
+            "decode_seconds": math.nan,
+            "set_data_seconds": True,
+            "first_frame_seconds": "0.1",
+            "stage": "postprocess",
+            "unknown_field": 1,
+        }
+    )
+    assert fields == {"nodes": 10, "settle_seconds": 1.5}
+
+
+def test_render_fields_of_non_dictionaries():
+    assert render_fields(["nodes", 10]) == {}
+    assert render_fields(None) == {}
+
+
+def test_prometheus_names_are_sanitized():
+    sink = PrometheusSink()
+    sink({"stage": "render", "component": "graph", 'bad name"} 1\n# x': 2.0})
+    names = [line.split("{")[0] for line in sink.export().splitlines() if not line.startswith("#")]
+    assert names == ["cosmograph_render_bad_name___1___x_sum", "cosmograph_render_bad_name___1___x_count"]
+
+
+def test_prometheus_skips_non_finite_values():
+    sink = PrometheusSink()
+    sink({"stage": "render", "component": "graph", "seconds": math.nan, "fps": math.inf, "nodes": 3})
+    exported = sink.export()
+    assert "seconds" not in exported
+    assert "fps" not in exported
+    assert 'cosmograph_render_nodes_sum{component="graph"} 3' in exported
+
+
+def test_prometheus_escapes_component_labels():
+    sink = PrometheusSink()
+    sink({"stage": "render", "component": 'a"b\nc', "nodes": 1})
+    assert 'component="a\\"b\\nc"' in sink.export()
@@ -0,0 +1,48 @@
+import asyncio
+import threading
+
+from gradio_cosmograph import NetworkGraph
+from gradio_cosmograph.pending import PendingStore
+
+GRAPH = {"nodes": [{"id": "a"}, {"id": "b"}], "links": [{"source": "a", "target": "b"}]}
+
+
+def test_initial_values_are_prepared_right_away():
+    graph = NetworkGraph(GRAPH, precompute_layout=True)
+    assert "format" not in graph.value
+    assert all("x" in node and "y" in node for node in graph.value["nodes"])
+
+
+def test_values_returned_later_are_fetched_once_laid_out():
+    graph = NetworkGraph(precompute_layout=True)
+    pending = graph.postprocess(GRAPH)
+    assert pending["format"] == "pending"
+    ready = asyncio.run(graph.graph_payload({"token": pending["token"]}))
+    assert [node["id"] for node in ready["nodes"]] == ["a", "b"]
+    assert all("x" in node and "y" in node for node in ready["nodes"])
+    assert graph.preprocess(pending)["nodes"] == ready["nodes"]
+
+
+def test_payloads_being_prepared_are_never_dropped():
+    store = PendingStore(max_entries=2)
+    release = threading.Event()
+    try:
+        slow = store.submit(release.wait)
+        tokens = [store.submit(lambda item=item: item) for item in range(4)]
+        for token in tokens:
+            future = store.get(token)
+            if future is not None:
+                future.result(timeout=10)
+        # Ready payloads are dropped once there are more than `max_entries`, oldest first
+        store.submit(lambda: None)
+        assert store.get(slow) is not None
+        assert store.get(tokens[0]) is None
+        assert sum(store.get(token) is not None for token in tokens) <= 2
+    finally:
+        release.set()
+    assert store.get(slow).result(timeout=10) is True
+
+
+def test_dropped_tokens_are_reported():
+    graph = NetworkGraph()
+    assert "error" in asyncio.run(graph.graph_payload({"token": "unknown"}))
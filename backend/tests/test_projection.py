@@ -0,0 +1,85 @@
+import pytest
+from gradio_cosmograph import NetworkGraph
+from gradio_cosmograph.held import HeldStore
+from gradio_cosmograph.projection import DETAIL_STORE, project, restore
+
+GRAPH = {
+    "nodes": [{"id": "a", "label": "A", "text": "long"}, {"id": "b", "label": "B"}],
+    "links": [{"source": "a", "target": "b", "weight": 2, "note": "why"}],
+}
+
+
+def test_project_splits_the_fields_the_canvas_does_not_need():
+    projected, node_details, link_details = project(GRAPH, ["label"], [])
+    assert projected["nodes"] == [{"id": "a", "label": "A"}, {"id": "b", "label": "B"}]
+    assert projected["links"] == [{"source": "a", "target": "b", "weight": 2}]
+    assert node_details == {"a": {"text": "long"}}
+    assert list(link_details.values()) == [{"note": "why"}]
+    assert restore(projected, node_details, link_details) == GRAPH
+
+
+def test_details_are_fetched_and_restored():
+    graph = NetworkGraph(node_fields=[], node_label_key="label")
+    payload = graph.postprocess(GRAPH)
+    assert payload["nodes"][0] == {"id": "a", "label": "A"}
+    assert graph.node_details({"version": payload["version"], "id": "a", "client": "page"}) == {"text": "long"}
+    assert graph.preprocess(payload) == GRAPH
+
+
+def test_components_keep_their_own_details():
+    labelled, plain = (
+        NetworkGraph(node_fields=[], node_label_key="label", label="labelled"),
+        NetworkGraph(node_fields=["text"], node_label_key="label"),
+    )
+    version = labelled.postprocess(GRAPH)["version"]
+    assert plain.postprocess(GRAPH)["version"] == version
+    assert labelled.node_details({"version": version, "id": "a"}) == {"text": "long"}
+    assert plain.node_details({"version": version, "id": "a"}) == {}
+
+
+def test_evicted_details_raise_rather_than_being_dropped(monkeypatch):
+    monkeypatch.setattr(DETAIL_STORE, "_entries", {})
+    graph = NetworkGraph(node_fields=[], node_label_key="label")
+    payload = graph.postprocess(GRAPH)
+    DETAIL_STORE._entries.clear()
+    assert graph.node_details({"version": payload["version"], "id": "a"}) is None
+    with pytest.raises(ValueError, match="reload the page"):
+        graph.preprocess(payload)
+    # Values that were not projected, e.g. batches, have all their fields already
+    assert graph.preprocess({**GRAPH, "version": payload["version"]}) == GRAPH
+
+
+def test_entries_held_by_a_page_outlive_recent_ones():
+    store = HeldStore(max_recent=2, history=2)
+    store.put("shown", 1)
+    store.hold("shown", "page")
+    for key in range(3):
+        store.put(key, key)
+    assert store.get("shown") == 1
+    assert store.get(0) is None
+    # Dropped once the page has held two newer entries
+    store.hold(1, "page")
+    store.hold(2, "page")
+    assert store.get("shown") is None
+    assert store.get(1) == 1
+
+
+def test_forgotten_pages_release_their_entries():
+    store = HeldStore(max_recent=1, max_clients=1)
+    store.put("first", 1, client="old page")
+    store.put("second", 2, client="new page")
+    store.put("third", 3)
+    assert store.get("first") is None
+    assert store.get("second") == 2
+
+
+def test_setdefault_builds_missing_entries_once():
+    store, built = HeldStore(), []
+
+    def build():
+        built.append(True)
+        return len(built)
+
+    assert store.setdefault("key", build) == 1
+    assert store.setdefault("key", build) == 1
+    assert len(built) == 1
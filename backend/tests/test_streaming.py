@@ -0,0 +1,39 @@
+from gradio_cosmograph import GraphBatch, NetworkGraph, stream_graph
+
+
+def test_batches_are_added_to_their_own_session(session):
+    graph = NetworkGraph(incremental_updates=True, label="batches")
+    session("first")
+    first = graph.postprocess(GraphBatch(nodes=[{"id": "a"}], links=[]))
+    session("second")
+    second = graph.postprocess(GraphBatch(nodes=[{"id": "b"}], links=[]))
+    assert "format" not in second
+    assert second["nodes"] == [{"id": "b"}]
+
+    session("first")
+    added = graph.postprocess(GraphBatch(nodes=[{"id": "c"}], links=[]))
+    assert added["format"] == "delta"
+    assert added["base"] == first["version"]
+    assert NetworkGraph().graph_value(added["version"])["nodes"] == [{"id": "a"}, {"id": "c"}]
+
+
+def test_stream_graph_sends_each_link_with_its_last_node():
+    value = {
+        "nodes": [{"id": i} for i in range(7)],
+        "links": [{"source": 0, "target": 1}, {"source": 6, "target": 0}, {"source": 2, "target": 99}],
+    }
+    batches = list(stream_graph(value, first_batch=2, batch_size=3))
+    assert [[node["id"] for node in batch.nodes] for batch in batches] == [[0, 1], [2, 3, 4], [5, 6]]
+    assert [batch.reset for batch in batches] == [True, False, False]
+    # Links to nodes no batch holds come last
+    assert [batch.links for batch in batches] == [[value["links"][0]], [], value["links"][1:]]
+
+
+def test_a_reset_batch_replaces_the_graph_displayed(session):
+    graph = NetworkGraph(incremental_updates=True, label="resets")
+    session("page")
+    graph.postprocess(GraphBatch(nodes=[{"id": "a"}], links=[], reset=True))
+    graph.postprocess(GraphBatch(nodes=[{"id": "b"}], links=[]))
+    replaced = graph.postprocess(GraphBatch(nodes=[{"id": "c"}], links=[], reset=True))
+    assert "format" not in replaced
+    assert replaced["nodes"] == [{"id": "c"}]
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from gradio_cosmograph import ColumnarGraph, NetworkGraph
+from gradio_cosmograph.tiling import TILE_STORE, SpatialIndex
+
+
+def grid(side):
+    """A side x side grid of nodes one unit apart, each linked to its right neighbour, as a ColumnarGraph."""
+    x, y = np.meshgrid(np.arange(side, dtype=float), np.arange(side, dtype=float))
+    ids = np.arange(side * side)
+    right = ids[(ids % side) < side - 1]
+    return ColumnarGraph(right, right + 1, x=x.ravel(), y=y.ravel(), node_count=side * side)
+
+
+def test_zoomed_out_views_keep_the_most_important_nodes_of_each_tile():
+    index = SpatialIndex(grid(64), nodes_per_tile=16)
+    nodes, _ = index.query(index.bounds)
+    assert 0 < len(nodes) < 64 * 64
+
+
+def test_zooming_in_only_adds_nodes():
+    index = SpatialIndex(grid(64), nodes_per_tile=16)
+    viewport = (0.0, 0.0, 8.0, 8.0)
+    zoomed_out, _ = index.query(index.bounds)
+    zoomed_in, _ = index.query(viewport)
+    x, y = index.value.x, index.value.y
+    inside = zoomed_out[(x[zoomed_out] <= 8) & (y[zoomed_out] <= 8)]
+    assert set(inside.tolist()) <= set(zoomed_in.tolist())
+
+
+def test_views_only_have_links_between_their_nodes():
+    index = SpatialIndex(grid(32), nodes_per_tile=8)
+    nodes, links = index.query((0.0, 0.0, 4.0, 4.0))
+    graph = index.value
+    assert np.isin(graph.source[links], nodes).all() and np.isin(graph.target[links], nodes).all()
+
+
+def test_positions_are_required():
+    with pytest.raises(ValueError, match="need node positions"):
+        SpatialIndex({"nodes": [{"id": "a"}], "links": []})
+
+
+def test_tiled_values_send_an_overview_and_serve_viewports(monkeypatch):
+    monkeypatch.setattr(TILE_STORE, "_entries", {})
+    graph = NetworkGraph(tiled=True)
+    payload = graph._finish(*graph._prepare(grid(64)), client="page")
+    assert payload["format"] == "tiled"
+    assert payload["nodeCount"] == 64 * 64
+    view = graph.graph_tiles({"version": payload["version"], "viewport": [0, 0, 4, 4], "client": "page"})
+    assert view["format"] == "columnar"
+    assert view["version"].startswith(f"{payload['version']}:tiles:")
+    # Held by the page displaying it, however many values are tiled meanwhile
+    for side in range(2, 12):
+        graph._prepare(grid(side))
+    assert graph.graph_tiles({"version": payload["version"], "viewport": [0, 0, 4, 4]}) is not None
+    TILE_STORE._entries.clear()
+    assert graph.graph_tiles({"version": payload["version"], "viewport": [0, 0, 4, 4]}) is None
+    with pytest.raises(ValueError, match="reload the page"):
+        graph.preprocess({"format": "tiled", "version": payload["version"]})
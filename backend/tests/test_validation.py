@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from gradio_cosmograph import ColumnarGraph, validate_graph, validation
+from gradio_cosmograph.layout import graph_arrays
+from gradio_cosmograph.validation import GraphIndex
+
+INVALID = {
+    "nodes": [{"id": 1}, {"id": "1"}, {"name": "no id"}, {"id": "b"}],
+    "links": [
+        {"source": 1, "target": "b"},
+        {"source": "x", "target": "b"},
+        {"source": None, "target": "b"},
+    ],
+}
+
+
+def test_valid_values_are_returned_as_is():
+    value = {"nodes": [{"id": "a"}, {"id": "b"}], "links": [{"source": "a", "target": "b"}]}
+    assert validate_graph(value) is value
+
+
+def test_ids_are_converted_to_strings():
+    value = {"nodes": [{"id": 1}, {"id": 2}], "links": [{"source": 1, "target": 2}]}
+    assert validate_graph(value) == {
+        "nodes": [{"id": "1"}, {"id": "2"}],
+        "links": [{"source": "1", "target": "2"}],
+    }
+
+
+def test_invalid_items_are_dropped_with_a_warning():
+    with pytest.warns(UserWarning, match="1 node\\(s\\) without an 'id', 1 duplicate node id\\(s\\), e.g. '1'"):
+        value = validate_graph(INVALID)
+    assert value == {"nodes": [{"id": "1"}, {"id": "b"}], "links": [{"source": "1", "target": "b"}]}
+
+
+def test_invalid_values_raise():
+    with pytest.raises(ValueError, match="2 link\\(s\\) to unknown nodes, e.g. 'x' -> 'b'"):
+        validate_graph(INVALID, "raise")
+
+
+def test_endpoints_are_mapped_to_the_first_node_with_their_id():
+    index = GraphIndex(INVALID)
+    assert index.source.tolist() == [0, -1, -1]
+    assert index.target.tolist() == [3, 3, 3]
+    assert index.keep_nodes.tolist() == [True, False, False, True]
+    assert index.keep_links.tolist() == [True, False, False]
+
+
+def test_endpoints_longer_than_every_id_are_unknown():
+    index = GraphIndex({"nodes": [{"id": "a"}], "links": [{"source": "a", "target": "aa"}]})
+    assert index.target.tolist() == [-1]
+
+
+def test_ids_sharing_a_hash_are_told_apart(monkeypatch):
+    monkeypatch.setattr(validation, "_hash_ids", lambda ids: np.zeros(len(ids), dtype=np.uint64))
+    value = {"nodes": [{"id": "a"}, {"id": "b"}, {"id": "c"}], "links": [{"source": "c", "target": "a"}]}
+    index = GraphIndex(value)
+    assert index.valid
+    assert (index.source.tolist(), index.target.tolist()) == ([2], [0])
+
+
+def test_graph_arrays_skip_links_to_unknown_nodes():
+    ids, source, target, links = graph_arrays(INVALID)
+    assert ids.tolist() == ["1", "1", "", "b"]
+    assert (source.tolist(), target.tolist(), links.tolist()) == ([0], [3], [0])
+
+
+def test_duplicate_columnar_ids_are_merged():
+    graph = ColumnarGraph(["b", "a"], ["a", "b"], ids=["a", "b", "a"], x=[0, 1, 2])
+    with pytest.warns(UserWarning, match="1 duplicate node id"):
+        deduplicated = validate_graph(graph)
+    assert deduplicated.ids.tolist() == ["a", "b"]
+    assert deduplicated.x.tolist() == [0, 1]
+    assert (deduplicated.source.tolist(), deduplicated.target.tolist()) == ([1, 0], [0, 1])
@@ -0,0 +1,58 @@
+import time
+
+import pytest
+from gradio_cosmograph import GraphJobPool, JobCancelled
+
+
+def spin(progress):
+    """Runs until cancelled."""
+    while True:
+        progress(0.5)
+        time.sleep(0.01)
+
+
+def wait_until_started(job, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while job.progress < 0.5:
+        assert time.monotonic() < deadline, "the job did not start"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def pool():
+    pool = GraphJobPool(max_workers=2)
+    yield pool
+    pool.shutdown()
+
+
+def test_cancel_stops_a_running_job(pool):
+    job = pool.submit(spin)
+    wait_until_started(job)
+    job.cancel()
+    with pytest.raises(JobCancelled):
+        job.result(timeout=30)
+    assert job.cancelled()
+
+
+def test_a_job_supersedes_the_previous_one_of_its_scope(pool):
+    first = pool.submit(spin, scope="query")
+    wait_until_started(first)
+    second = pool.submit(spin, scope="query")
+    with pytest.raises(JobCancelled):
+        first.result(timeout=30)
+    assert not second.cancelled()
+    second.cancel()
+    with pytest.raises(JobCancelled):
+        second.result(timeout=30)
+
+
+def test_jobs_of_other_scopes_keep_running(pool):
+    first = pool.submit(spin, scope="first")
+    second = pool.submit(spin, scope="second")
+    wait_until_started(first)
+    wait_until_started(second)
+    assert not first.cancelled()
+    for job in (first, second):
+        job.cancel()
+        with pytest.raises(JobCancelled):
+            job.result(timeout=30)
@@ -2,7 +2,7 @@ from pathlib import Path
 
 import gradio as gr
 import gradio.themes as themes
-from gradio_cosmograph import NetworkGraph
+from gradio_cosmograph import LayoutCache, NetworkGraph, merge_graphs
 
 from components import *
 from utils import *
@@ -61,6 +61,9 @@ MATCH (p2)-[:PUBLISHES]->(d:Document)
 RETURN p2.name, d.fileName
 """
 
+# Starting point for exploring the graph by clicking on nodes
+GET_PAYOR_GRAPH_CYPHER = "MATCH (p:Payor) WHERE p.name = 'uhc' RETURN p"
+
 LIST_PAYOR_DOCUMENTS_GRAPH_CYPHER = """
 MATCH (p1:Payor) WHERE p1.name = 'uhc' 
 MATCH (p1)-[o:OFFERS]->(p2:Plan)-[pub:PUBLISHES]->(d:Document)-[h]->(x)
@@ -158,7 +161,7 @@ with gr.Blocks(
                 with gr.Row(variant="panel"):
                     cypher_component = gr.Code(
                         label="Cypher Query",
-                        value=LIST_PAYOR_DOCUMENTS_GRAPH_CYPHER,
+                        value=GET_PAYOR_GRAPH_CYPHER,
                         # placeholder="Enter Cypher query here...",
                         interactive=True,
                         lines=5,
@@ -180,24 +183,48 @@ with gr.Blocks(
                     simulation_link_distance=10,
                     # simulation_link_spring=1.5,
                     min_height=500,
+                    # Clicked nodes pull in their neighbors, only the new ones are sent
+                    incremental_updates=True,
+                    # Node properties stay on the server until a node is clicked
+                    node_fields=["label"],
+                    # Nodes are colored through a palette instead of a color each
+                    node_color_by="label",
+                    # Large query results are decompressed off the main thread
+                    compression="gzip",
+                    # Re-running a query reuses the layout computed the first time
+                    precompute_layout=True,
+                    layout_cache=LayoutCache(
+                        directory=Path(__file__).parent / ".layout_cache"
+                    ),
                 )
                 dataframe = gr.Dataframe(visible=False)
 
+                # Handlers are async so requests waiting on Neo4j don't hold worker threads
+                @graph_component.select(inputs=graph_component, outputs=graph_component)
+                async def expand_selected_node(graph_data, evt: gr.SelectData):
+                    neighborhood = await aexpand_neighborhood(evt.value, hops=1)
+                    return merge_graphs(
+                        graph_data, neo4j_graph_to_cosmograph(neighborhood)
+                    )
+
                 @run_query_btn.click(
                     inputs=cypher_component,
                     outputs=[graph_component, dataframe],
                 )
-                def run_cypher_query(cypher_query):
-                    result = run_query(
+                async def run_cypher_query(cypher_query):
+                    # Identical read queries are answered from the cache, already converted
+                    result = await arun_cached_query(
                         query=cypher_query,
                         parameters={},
                     )
-                    if result["graph"]:
-                        graph_data = neo4j_graph_to_cosmograph(result["graph"])
+                    if result["graph"] is not None:
+                        graph_data = result["graph"]
                         # print(graph_data)
-                        return gr.update(value=graph_data, visible=True), gr.DataFrame(
-                            visible=False
-                        )
+                        return gr.update(
+                            value=graph_data,
+                            visible=True,
+                            node_palette=label_palette(graph_data.labels["label"]),
+                        ), gr.DataFrame(visible=False)
                     else:
                         return gr.update(visible=False), gr.Dataframe(
                             result["data"], visible=True
@@ -0,0 +1,57 @@
+"""
+Compares `neo4j_graph_to_cosmograph` with `neo4j_graph_to_columnar` on a synthetic
+result shaped like the Payor/Plan/Document graph, for the conversion alone and up to
+the JSON sent to the browser.
+
+    python benchmark_conversion.py --nodes 1000000
+"""
+
+import argparse
+import json
+import time
+
+import orjson
+from gradio_cosmograph import NetworkGraph
+
+from synthetic import payor_graph, to_neo4j
+from utils import neo4j_graph_to_columnar, neo4j_graph_to_cosmograph
+
+
+def best_of(fn, graph, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(graph)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    graph = to_neo4j(payor_graph(args.nodes))
+    component = NetworkGraph()
+    results = {"nodes": args.nodes}
+    for name, convert in (
+        ("dicts", neo4j_graph_to_cosmograph),
+        ("columnar", neo4j_graph_to_columnar),
+    ):
+        results[f"{name}_convert_seconds"] = round(
+            best_of(convert, graph, args.repeat), 3
+        )
+        results[f"{name}_to_wire_seconds"] = round(
+            best_of(
+                lambda graph: orjson.dumps(component.postprocess(convert(graph))),
+                graph,
+                args.repeat,
+            ),
+            3,
+        )
+    for stage in ("convert", "to_wire"):
+        results[f"{stage}_speedup"] = round(
+            results[f"dicts_{stage}_seconds"] / results[f"columnar_{stage}_seconds"], 1
+        )
+    print(json.dumps(results))
@@ -0,0 +1,205 @@
+"""
+Benchmarks the path of a graph from a Neo4j result to the browser, on synthetic graphs
+of several shapes and sizes, and records the results as JSON lines tagged with the
+current commit so they can be compared across commits.
+
+    python benchmark_suite.py --scales 1000 10000 100000 1000000
+    python benchmark_suite.py --compare <baseline commit>
+
+Each run appends one line to the output file. For every shape and size, it records:
+- the seconds `neo4j_graph_to_cosmograph` takes on a stand-in Neo4j result
+- for dictionary and columnar values, the seconds taken by `NetworkGraph.postprocess`,
+  by serializing the payload, and by `NetworkGraph.preprocess` on the payload sent
+  back
+- the payload size in bytes
+- the peak memory allocated from postprocess to serialized payload
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import orjson
+from gradio_cosmograph import NetworkGraph
+
+from synthetic import GENERATORS, to_columnar, to_neo4j, to_value
+from utils import neo4j_graph_to_cosmograph
+
+FORMATS = {"dicts": to_value, "columnar": to_columnar}
+
+
+def best_of(setup, fn, repeat: int) -> float:
+    """Fastest of `repeat` runs of `fn` on a fresh `setup()`, which isn't timed."""
+    timings = []
+    for _ in range(repeat):
+        argument = setup()
+        start = time.perf_counter()
+        fn(argument)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def peak_memory(setup, fn) -> int:
+    """Peak bytes allocated by `fn` on top of what `setup()` allocated."""
+    argument = setup()
+    tracemalloc.start()
+    try:
+        fn(argument)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark_shape(shape_name: str, node_count: int, repeat: int) -> list[dict]:
+    shape = GENERATORS[shape_name](node_count)
+    component = NetworkGraph()
+    metrics = {}
+
+    neo4j_graph = to_neo4j(shape)
+    metrics["neo4j_convert_seconds"] = best_of(
+        lambda: neo4j_graph, neo4j_graph_to_cosmograph, repeat
+    )
+
+    for format, build in FORMATS.items():
+
+        def setup():
+            return build(shape)
+
+        def to_wire(value):
+            return orjson.dumps(component.postprocess(value))
+
+        payload = component.postprocess(build(shape))
+        wire = orjson.dumps(payload)
+        metrics[f"{format}.postprocess_seconds"] = best_of(
+            setup, component.postprocess, repeat
+        )
+        metrics[f"{format}.serialize_seconds"] = best_of(
+            lambda: payload, orjson.dumps, repeat
+        )
+        metrics[f"{format}.preprocess_seconds"] = best_of(
+            lambda: orjson.loads(wire), component.preprocess, repeat
+        )
+        metrics[f"{format}.payload_bytes"] = len(wire)
+        metrics[f"{format}.peak_memory_bytes"] = peak_memory(setup, to_wire)
+
+    return [
+        {
+            "shape": shape_name,
+            "nodes": shape.node_count,
+            "links": shape.link_count,
+            "metric": metric,
+            "value": round(value, 6) if isinstance(value, float) else value,
+        }
+        for metric, value in metrics.items()
+    ]
+
+
+def git_commit() -> tuple[str | None, bool]:
+    """The current commit, and whether the working tree has uncommitted changes."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None, False
+    return commit, bool(status.strip())
+
+
+def load_runs(path: Path) -> list[dict]:
+    if not path.exists():
+        return []
+    with path.open() as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def compare(runs: list[dict], baseline: str, tolerance: float) -> bool:
+    """
+    Prints each metric of the latest run next to the latest run of the `baseline`
+    commit.
+
+    Returns:
+        whether no timing or size got worse by more than `tolerance`
+    """
+    baseline_runs = [
+        run for run in runs[:-1] if (run["commit"] or "").startswith(baseline)
+    ]
+    if not baseline_runs:
+        sys.exit(f"No run of {baseline!r} to compare the latest run with.")
+
+    def by_key(run):
+        return {
+            (result["shape"], result["nodes"], result["metric"]): result["value"]
+            for result in run["results"]
+        }
+
+    before, after = by_key(baseline_runs[-1]), by_key(runs[-1])
+    ok = True
+    for key in sorted(before.keys() & after.keys()):
+        ratio = after[key] / before[key] if before[key] else 1.0
+        regressed = ratio > tolerance
+        ok = ok and not regressed
+        print(
+            f"{key[0]:>10} {key[1]:>8} {key[2]:<32} {before[key]:>14} "
+            f"{after[key]:>14} {ratio:6.2f}x{'  REGRESSION' if regressed else ''}"
+        )
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--scales", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument(
+        "--shapes", nargs="+", choices=list(GENERATORS), default=list(GENERATORS)
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, default=Path("benchmark_results.jsonl"))
+    parser.add_argument(
+        "--compare",
+        metavar="COMMIT",
+        help="compare the latest recorded run with the latest run of COMMIT instead "
+        "of running the benchmarks",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=1.2,
+        help="ratio above which --compare reports a regression and exits with 1",
+    )
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(
+            0 if compare(load_runs(args.output), args.compare, args.tolerance) else 1
+        )
+
+    commit, dirty = git_commit()
+    results = []
+    for shape_name in args.shapes:
+        for node_count in args.scales:
+            shape_results = benchmark_shape(shape_name, node_count, args.repeat)
+            print(json.dumps(shape_results))
+            results.extend(shape_results)
+
+    run = {
+        "commit": commit,
+        "dirty": dirty,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    with args.output.open("a") as file:
+        file.write(json.dumps(run) + "\n")
@@ -0,0 +1,174 @@
+"""
+Synthetic graphs for the benchmarks. The shapes are generated with vectorized NumPy
+operations, then turned into stand-ins for Neo4j results or into graph values.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+from gradio_cosmograph import ColumnarGraph
+
+# Label -> property keys, a handful of schemas like a real database has
+SCHEMAS = {
+    "Payor": ("name", "state"),
+    "Plan": ("name", "planType", "year"),
+    "Document": ("fileName", "pages", "publishedAt"),
+    "Requirement": ("code", "description"),
+}
+
+
+@dataclass
+class GraphShape:
+    """Node labels and link endpoints (as node indices) of a synthetic graph."""
+
+    labels: np.ndarray
+    source: np.ndarray
+    target: np.ndarray
+    types: np.ndarray
+
+    @property
+    def node_count(self) -> int:
+        return len(self.labels)
+
+    @property
+    def link_count(self) -> int:
+        return len(self.source)
+
+
+def random_graph(node_count: int, degree: float = 1.0, seed: int = 0) -> GraphShape:
+    """Links between uniformly random nodes, `degree` links per node on average."""
+    rng = np.random.default_rng(seed)
+    link_count = int(node_count * degree)
+    labels = np.array(list(SCHEMAS))[np.arange(node_count) % len(SCHEMAS)]
+    return GraphShape(
+        labels,
+        rng.integers(0, node_count, link_count),
+        rng.integers(0, node_count, link_count),
+        np.full(link_count, "RELATES"),
+    )
+
+
+def scale_free_graph(node_count: int, skew: float = 3.0, seed: int = 0) -> GraphShape:
+    """
+    Each node links to an earlier one, picked with a bias towards the oldest nodes, which
+    approximates preferential attachment: a few hubs end up with most of the links.
+    """
+    rng = np.random.default_rng(seed)
+    source = np.arange(1, node_count)
+    target = (source * rng.random(node_count - 1) ** skew).astype(np.int64)
+    labels = np.array(list(SCHEMAS))[np.arange(node_count) % len(SCHEMAS)]
+    return GraphShape(labels, source, target, np.full(len(source), "CITES"))
+
+
+def payor_graph(
+    node_count: int,
+    plans_per_payor: int = 10,
+    documents_per_plan: int = 10,
+    seed: int = 0,
+) -> GraphShape:
+    """
+    The Payor -> Plan -> Document hierarchy of the demo database: payors OFFER plans,
+    which PUBLISH documents.
+    """
+    rng = np.random.default_rng(seed)
+    payors = max(1, node_count // (1 + plans_per_payor * (1 + documents_per_plan)))
+    plans = min(payors * plans_per_payor, node_count - payors)
+    documents = node_count - payors - plans
+    labels = np.repeat(["Payor", "Plan", "Document"], [payors, plans, documents])
+
+    plan_ids = np.arange(payors, payors + plans)
+    document_ids = np.arange(payors + plans, node_count)
+    offers_source = rng.integers(0, payors, plans)
+    publishes_source = payors + rng.integers(0, max(plans, 1), documents)
+    return GraphShape(
+        labels,
+        np.concatenate([offers_source, publishes_source]),
+        np.concatenate([plan_ids, document_ids]),
+        np.repeat(["OFFERS", "PUBLISHES"], [plans, documents]),
+    )
+
+
+GENERATORS = {
+    "random": random_graph,
+    "scale_free": scale_free_graph,
+    "payor": payor_graph,
+}
+
+
+class SyntheticNode:
+    """Exposes the parts of `neo4j.graph.Node` used by the converters."""
+
+    __slots__ = ("element_id", "labels", "_properties")
+
+    def __init__(self, element_id, labels, properties):
+        self.element_id = element_id
+        self.labels = labels
+        self._properties = properties
+
+    def keys(self):
+        return self._properties.keys()
+
+    def items(self):
+        return self._properties.items()
+
+    def __getitem__(self, key):
+        return self._properties[key]
+
+
+class SyntheticRelationship:
+    """Exposes the parts of `neo4j.graph.Relationship` used by the converters."""
+
+    __slots__ = ("nodes", "type", "_properties")
+
+    def __init__(self, start, end, type):
+        self.nodes = (start, end)
+        self.type = type
+        self._properties = {}
+
+    def items(self):
+        return self._properties.items()
+
+
+class SyntheticGraph:
+    """Exposes the parts of `neo4j.graph.Graph` used by the converters."""
+
+    def __init__(self, nodes, relationships):
+        self.nodes = nodes
+        self.relationships = relationships
+
+
+def to_neo4j(shape: GraphShape) -> SyntheticGraph:
+    """Builds a stand-in for the Neo4j result holding `shape`."""
+    label_sets = {label: frozenset([label]) for label in SCHEMAS}
+    nodes = [
+        SyntheticNode(
+            f"4:db:{i}",
+            label_sets[label],
+            {key: f"{key}-{i}" for key in SCHEMAS[label]},
+        )
+        for i, label in enumerate(shape.labels.tolist())
+    ]
+    relationships = [
+        SyntheticRelationship(nodes[source], nodes[target], type)
+        for source, target, type in zip(
+            shape.source.tolist(), shape.target.tolist(), shape.types.tolist()
+        )
+    ]
+    return SyntheticGraph(nodes, relationships)
+
+
+def to_columnar(shape: GraphShape) -> ColumnarGraph:
+    """Builds a ColumnarGraph with the labels and relationship types of `shape`."""
+    return ColumnarGraph(
+        shape.source,
+        shape.target,
+        ids=np.char.add("4:db:", np.arange(shape.node_count).astype(str)),
+        labels={"label": shape.labels},
+        link_labels={"type": shape.types},
+        indices=True,
+    )
+
+
+def to_value(shape: GraphShape) -> dict:
+    """Builds a graph value with 'nodes' and 'links' lists."""
+    return to_columnar(shape).to_value()
@@ -1,12 +1,31 @@
+import asyncio
 import colorsys
+import functools
 import hashlib
 import os
-from typing import Any, Dict, List
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List
+import numpy as np
+import orjson
 import pandas as pd
 
 from dotenv import load_dotenv
-from neo4j import GraphDatabase, Transaction
-from neo4j.graph import Graph, Node
+from gradio_cosmograph import ColumnarGraph
+from gradio_cosmograph.columnar import pack_colors
+from neo4j import (
+    AsyncDriver,
+    AsyncGraphDatabase,
+    AsyncManagedTransaction,
+    Driver,
+    GraphDatabase,
+    SummaryCounters,
+    Transaction,
+)
+from neo4j.graph import Graph, Node, Path, Relationship
 
 load_dotenv()
 
@@ -16,9 +35,64 @@ NEO4J_USERNAME = os.getenv("NEO4J_USERNAME", "neo4j")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "password")
 NEO4J_DATABASE = os.getenv("NEO4J_DATABASE", "neo4j")
 
-NEO4J_DRIVER = GraphDatabase.driver(
-    NEO4J_URI, auth=(NEO4J_USERNAME, NEO4J_PASSWORD), database=NEO4J_DATABASE
-)
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "300"))
+QUERY_CACHE_MAX_BYTES = int(os.getenv("QUERY_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "100"))
+# Seconds to wait for a free connection when the pool is exhausted
+NEO4J_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", "60"))
+# Connections opened when the async driver is created, so first queries don't pay for them
+NEO4J_WARMUP_CONNECTIONS = int(os.getenv("NEO4J_WARMUP_CONNECTIONS", "4"))
+
+# Drivers are created on first use, so importing this module doesn't need a live database
+_driver: Driver | None = None
+_driver_lock = threading.Lock()
+_async_driver: AsyncDriver | None = None
+_async_driver_lock = asyncio.Lock()
+
+
+def _driver_config() -> Dict[str, Any]:
+    return {
+        "auth": (NEO4J_USERNAME, NEO4J_PASSWORD),
+        "database": NEO4J_DATABASE,
+        "max_connection_pool_size": NEO4J_MAX_POOL_SIZE,
+        "connection_acquisition_timeout": NEO4J_ACQUISITION_TIMEOUT,
+    }
+
+
+def get_driver() -> Driver:
+    """Return the synchronous driver, creating it on first use."""
+    global _driver
+    with _driver_lock:
+        if _driver is None:
+            driver = GraphDatabase.driver(NEO4J_URI, **_driver_config())
+            driver.verify_connectivity()
+            _driver = driver
+        return _driver
+
+
+async def _warm_up(driver: AsyncDriver) -> None:
+    async def open_connection() -> None:
+        async with driver.session() as session:
+            await session.run("RETURN 1")
+
+    await asyncio.gather(
+        *(
+            open_connection()
+            for _ in range(min(NEO4J_WARMUP_CONNECTIONS, NEO4J_MAX_POOL_SIZE))
+        )
+    )
+
+
+async def get_async_driver() -> AsyncDriver:
+    """Return the async driver, creating it and opening its first connections on first use."""
+    global _async_driver
+    async with _async_driver_lock:
+        if _async_driver is None:
+            driver = AsyncGraphDatabase.driver(NEO4J_URI, **_driver_config())
+            await driver.verify_connectivity()
+            await _warm_up(driver)
+            _async_driver = driver
+        return _async_driver
 
 
 def _read_graph(tx: Transaction, query: str, params: dict[str, Any]) -> Graph:
@@ -45,13 +119,75 @@ def _read_dataframe(
     return df
 
 
+def _has_graph_values(values: Iterable[Any]) -> bool:
+    """Whether record values hold nodes, relationships or paths, also inside lists and maps"""
+    for value in values:
+        if isinstance(value, (Node, Relationship, Path)):
+            return True
+        if isinstance(value, (list, tuple)) and _has_graph_values(value):
+            return True
+        if isinstance(value, dict) and _has_graph_values(value.values()):
+            return True
+    return False
+
+
+def _read_result(
+    tx: Transaction, query: str, params: dict[str, Any]
+) -> tuple[Graph | None, pd.DataFrame | None]:
+    """
+    Execute a read query once and return its graph projection if its first record has any
+    nodes or relationships, otherwise its tabular projection
+    """
+    raw_results = tx.run(query, params if params else {})
+    first = raw_results.peek()
+    if first is not None and _has_graph_values(first.values()):
+        # Nodes and relationships are collected into the result's graph while records are
+        # read, the records themselves aren't kept
+        for _ in raw_results:
+            pass
+        return raw_results.graph(), None
+    return None, pd.DataFrame(list(raw_results), columns=raw_results.keys())
+
+
+async def _aread_result(
+    tx: AsyncManagedTransaction, query: str, params: dict[str, Any]
+) -> tuple[Graph | None, pd.DataFrame | None]:
+    """Async version of `_read_result`"""
+    raw_results = await tx.run(query, params if params else {})
+    first = await raw_results.peek()
+    if first is not None and _has_graph_values(first.values()):
+        async for _ in raw_results:
+            pass
+        return await raw_results.graph(), None
+    records = [record async for record in raw_results]
+    return None, pd.DataFrame(records, columns=await raw_results.keys())
+
+
+async def _aread_graph(
+    tx: AsyncManagedTransaction, query: str, params: dict[str, Any]
+) -> Graph:
+    """Async version of `_read_graph`"""
+    raw_results = await tx.run(query, params if params else {})
+    return await raw_results.graph()
+
+
 def run_query(query: str, parameters: Dict[str, Any] = {}) -> Dict[str, Any]:
-    with NEO4J_DRIVER.session() as session:
-        graph = session.execute_read(_read_graph, query, parameters)
-        if len(graph.nodes) == 0 or len(graph.relationships) == 0:
-            graph = None
+    with get_driver().session() as session:
+        # A single pass over the results, the frame is only built for non-graph results
+        # (a single node is still a graph, e.g. the starting point of an exploration)
+        graph, data = session.execute_read(_read_result, query, parameters)
+
+        return {
+            "data": data,
+            "graph": graph,
+        }
 
-        data = session.execute_read(_read_dataframe, query, parameters)
+
+async def arun_query(query: str, parameters: Dict[str, Any] = {}) -> Dict[str, Any]:
+    """Async version of `run_query`, waiting on the database without holding a thread"""
+    driver = await get_async_driver()
+    async with driver.session() as session:
+        graph, data = await session.execute_read(_aread_result, query, parameters)
 
         return {
             "data": data,
@@ -59,6 +195,45 @@ def run_query(query: str, parameters: Dict[str, Any] = {}) -> Dict[str, Any]:
         }
 
 
+def _neighborhood_query(hops: int) -> str:
+    # Variable length bounds can't be query parameters
+    return f"""
+    MATCH (n) WHERE elementId(n) = $node_id
+    OPTIONAL MATCH path = (n)-[*1..{int(hops)}]-()
+    RETURN n, path LIMIT $limit
+    """
+
+
+def expand_neighborhood(node_id: str, hops: int = 1, limit: int = 500) -> Graph:
+    """
+    Fetch the k-hop neighborhood of a single node.
+
+    Args:
+        node_id: element id of the node, as used for node ids by `neo4j_graph_to_cosmograph`
+        hops: maximum path length from the node
+        limit: maximum number of paths returned
+
+    Returns:
+        Graph: the node, its neighbors and the relationships between them
+    """
+    with get_driver().session() as session:
+        return session.execute_read(
+            _read_graph, _neighborhood_query(hops), {"node_id": node_id, "limit": limit}
+        )
+
+
+async def aexpand_neighborhood(node_id: str, hops: int = 1, limit: int = 500) -> Graph:
+    """Async version of `expand_neighborhood`"""
+    driver = await get_async_driver()
+    async with driver.session() as session:
+        return await session.execute_read(
+            _aread_graph,
+            _neighborhood_query(hops),
+            {"node_id": node_id, "limit": limit},
+        )
+
+
+@functools.lru_cache(maxsize=None)
 def get_node_label_color(label: str) -> str:
     """Generate a consistent color for a given node label."""
     # Use hash of label to generate a consistent hue
@@ -70,6 +245,19 @@ def get_node_label_color(label: str) -> str:
     return f"#{int(rgb[0] * 255):02x}{int(rgb[1] * 255):02x}{int(rgb[2] * 255):02x}"
 
 
+@functools.lru_cache(maxsize=4096)
+def _display_name_key(keys: tuple[str, ...]) -> str | None:
+    """Resolve the display name property once per set of property keys."""
+    # First check for properties containing 'name' (case insensitive)
+    name_props = [key for key in keys if "name" in key.lower()]
+    if name_props:
+        # If multiple matches, prefer exact 'name' match, otherwise take first
+        if "name" in name_props:
+            return "name"
+        return name_props[0]
+    return None
+
+
 def get_node_display_name(node: Node) -> str:
     """
     Extract a display name from node properties, prioritizing properties containing 'name',
@@ -81,13 +269,9 @@ def get_node_display_name(node: Node) -> str:
     Returns:
         str: Display name for the node
     """
-    # First check for properties containing 'name' (case insensitive)
-    name_props = [key for key in node.keys() if "name" in key.lower()]
-    if name_props:
-        # If multiple matches, prefer exact 'name' match, otherwise take first
-        if "name" in name_props:
-            return str(node["name"])
-        return str(node[name_props[0]])
+    name_key = _display_name_key(tuple(node.keys()))
+    if name_key is not None:
+        return str(node[name_key])
 
     # If no name property found, try using the node label
     if node.labels:
@@ -108,19 +292,19 @@ def neo4j_graph_to_cosmograph(graph: Graph) -> dict:
         dict: Dictionary containing 'nodes' and 'links' lists compatible with Cosmograph
     """
     nodes = []
-    node_id_map = {}  # Map Neo4j element_ids to array indices
+    node_ids = set()
 
     # Process nodes
-    for i, node in enumerate(graph.nodes):
-        # Store the mapping of Neo4j element_id to array index
-        node_id_map[node.element_id] = i
+    for node in graph.nodes:
+        node_ids.add(node.element_id)
 
         # Get the first label (if any) for color assignment
         label = next(iter(node.labels)) if node.labels else "Unknown"
 
         # Create node object
         node_obj = {
-            "id": str(i),  # Cosmograph needs string IDs
+            # Element ids are stable across queries, so results can be merged
+            "id": node.element_id,
             "label": label,
             "displayName": get_node_display_name(node),
             "color": get_node_label_color(label),
@@ -138,12 +322,12 @@ def neo4j_graph_to_cosmograph(graph: Graph) -> dict:
         if (
             start_node
             and end_node
-            and start_node.element_id in node_id_map
-            and end_node.element_id in node_id_map
+            and start_node.element_id in node_ids
+            and end_node.element_id in node_ids
         ):
             link_obj = {
-                "source": str(node_id_map[start_node.element_id]),
-                "target": str(node_id_map[end_node.element_id]),
+                "source": start_node.element_id,
+                "target": end_node.element_id,
                 "type": rel.type,
                 "properties": dict(rel.items()),
                 # "color": "#000000",  # Default link color
@@ -152,3 +336,310 @@ def neo4j_graph_to_cosmograph(graph: Graph) -> dict:
             links.append(link_obj)
 
     return {"nodes": nodes, "links": links}
+
+
+def neo4j_graph_to_columnar(graph: Graph, colors: bool = True) -> ColumnarGraph:
+    """
+    Convert a Neo4j Graph object to a ColumnarGraph, much faster than
+    `neo4j_graph_to_cosmograph` on large results. Colors are computed once per label
+    and display name properties are resolved once per property schema. Properties are
+    not included.
+
+    Args:
+        graph: Neo4j Graph object containing nodes and relationships
+        colors: whether to include a color per node. Leave them out when the graph is
+            displayed with `node_color_by="label"` and a `label_palette`
+
+    Returns:
+        ColumnarGraph: the nodes' ids, labels, display names and colors and the
+        relationships' types as columns
+    """
+    nodes = list(graph.nodes)
+    ids = [node.element_id for node in nodes]
+    index = dict(zip(ids, range(len(ids))))
+
+    # Results hold a handful of label sets and property schemas shared by many nodes,
+    # each is resolved once
+    label_of: Dict[frozenset, str] = {}
+    name_key_of: Dict[tuple, str | None] = {}
+    labels = []
+    display_names = []
+    for node in nodes:
+        node_labels = node.labels
+        label = label_of.get(node_labels)
+        if label is None:
+            label = label_of[node_labels] = next(iter(node_labels), "Unknown")
+        labels.append(label)
+
+        keys = tuple(node.keys())
+        if keys not in name_key_of:
+            name_key_of[keys] = _display_name_key(keys)
+        name_key = name_key_of[keys]
+        if name_key is not None:
+            display_names.append(str(node[name_key]))
+        elif node_labels:
+            display_names.append(label)
+        else:
+            display_names.append(f"Node-{node.element_id}")
+
+    color = None
+    if colors:
+        distinct_labels = sorted(set(label_of.values()))
+        palette = dict(
+            zip(
+                distinct_labels,
+                pack_colors([get_node_label_color(label) for label in distinct_labels]),
+            )
+        )
+        color = np.array([palette[label] for label in labels], dtype=np.uint32)
+
+    # Relationships to nodes outside the result are dropped
+    get_index = index.get
+    relationships = list(graph.relationships)
+    endpoints = np.array(
+        [
+            (
+                get_index(start.element_id, -1) if start is not None else -1,
+                get_index(end.element_id, -1) if end is not None else -1,
+            )
+            for start, end in (rel.nodes for rel in relationships)
+        ],
+        dtype=np.int64,
+    ).reshape(-1, 2)
+    kept = (endpoints >= 0).all(axis=1)
+    endpoints = endpoints[kept]
+    types = np.array([rel.type for rel in relationships], dtype=str)[kept]
+
+    # Labels and types repeat a handful of values, they are sent dictionary-encoded
+    return ColumnarGraph(
+        endpoints[:, 0],
+        endpoints[:, 1],
+        ids=ids,
+        color=color,
+        labels={"label": labels, "displayName": display_names},
+        link_labels={"type": types},
+        indices=True,
+    )
+
+
+def label_palette(labels: Iterable[str]) -> Dict[str, str]:
+    """
+    Colors of the given node labels, for `NetworkGraph(node_palette=...)`. Displaying
+    graphs with `node_color_by="label"` and this palette gives the same colors as the
+    per-node ones of the converters, without sending a color per node.
+    """
+    return {label: get_node_label_color(label) for label in set(labels)}
+
+
+class QueryCache:
+    """
+    Cache of query results with a time to live and a memory budget, evicting the least
+    recently used results first. Concurrent requests for the same key share a single
+    computation. `run_write_query` invalidates it after writing to the database, changes
+    made by other clients show after at most `ttl` seconds.
+    """
+
+    def __init__(self, ttl: float, max_bytes: int):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        # key -> (expiry time, size in bytes, value)
+        self._entries: OrderedDict[Hashable, tuple[float, int, Any]] = OrderedDict()
+        self._in_flight: Dict[Hashable, Future] = {}
+        self._size = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _claim(self, key: Hashable) -> tuple[Any, Future | None, bool, int]:
+        """
+        Return the cached value for `key`, or the future of its computation and whether
+        the caller is the one who has to run it.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                return entry[2], None, False, self._generation
+            if entry is not None:
+                self._remove(key)
+            future = self._in_flight.get(key)
+            if future is not None:
+                return None, future, False, self._generation
+            future = self._in_flight[key] = Future()
+            return None, future, True, self._generation
+
+    def _fail(self, key: Hashable, future: Future, error: BaseException) -> None:
+        with self._lock:
+            self._in_flight.pop(key, None)
+        future.set_exception(error)
+
+    def _store(
+        self, key: Hashable, future: Future, generation: int, value: Any
+    ) -> None:
+        size = _payload_size(value)
+        with self._lock:
+            self._in_flight.pop(key, None)
+            # Results read before an invalidation may already be stale
+            if generation == self._generation and size <= self.max_bytes:
+                if key in self._entries:
+                    self._remove(key)
+                self._entries[key] = (time.monotonic() + self.ttl, size, value)
+                self._size += size
+                while self._size > self.max_bytes:
+                    self._remove(next(iter(self._entries)))
+        future.set_result(value)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        value, future, leader, generation = self._claim(key)
+        if future is None:
+            return value
+        if not leader:
+            return future.result()
+        try:
+            value = compute()
+        except BaseException as error:
+            self._fail(key, future, error)
+            raise
+        self._store(key, future, generation, value)
+        return value
+
+    async def aget_or_compute(
+        self, key: Hashable, compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Async version of `get_or_compute`, sharing its cache and in-flight queries"""
+        value, future, leader, generation = self._claim(key)
+        if future is None:
+            return value
+        if not leader:
+            return await asyncio.wrap_future(future)
+        try:
+            value = await compute()
+        except BaseException as error:
+            self._fail(key, future, error)
+            raise
+        self._store(key, future, generation, value)
+        return value
+
+    def _remove(self, key: Hashable) -> None:
+        self._size -= self._entries.pop(key)[1]
+
+    def invalidate(self) -> None:
+        """Drop every cached result, to be called after writing to the database."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self._generation += 1
+
+
+def _payload_size(value: Dict[str, Any]) -> int:
+    """Approximate memory footprint of a cached query payload."""
+    size = 0
+    if isinstance(value.get("graph"), ColumnarGraph):
+        size += value["graph"].nbytes
+    elif value.get("graph") is not None:
+        size += len(orjson.dumps(value["graph"], default=str))
+    if value.get("data") is not None:
+        size += int(value["data"].memory_usage(deep=True).sum())
+    return size
+
+
+QUERY_CACHE = QueryCache(ttl=QUERY_CACHE_TTL, max_bytes=QUERY_CACHE_MAX_BYTES)
+
+# Quoted strings are kept as is, whitespace anywhere else is collapsed
+_CYPHER_STRING = re.compile(r"""('(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")""")
+
+
+def normalize_query(query: str) -> str:
+    """Normalize the whitespace and the trailing semicolon of a Cypher query."""
+    parts = _CYPHER_STRING.split(query.strip().rstrip(";"))
+    return "".join(
+        part if i % 2 else re.sub(r"\s+", " ", part) for i, part in enumerate(parts)
+    ).strip()
+
+
+def _query_key(query: str, parameters: Dict[str, Any]) -> Hashable:
+    return (
+        normalize_query(query),
+        orjson.dumps(parameters, option=orjson.OPT_SORT_KEYS, default=str),
+        NEO4J_DATABASE,
+    )
+
+
+def run_cached_query(query: str, parameters: Dict[str, Any] = {}) -> Dict[str, Any]:
+    """
+    Same as `run_query`, served from `QUERY_CACHE` when possible. Graph results are
+    cached already converted, so 'graph' holds the output of `neo4j_graph_to_columnar`,
+    without node colors: display it with a `label_palette`.
+    Cached payloads are shared, callers must not modify them.
+    """
+
+    def compute() -> Dict[str, Any]:
+        result = run_query(query, parameters)
+        graph = result["graph"]
+        return {
+            "data": result["data"],
+            "graph": neo4j_graph_to_columnar(graph, colors=False)
+            if graph is not None
+            else None,
+        }
+
+    return QUERY_CACHE.get_or_compute(_query_key(query, parameters), compute)
+
+
+async def arun_cached_query(
+    query: str, parameters: Dict[str, Any] = {}
+) -> Dict[str, Any]:
+    """Async version of `run_cached_query`"""
+
+    async def compute() -> Dict[str, Any]:
+        result = await arun_query(query, parameters)
+        graph = result["graph"]
+        return {
+            "data": result["data"],
+            # Converting is CPU bound, keep it off the event loop
+            "graph": await asyncio.to_thread(
+                neo4j_graph_to_columnar, graph, colors=False
+            )
+            if graph is not None
+            else None,
+        }
+
+    return await QUERY_CACHE.aget_or_compute(_query_key(query, parameters), compute)
+
+
+def _write(tx: Transaction, query: str, params: dict[str, Any]) -> SummaryCounters:
+    """Execute a write query and return the counters of what it changed"""
+    raw_results = tx.run(query, params if params else {})
+    return raw_results.consume().counters
+
+
+async def _awrite(
+    tx: AsyncManagedTransaction, query: str, params: dict[str, Any]
+) -> SummaryCounters:
+    """Async version of `_write`"""
+    raw_results = await tx.run(query, params if params else {})
+    return (await raw_results.consume()).counters
+
+
+def run_write_query(query: str, parameters: Dict[str, Any] = {}) -> SummaryCounters:
+    """
+    Run a query that changes the database, then invalidate `QUERY_CACHE`, whose results
+    may no longer match it.
+    """
+    try:
+        with get_driver().session() as session:
+            return session.execute_write(_write, query, parameters)
+    finally:
+        # Also after a failure, the transaction may have been committed before it
+        QUERY_CACHE.invalidate()
+
+
+async def arun_write_query(
+    query: str, parameters: Dict[str, Any] = {}
+) -> SummaryCounters:
+    """Async version of `run_write_query`"""
+    driver = await get_async_driver()
+    try:
+        async with driver.session() as session:
+            return await session.execute_write(_awrite, query, parameters)
+    finally:
+        QUERY_CACHE.invalidate()
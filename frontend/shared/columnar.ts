@@ -0,0 +1,107 @@
+import type { CategoricalColumn, ColumnarValue, EncodedColumn, GraphData, Link, Node, NumericColumn } from './types';
+
+type Column = Float32Array | Uint32Array | string[] | { categories: string[]; codes: Float32Array | Uint32Array };
+
+// Decode a base64 buffer into a typed array view without going through JSON numbers
+export function decodeBuffer(buffer: NumericColumn): Float32Array | Uint32Array {
+  if (buffer instanceof Float32Array || buffer instanceof Uint32Array) return buffer;
+  const binary = atob(buffer.data);
+  const bytes = new Uint8Array(binary.length);
+  for (let i = 0; i < binary.length; i++) {
+    bytes[i] = binary.charCodeAt(i);
+  }
+  return buffer.dtype === 'float32' ? new Float32Array(bytes.buffer) : new Uint32Array(bytes.buffer);
+}
+
+export function isCategorical(column: EncodedColumn): column is CategoricalColumn {
+  return !Array.isArray(column) && 'categories' in column;
+}
+
+// Packed 0xRRGGBBAA colors are turned into CSS strings once per distinct value
+function colorColumn(packed: Uint32Array): (index: number) => string {
+  const cache = new Map<number, string>();
+  return (index) => {
+    const value = packed[index];
+    let color = cache.get(value);
+    if (color === undefined) {
+      color = `#${value.toString(16).padStart(8, '0')}`;
+      cache.set(value, color);
+    }
+    return color;
+  };
+}
+
+// Build a prototype whose getters read straight from the columns, so every
+// node or link object only stores its own index (and id). Assigning a column,
+// e.g. the x and y positions a warm start seeds, gives the object its own value
+// and leaves the column, and the other objects, as they are
+function columnPrototype(columns: Record<string, Column>): object {
+  const prototype = {};
+  for (const [key, column] of Object.entries(columns)) {
+    let read: (index: number) => unknown;
+    if (key === 'color' && column instanceof Uint32Array) {
+      read = colorColumn(column);
+    } else if ('categories' in column) {
+      const { categories, codes } = column;
+      read = (index) => categories[codes[index]];
+    } else {
+      read = (index) => column[index];
+    }
+    Object.defineProperty(prototype, key, {
+      get(this: { index: number }) {
+        return read(this.index);
+      },
+      set(this: object, value: unknown) {
+        Object.defineProperty(this, key, { value, writable: true, enumerable: true, configurable: true });
+      },
+      enumerable: true,
+    });
+  }
+  return prototype;
+}
+
+function decodeColumns(
+  encoded: Record<string, EncodedColumn | undefined>,
+  skip: string[],
+): Record<string, Column> {
+  const columns: Record<string, Column> = {};
+  for (const [key, column] of Object.entries(encoded)) {
+    if (column === undefined || skip.includes(key)) continue;
+    if (Array.isArray(column)) {
+      columns[key] = column;
+    } else if (isCategorical(column)) {
+      columns[key] = { categories: column.categories, codes: decodeBuffer(column.codes) };
+    } else {
+      columns[key] = decodeBuffer(column);
+    }
+  }
+  return columns;
+}
+
+// Cosmograph v1 only takes arrays of node and link objects in setData, so one
+// object is still created per node and link, reading its fields from the columns
+export function columnarToGraph(value: ColumnarValue): GraphData {
+  const ids = value.nodes.id;
+  const nodePrototype = columnPrototype(decodeColumns(value.nodes, ['id']));
+  const nodes: Node[] = new Array(value.nodeCount);
+  for (let i = 0; i < value.nodeCount; i++) {
+    const node = Object.create(nodePrototype);
+    node.id = ids ? ids[i] : String(i);
+    node.index = i;
+    nodes[i] = node;
+  }
+
+  const source = decodeBuffer(value.links.source);
+  const target = decodeBuffer(value.links.target);
+  const linkPrototype = columnPrototype(decodeColumns(value.links, ['source', 'target']));
+  const links: Link[] = new Array(value.linkCount);
+  for (let i = 0; i < value.linkCount; i++) {
+    const link = Object.create(linkPrototype);
+    link.source = nodes[source[i]].id;
+    link.target = nodes[target[i]].id;
+    link.index = i;
+    links[i] = link;
+  }
+
+  return { nodes, links, version: value.version };
+}
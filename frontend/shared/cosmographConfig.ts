@@ -1,6 +1,34 @@
 import type { CosmographConfigInterface } from '@cosmograph/cosmograph';
 import type { Node, Link } from './types';
 
+// Colors given to categories missing from the palette, picked by hashing the category
+const CATEGORY_COLORS = [
+  '#4e79a7', '#f28e2b', '#e15759', '#76b7b2', '#59a14f',
+  '#edc948', '#b07aa1', '#ff9da7', '#9c755f', '#bab0ac',
+];
+
+function hashedColor(category: string): string {
+  let hash = 0;
+  for (let i = 0; i < category.length; i++) {
+    hash = (hash * 31 + category.charCodeAt(i)) | 0;
+  }
+  return CATEGORY_COLORS[Math.abs(hash) % CATEGORY_COLORS.length];
+}
+
+// Color items by a categorical field through a palette, so recoloring is a config change
+// rather than a new value
+function paletteColor<T extends Node | Link>(
+  field: string,
+  palette: Record<string, string> | null | undefined,
+  fallback: string,
+): (item: T) => string {
+  return (item) => {
+    const category = item[field];
+    if (category === undefined || category === null) return item.color || fallback;
+    return palette?.[category] ?? item.color ?? hashedColor(String(category));
+  };
+}
+
 // Base default configuration that will be merged with user options
 export const defaultConfig: Partial<CosmographConfigInterface<Node, Link>> = {
   // Visual configuration
@@ -75,6 +103,8 @@ export interface GraphProps {
   focusedNodeRingColor?: string;
   renderHoveredNodeRing?: boolean;
   hoveredNodeRingColor?: string;
+  nodeColorBy?: string | null;
+  nodePalette?: Record<string, string> | null;
 
   // Link appearance
   renderLinks?: boolean;
@@ -87,6 +117,8 @@ export interface GraphProps {
   curvedLinkControlPointDistance?: number;
   linkVisibilityMinTransparency?: number;
   linkVisibilityDistanceRange?: [number, number];
+  linkColorBy?: string | null;
+  linkPalette?: Record<string, string> | null;
 
   // Label configuration
   nodeLabelKey?: string;
@@ -115,6 +147,9 @@ export interface GraphProps {
   simulationRepulsionFromMouse?: number;
   useQuadtree?: boolean;
   repulsionQuadtreeLevels?: number;
+
+  // Events
+  onNodeClick?: (node: Node, index: number) => void;
 }
 
 // Function to merge default config with user props
@@ -131,6 +166,9 @@ export function createConfig(props: GraphProps): CosmographConfigInterface<Node,
     focusedNodeRingColor: props.focusedNodeRingColor ?? defaultConfig.focusedNodeRingColor,
     renderHoveredNodeRing: props.renderHoveredNodeRing ?? defaultConfig.renderHoveredNodeRing,
     hoveredNodeRingColor: props.hoveredNodeRingColor ?? defaultConfig.hoveredNodeRingColor,
+    nodeColor: props.nodeColorBy
+      ? paletteColor<Node>(props.nodeColorBy, props.nodePalette, '#b3b3b3')
+      : defaultConfig.nodeColor,
 
     renderLinks: props.renderLinks ?? defaultConfig.renderLinks,
     linkArrows: props.linkArrows ?? defaultConfig.linkArrows,
@@ -142,6 +180,9 @@ export function createConfig(props: GraphProps): CosmographConfigInterface<Node,
     curvedLinkControlPointDistance: props.curvedLinkControlPointDistance ?? defaultConfig.curvedLinkControlPointDistance,
     linkVisibilityMinTransparency: props.linkVisibilityMinTransparency ?? defaultConfig.linkVisibilityMinTransparency,
     linkVisibilityDistance: props.linkVisibilityDistanceRange ?? defaultConfig.linkVisibilityDistance,
+    linkColor: props.linkColorBy
+      ? paletteColor<Link>(props.linkColorBy, props.linkPalette, '#666666')
+      : defaultConfig.linkColor,
 
     nodeLabelAccessor: props.nodeLabelKey
       ? (node: Node) => node[props.nodeLabelKey as keyof Node]?.toString() ?? node.id
@@ -169,5 +210,9 @@ export function createConfig(props: GraphProps): CosmographConfigInterface<Node,
     simulationRepulsionFromMouse: props.simulationRepulsionFromMouse ?? defaultConfig.simulationRepulsionFromMouse,
     useQuadtree: props.useQuadtree ?? defaultConfig.useQuadtree,
     repulsionQuadtreeLevels: props.repulsionQuadtreeLevels ?? defaultConfig.repulsionQuadtreeLevels,
+
+    onClick: (node?: Node, index?: number) => {
+      if (node && index !== undefined) props.onNodeClick?.(node, index);
+    },
   } as CosmographConfigInterface<Node, Link>;
 }
\ No newline at end of file
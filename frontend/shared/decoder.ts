@@ -0,0 +1,37 @@
+import type { CompressedValue, GraphValue } from './types';
+
+export type DecodedValue = Exclude<GraphValue, CompressedValue>;
+
+type Pending = { resolve: (value: DecodedValue) => void; reject: (error: Error) => void };
+
+// One worker is shared by every graph on the page, created on the first compressed value
+let worker: Worker | undefined;
+let nextId = 0;
+const pending = new Map<number, Pending>();
+
+function getWorker(): Worker {
+  if (!worker) {
+    worker = new Worker(new URL('./decoder.worker.ts', import.meta.url), { type: 'module' });
+    worker.onmessage = (event: MessageEvent<{ id: number; value?: DecodedValue; error?: string }>) => {
+      const { id, value, error } = event.data;
+      const request = pending.get(id);
+      if (!request) return;
+      pending.delete(id);
+      if (error !== undefined || !value) request.reject(new Error(error));
+      else request.resolve(value);
+    };
+  }
+  return worker;
+}
+
+export function isCompressed(value: GraphValue): value is CompressedValue {
+  return 'format' in value && value.format === 'gzip';
+}
+
+export function decodeCompressed(value: CompressedValue): Promise<DecodedValue> {
+  const id = nextId++;
+  return new Promise((resolve, reject) => {
+    pending.set(id, { resolve, reject });
+    getWorker().postMessage({ id, data: value.data });
+  });
+}
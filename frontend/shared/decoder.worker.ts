@@ -0,0 +1,50 @@
+import { decodeBuffer, isCategorical } from './columnar';
+import type { GraphValue } from './types';
+
+// Decompresses and parses compressed values off the main thread, so loading a large
+// graph doesn't freeze the page
+
+interface DecodeRequest {
+  id: number;
+  data: string;
+}
+
+function base64ToBytes(data: string): Uint8Array {
+  const binary = atob(data);
+  const bytes = new Uint8Array(binary.length);
+  for (let i = 0; i < binary.length; i++) {
+    bytes[i] = binary.charCodeAt(i);
+  }
+  return bytes;
+}
+
+// Decode the buffers of a columnar value here too, and transfer them rather than copy them
+function decodeColumnar(value: GraphValue): ArrayBuffer[] {
+  if (!('format' in value) || value.format !== 'columnar') return [];
+  const transfer: ArrayBuffer[] = [];
+  for (const columns of [value.nodes, value.links] as Record<string, any>[]) {
+    for (const [key, column] of Object.entries(columns)) {
+      if (column === undefined || Array.isArray(column)) continue;
+      const decoded = decodeBuffer(isCategorical(column) ? column.codes : column);
+      if (isCategorical(column)) {
+        column.codes = decoded;
+      } else {
+        columns[key] = decoded;
+      }
+      transfer.push(decoded.buffer as ArrayBuffer);
+    }
+  }
+  return transfer;
+}
+
+self.onmessage = async (event: MessageEvent<DecodeRequest>) => {
+  const { id, data } = event.data;
+  try {
+    const stream = new Blob([base64ToBytes(data)]).stream().pipeThrough(new DecompressionStream('gzip'));
+    const value: GraphValue = JSON.parse(await new Response(stream).text());
+    const transfer = decodeColumnar(value);
+    self.postMessage({ id, value }, { transfer });
+  } catch (error) {
+    self.postMessage({ id, error: String(error) });
+  }
+};
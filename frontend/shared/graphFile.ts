@@ -0,0 +1,69 @@
+import type { CategoricalColumn, ColumnarValue, EncodedColumn, FileColumn, FileValue, GraphValue } from './types';
+
+export function isGraphFile(value: GraphValue): value is FileValue {
+  return 'format' in value && value.format === 'file';
+}
+
+async function fetchRange(url: string, column: FileColumn): Promise<ArrayBuffer> {
+  if (column.bytes === 0) return new ArrayBuffer(0);
+  const response = await fetch(url, {
+    headers: { Range: `bytes=${column.offset}-${column.offset + column.bytes - 1}` },
+  });
+  if (!response.ok) throw new Error(`Failed to fetch graph file ${url}: ${response.status}`);
+  const buffer = await response.arrayBuffer();
+  // A server ignoring the range sends the whole file
+  return response.status === 206 ? buffer : buffer.slice(column.offset, column.offset + column.bytes);
+}
+
+// Fixed width UTF-32 strings, padded with zeros, as NumPy stores them
+function decodeStrings(buffer: ArrayBuffer, width: number): string[] {
+  const codes = new Uint32Array(buffer);
+  const strings: string[] = new Array(width ? codes.length / width : 0);
+  for (let i = 0; i < strings.length; i++) {
+    let end = (i + 1) * width;
+    while (end > i * width && codes[end - 1] === 0) end--;
+    strings[i] = String.fromCodePoint(...codes.subarray(i * width, end));
+  }
+  return strings;
+}
+
+async function fetchColumn(url: string, column: FileColumn): Promise<Float32Array | Uint32Array | string[]> {
+  const buffer = await fetchRange(url, column);
+  if (column.dtype === 'utf32') return decodeStrings(buffer, column.width ?? 1);
+  return column.dtype === 'float32' ? new Float32Array(buffer) : new Uint32Array(buffer);
+}
+
+async function fetchColumns(
+  url: string,
+  columns: FileValue['nodes'],
+): Promise<Record<string, EncodedColumn>> {
+  const entries = await Promise.all(
+    Object.entries(columns).map(async ([key, column]): Promise<[string, EncodedColumn]> => {
+      if ('categories' in column) {
+        const [categories, codes] = await Promise.all([
+          fetchColumn(url, column.categories),
+          fetchColumn(url, column.codes),
+        ]);
+        return [key, { categories, codes } as CategoricalColumn];
+      }
+      return [key, (await fetchColumn(url, column)) as EncodedColumn];
+    }),
+  );
+  return Object.fromEntries(entries);
+}
+
+// Fetches the columns of a graph file in parallel, each with its own range request, into a columnar value
+export async function fetchGraphFile(value: FileValue): Promise<ColumnarValue> {
+  const [nodes, links] = await Promise.all([
+    fetchColumns(value.file.url, value.nodes),
+    fetchColumns(value.file.url, value.links),
+  ]);
+  return {
+    format: 'columnar',
+    version: value.version,
+    nodeCount: value.nodeCount,
+    linkCount: value.linkCount,
+    nodes: nodes as ColumnarValue['nodes'],
+    links: links as ColumnarValue['links'],
+  };
+}
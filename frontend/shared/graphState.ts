@@ -0,0 +1,71 @@
+import type { DeltaValue, GraphData, Link, Node } from './types';
+
+// Must match `link_keys` in the backend's delta module
+const KEY_SEPARATOR = '\u001f';
+
+export function linkKeys(links: Link[]): string[] {
+  const seen = new Map<string, number>();
+  return links.map((link) => {
+    const pair = `${link.source}${KEY_SEPARATOR}${link.target}`;
+    const occurrence = seen.get(pair) ?? 0;
+    seen.set(pair, occurrence + 1);
+    return `${pair}${KEY_SEPARATOR}${occurrence}`;
+  });
+}
+
+// The graph currently displayed, indexed so deltas can be applied in place
+export class GraphState {
+  version: string | undefined;
+  // Kept through deltas, as communities can be expanded as long as the coarse graph is displayed
+  hierarchy: string | undefined;
+  private nodes = new Map<string, Node>();
+  private links = new Map<string, Link>();
+
+  replace(data: GraphData): void {
+    this.version = data.version;
+    this.hierarchy = data.hierarchy;
+    this.nodes = new Map(data.nodes.map((node) => [String(node.id), node]));
+    const keys = linkKeys(data.links);
+    this.links = new Map(data.links.map((link, i) => [keys[i], link]));
+  }
+
+  // Returns false when the delta was computed against a version we don't hold
+  applyDelta(delta: DeltaValue): boolean {
+    if (delta.base !== this.version) return false;
+
+    for (const id of delta.nodes.remove) {
+      this.nodes.delete(id);
+    }
+    for (const node of delta.nodes.upsert) {
+      const existing = this.nodes.get(String(node.id));
+      if (existing) {
+        // Keep the object so anything holding it (e.g. its position) stays attached
+        for (const key of Object.keys(existing)) {
+          if (!(key in node) && key !== 'x' && key !== 'y') delete existing[key];
+        }
+        Object.assign(existing, node);
+      } else {
+        this.nodes.set(String(node.id), node);
+      }
+    }
+
+    for (const key of delta.links.remove) {
+      this.links.delete(key);
+    }
+    for (const [key, link] of Object.entries(delta.links.upsert)) {
+      this.links.set(key, link);
+    }
+
+    this.version = delta.version;
+    return true;
+  }
+
+  toGraph(): GraphData {
+    return {
+      nodes: Array.from(this.nodes.values()),
+      links: Array.from(this.links.values()),
+      version: this.version,
+      hierarchy: this.hierarchy,
+    };
+  }
+}
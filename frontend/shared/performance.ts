@@ -0,0 +1,75 @@
+import type { GraphProps } from './cosmographConfig';
+
+export type PerformanceMode = 'auto' | 'quality' | 'fast';
+
+// The settings that performance profiles lower, as given to the component
+export type CostlySettings = Required<
+  Pick<
+    GraphProps,
+    | 'pixelRatio'
+    | 'curvedLinks'
+    | 'curvedLinkSegments'
+    | 'useQuadtree'
+    | 'repulsionQuadtreeLevels'
+    | 'spaceSize'
+    | 'showTopLabelsLimit'
+  >
+>;
+
+// From the settings as given to the cheapest ones, each profile lowering them further than the previous one
+const PROFILES: ((settings: CostlySettings) => Partial<CostlySettings>)[] = [
+  () => ({}),
+  (settings) => ({
+    pixelRatio: Math.min(settings.pixelRatio, 1.5),
+    curvedLinkSegments: Math.min(settings.curvedLinkSegments, 9),
+    showTopLabelsLimit: Math.min(settings.showTopLabelsLimit, 50),
+  }),
+  (settings) => ({
+    pixelRatio: Math.min(settings.pixelRatio, 1),
+    curvedLinks: false,
+    repulsionQuadtreeLevels: Math.min(settings.repulsionQuadtreeLevels, 10),
+    showTopLabelsLimit: Math.min(settings.showTopLabelsLimit, 20),
+  }),
+  (settings) => ({
+    pixelRatio: Math.min(settings.pixelRatio, 1),
+    curvedLinks: false,
+    useQuadtree: false,
+    repulsionQuadtreeLevels: Math.min(settings.repulsionQuadtreeLevels, 8),
+    showTopLabelsLimit: Math.min(settings.showTopLabelsLimit, 10),
+  }),
+];
+
+export const CHEAPEST_PROFILE = PROFILES.length - 1;
+
+// Nodes plus links from which "auto" starts at each profile after the first
+const PROFILE_SIZES = [50_000, 250_000, 1_000_000];
+
+// Simulation space given per node along each side, within the sizes Cosmograph supports
+const SPACE_PER_NODE = 32;
+const MIN_SPACE_SIZE = 1024;
+const MAX_SPACE_SIZE = 8192;
+
+export function initialProfile(mode: PerformanceMode, nodeCount: number, linkCount: number): number {
+  if (mode === 'quality') return 0;
+  if (mode === 'fast') return CHEAPEST_PROFILE;
+  return PROFILE_SIZES.filter((size) => nodeCount + linkCount >= size).length;
+}
+
+// Small graphs don't need the whole simulation space, whose textures cost as much whatever the graph
+function fittedSpaceSize(nodeCount: number): number {
+  const side = 2 ** Math.ceil(Math.log2(Math.sqrt(Math.max(nodeCount, 1)) * SPACE_PER_NODE));
+  return Math.min(Math.max(side, MIN_SPACE_SIZE), MAX_SPACE_SIZE);
+}
+
+// The settings to use with `profile`. The space is only fitted to `nodeCount` when `fitSpace`, as positions given by
+// the value are relative to the space as given.
+export function applyProfile(
+  settings: CostlySettings,
+  profile: number,
+  nodeCount: number,
+  fitSpace: boolean,
+): CostlySettings {
+  const profiled = { ...settings, ...PROFILES[Math.min(profile, CHEAPEST_PROFILE)](settings) };
+  if (fitSpace) profiled.spaceSize = Math.min(settings.spaceSize, fittedSpaceSize(nodeCount));
+  return profiled;
+}
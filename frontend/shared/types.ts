@@ -7,4 +7,118 @@ export interface Link {
   source: string;
   target: string;
   [key: string]: any; // Allow any additional properties
-}
\ No newline at end of file
+}
+
+export interface EncodedBuffer {
+  dtype: "float32" | "uint32";
+  data: string; // base64, little-endian
+}
+
+export interface GraphData {
+  nodes: Node[];
+  links: Link[];
+  version?: string;
+  hierarchy?: string; // set when the graph was coarsened into expandable communities
+  handle?: string; // set when the value was returned as a handle to a graph stored by the backend
+}
+
+// Columns decoded by the worker arrive as typed arrays instead of base64 buffers
+export type NumericColumn = EncodedBuffer | Float32Array | Uint32Array;
+
+// A string column sent as its distinct values and, per entry, the index of its value
+export interface CategoricalColumn {
+  categories: string[];
+  codes: NumericColumn;
+}
+
+export type EncodedColumn = NumericColumn | CategoricalColumn | string[];
+
+export interface ColumnarValue {
+  format: "columnar";
+  version?: string;
+  nodeCount: number;
+  linkCount: number;
+  nodes: { id?: string[]; [key: string]: EncodedColumn | undefined };
+  links: { source: NumericColumn; target: NumericColumn; [key: string]: EncodedColumn };
+}
+
+export interface DeltaValue {
+  format: "delta";
+  base: string;
+  version: string;
+  nodes: { upsert: Node[]; remove: string[] };
+  links: { upsert: Record<string, Link>; remove: string[] };
+  handle?: string;
+  hierarchy?: string; // the hierarchy of the new value, for deltas sent in place of a value
+}
+
+export interface CompressedValue {
+  format: "gzip";
+  version?: string;
+  data: string; // base64 of the gzip compressed JSON of another GraphValue
+}
+
+// Where a column lies in a graph file, fetched with a range request
+export interface FileColumn {
+  offset: number;
+  bytes: number;
+  dtype: "float32" | "uint32" | "utf32";
+  width?: number; // characters per string of utf32 columns
+}
+
+export interface FileValue {
+  format: "file";
+  version: string;
+  file: { path: string; url: string; size: number };
+  nodeCount: number;
+  linkCount: number;
+  nodes: Record<string, FileColumn | { categories: FileColumn; codes: FileColumn }>;
+  links: Record<string, FileColumn | { categories: FileColumn; codes: FileColumn }>;
+}
+
+// The part of a graph to draw in a viewport, fetched from the backend as the view moves
+export type ViewValue = (GraphData & { version: string }) | ColumnarValue;
+
+export interface TiledValue {
+  format: "tiled";
+  version: string;
+  nodeCount: number;
+  linkCount: number;
+  bounds: [number, number, number, number];
+  overview: ViewValue;
+}
+
+// Sent back with events in place of a graph patched by deltas, resolved by the backend from its version
+export interface HeldValue {
+  format: "held";
+  version: string;
+  handle?: string;
+}
+
+// A value the backend prepares off its event loop, e.g. lays out, fetched with its token once ready
+export interface PendingValue {
+  format: "pending";
+  version?: undefined;
+  token: string;
+}
+
+export type GraphValue =
+  | GraphData
+  | ColumnarValue
+  | DeltaValue
+  | CompressedValue
+  | FileValue
+  | TiledValue
+  | PendingValue
+  | HeldValue;
+
+// Reported to the backend for every value displayed, in seconds
+export interface RenderMetrics {
+  nodes: number;
+  links: number;
+  decode_seconds?: number;
+  set_data_seconds: number;
+  first_frame_seconds?: number;
+  simulation_fps?: number;
+  settle_seconds?: number;
+}
@@ -0,0 +1,83 @@
+import type { Link, Node } from './types';
+
+// Share of the new nodes that must already be displayed for their positions to be carried over
+export const WARM_START_OVERLAP = 0.5;
+
+// Gaussian noise, so new nodes sharing the same neighbours don't start on top of each other
+function jitter(scale: number): number {
+  const u = 1 - Math.random();
+  return scale * Math.sqrt(-2 * Math.log(u)) * Math.cos(2 * Math.PI * Math.random());
+}
+
+export function overlap(nodes: Node[], positions: Map<string, [number, number]>): number {
+  if (!nodes.length) return 0;
+  let kept = 0;
+  for (const node of nodes) {
+    if (positions.has(node.id)) kept++;
+  }
+  return kept / nodes.length;
+}
+
+// Sets `x` and `y` on every node, as Cosmograph starts the simulation from them: nodes that were displayed keep
+// their position, and so do new nodes the value gives one. Other new nodes start next to the mean of their placed
+// neighbours, spread by about `spread`, or anywhere within the placed nodes' bounds if they have none. Mirrors
+// `seed_positions` in the backend's layout module.
+export function seedPositions(
+  nodes: Node[],
+  links: Link[],
+  positions: Map<string, [number, number]>,
+  spread: number,
+): void {
+  const placed = new Map<string, [number, number]>();
+  for (const node of nodes) {
+    const position = positions.get(node.id);
+    if (position) {
+      placed.set(node.id, position);
+    } else if (typeof node.x === 'number' && typeof node.y === 'number') {
+      // Positioned by the value itself, e.g. a tile of a graph laid out on the server
+      placed.set(node.id, [node.x, node.y]);
+    }
+  }
+  let missing = nodes.filter((node) => !placed.has(node.id));
+
+  // New nodes linked to other new nodes only are placed once those are, a ring of the new nodes per pass
+  while (missing.length) {
+    const sums = new Map<string, [number, number, number]>();
+    for (const link of links) {
+      for (const [end, neighbour] of [[link.source, link.target], [link.target, link.source]]) {
+        const position = placed.get(neighbour);
+        if (!position || placed.has(end)) continue;
+        const sum = sums.get(end) ?? [0, 0, 0];
+        sum[0] += position[0];
+        sum[1] += position[1];
+        sum[2]++;
+        sums.set(end, sum);
+      }
+    }
+    if (!sums.size) break;
+    for (const [id, [x, y, count]] of sums) {
+      placed.set(id, [x / count + jitter(spread), y / count + jitter(spread)]);
+    }
+    missing = missing.filter((node) => !placed.has(node.id));
+  }
+  if (!placed.size) return;
+
+  let [minX, minY, maxX, maxY] = [Infinity, Infinity, -Infinity, -Infinity];
+  for (const [x, y] of placed.values()) {
+    minX = Math.min(minX, x);
+    minY = Math.min(minY, y);
+    maxX = Math.max(maxX, x);
+    maxY = Math.max(maxY, y);
+  }
+  for (const node of missing) {
+    placed.set(node.id, [minX + Math.random() * (maxX - minX), minY + Math.random() * (maxY - minY)]);
+  }
+
+  for (const node of nodes) {
+    const position = placed.get(node.id);
+    if (position) {
+      node.x = position[0];
+      node.y = position[1];
+    }
+  }
+}